@@ -0,0 +1,977 @@
+#!/usr/bin/env python3
+"""
+AEZ Evolution v2 — Performance Benchmarks
+
+Measures the engine's hot paths under controlled, seeded workloads.
+Results print as plain tables; redirect to bench_output.txt to keep them.
+
+Usage:
+    python benchmark.py              # Run every section
+    python benchmark.py ring         # Run sections whose name contains "ring"
+"""
+import sys
+import os
+import time
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import random
+
+from engine.evolution import Evolution, Attacks
+from engine.immune import ImmuneSystem
+
+
+SECTIONS = []
+
+
+def section(name):
+    def register(fn):
+        SECTIONS.append((name, fn))
+        return fn
+    return register
+
+
+def seed_all(seed: int):
+    np.random.seed(seed)
+    random.seed(seed)
+
+
+# ─── 1. Ring Candidate Generators ────────────────────────
+
+@section("ring candidate generators")
+def bench_ring_candidates():
+    """
+    Components vs personalized-PageRank sweep cuts, across attack sizes.
+    Latency = rounds from injection to the first ring detection that
+    contains an injected sybil. Runtime = wall time inside Phase 5.
+    """
+    population = 40
+    warmup = 10
+    horizon = 80
+    seeds = range(3)
+
+    detect = ImmuneSystem._detect_ring_statistical
+    timer = {'seconds': 0.0, 'calls': 0}
+
+    def timed(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return detect(self, *args, **kwargs)
+        finally:
+            timer['seconds'] += time.perf_counter() - start
+            timer['calls'] += 1
+
+    ImmuneSystem._detect_ring_statistical = timed
+    try:
+        print(f"{'generator':<12}{'sybils':>8}{'latency':>10}{'caught':>9}"
+              f"{'false+':>8}{'ms/cycle':>10}")
+        for attack_size in (4, 8, 16):
+            for generator in ImmuneSystem.CANDIDATE_GENERATORS:
+                latencies, caught, false_pos = [], [], []
+                timer['seconds'], timer['calls'] = 0.0, 0
+                for seed in seeds:
+                    seed_all(seed)
+                    evo = Evolution(population_size=population,
+                                    ring_candidates=generator)
+                    evo.spawn_population()
+                    for _ in range(warmup):
+                        evo.run_round()
+                    sybils = set(Attacks.sybil_attack(evo, attack_size))
+                    first = None
+                    for _ in range(horizon):
+                        evo.run_round()
+                        for event in evo.pop_events():
+                            if (first is None and event['type'] == 'ring_detected'
+                                    and sybils & set(event['members'])):
+                                first = evo.round - warmup
+                        if evo.round % 20 == 0:
+                            evo.run_selection()
+                    flagged = {a.id for a in evo.agents.values() if a.flagged_sybil}
+                    latencies.append(first if first is not None else np.nan)
+                    caught.append(len(flagged & sybils) / attack_size)
+                    false_pos.append(len(flagged - sybils))
+                latency = np.nanmean(latencies) if not np.all(np.isnan(latencies)) else float('nan')
+                ms = 1000.0 * timer['seconds'] / max(timer['calls'], 1)
+                print(f"{generator:<12}{attack_size:>8}{latency:>10.1f}"
+                      f"{np.mean(caught):>9.0%}{np.mean(false_pos):>8.1f}{ms:>10.2f}")
+    finally:
+        ImmuneSystem._detect_ring_statistical = detect
+
+
+# ─── 2. Interaction History Memory ───────────────────────
+
+@section("interaction history")
+def bench_history():
+    """
+    Per-opponent history: list of (bool, bool) tuples (the old layout)
+    vs packed 2-bit ring buffer. Memory per full 50-interaction window
+    and append throughput once the window is saturated.
+    """
+    import tracemalloc
+    from engine.history import InteractionBuffer
+
+    windows = 2000
+    pattern = [(i % 2 == 0, i % 3 != 0) for i in range(50)]
+
+    def measure(build):
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        kept = [build() for _ in range(windows)]
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        size = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+        del kept
+        return size / windows
+
+    list_bytes = measure(lambda: [(bool(m), bool(t)) for m, t in pattern])
+    packed_bytes = measure(lambda: InteractionBuffer.from_pairs(pattern))
+
+    n = 200_000
+    hist = [(True, False)] * 50
+    start = time.perf_counter()
+    for i in range(n):
+        hist.append((i % 2 == 0, True))
+        if len(hist) > 50:
+            hist = hist[-50:]
+    list_rate = n / (time.perf_counter() - start)
+
+    buf = InteractionBuffer.from_pairs(pattern)
+    start = time.perf_counter()
+    for i in range(n):
+        buf.append((i % 2 == 0, True))
+    packed_rate = n / (time.perf_counter() - start)
+
+    print(f"{'layout':<10}{'bytes/window':>14}{'appends/s':>14}")
+    print(f"{'list':<10}{list_bytes:>14.0f}{list_rate:>14,.0f}")
+    print(f"{'packed':<10}{packed_bytes:>14.0f}{packed_rate:>14,.0f}")
+
+
+# ─── 3. Shared Pair Log ──────────────────────────────────
+
+@section("shared pair log")
+def bench_pair_log():
+    """
+    Per-agent copies (two histories, two trust windows, two commitment
+    records per pair) vs one shared PairLog record per pair. Memory =
+    bytes retained by the simulation after a history-heavy run.
+    """
+    import tracemalloc
+
+    population = 60
+    rounds = 150
+
+    print(f"{'layout':<10}{'pairs':>8}{'MB':>8}{'ms/round':>10}")
+    for shared in (False, True):
+        seed_all(0)
+        tracemalloc.start()
+        evo = Evolution(population_size=population, shared_history=shared)
+        evo.spawn_population()
+        start = time.perf_counter()
+        for _ in range(rounds):
+            evo.run_round()
+        elapsed = time.perf_counter() - start
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        pairs = len({tuple(sorted(k)) for k in evo.trust_net.edges})
+        label = 'shared' if shared else 'copies'
+        print(f"{label:<10}{pairs:>8}{size / 1e6:>8.2f}{1000 * elapsed / rounds:>10.2f}")
+
+
+# ─── 4. Dead Agent Collection ────────────────────────────
+
+@section("dead agent collection")
+def bench_dead_collection():
+    """
+    Long run without and with dead-agent collection. Reports live agent
+    table size, trust edges, retained memory and per-round time at the
+    end of each block of generations — collection should keep them flat.
+    """
+    import tracemalloc
+
+    population = 40
+    generations = 12
+    rounds_per_generation = 20
+
+    print(f"{'retention':<11}{'gen':>5}{'agents':>8}{'edges':>8}{'MB':>8}{'ms/round':>10}")
+    for retention in (None, 0):
+        seed_all(0)
+        tracemalloc.start()
+        evo = Evolution(population_size=population, dead_retention=retention)
+        evo.spawn_population()
+        for gen in range(1, generations + 1):
+            start = time.perf_counter()
+            for _ in range(rounds_per_generation):
+                evo.run_round()
+            elapsed = time.perf_counter() - start
+            evo.run_selection()
+            if gen % 4 == 0:
+                size, _ = tracemalloc.get_traced_memory()
+                print(f"{str(retention):<11}{gen:>5}{len(evo.agents):>8}"
+                      f"{len(evo.trust_net.edges):>8}{size / 1e6:>8.2f}"
+                      f"{1000 * elapsed / rounds_per_generation:>10.2f}")
+        tracemalloc.stop()
+
+
+# ─── 5. Strategy Labels ──────────────────────────────────
+
+@section("strategy labels")
+def bench_strategy_labels():
+    """
+    get_strategy_label for a population with full history windows:
+    the old full-window rescan vs incremental counters, cold (inputs
+    changed since the last call) and warm (served from the cache).
+    """
+    seed_all(0)
+    evo = Evolution(population_size=40)
+    evo.spawn_population()
+    for _ in range(60):
+        evo.run_round()
+    agents = list(evo.agents.values())
+
+    def rescan(agent):
+        mirrors = total = 0
+        for hist in agent.history.values():
+            for i in range(1, len(hist)):
+                mirrors += hist[i][0] == hist[i - 1][1]
+                total += 1
+        return mirrors, total
+
+    repeats = 20
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for agent in agents:
+            rescan(agent)
+    rescan_us = 1e6 * (time.perf_counter() - start) / (repeats * len(agents))
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for agent in agents:
+            agent._label_cache = None
+            agent.get_strategy_label()
+    cold_us = 1e6 * (time.perf_counter() - start) / (repeats * len(agents))
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for agent in agents:
+            agent.get_strategy_label()
+    warm_us = 1e6 * (time.perf_counter() - start) / (repeats * len(agents))
+
+    print(f"{'path':<22}{'us/agent':>10}")
+    print(f"{'rescan (mirror scan)':<22}{rescan_us:>10.1f}")
+    print(f"{'counters, cold':<22}{cold_us:>10.2f}")
+    print(f"{'counters, cached':<22}{warm_us:>10.2f}")
+
+
+# ─── 6. Network Serialization ────────────────────────────
+
+@section("network serialization")
+def bench_network_data():
+    """
+    get_network_data per round: per-agent forward passes (cache disabled)
+    vs one batched pass, and a repeat call within the same round (what
+    a WebSocket get_state after the round broadcast costs).
+    """
+    seed_all(0)
+    evo = Evolution(population_size=80)
+    evo.spawn_population()
+    for _ in range(10):
+        evo.run_round()
+    alive = evo.get_alive()
+    repeats = 20
+
+    def per_agent():
+        for agent in alive:
+            agent._coop_prob_cache = None
+            agent.get_cooperation_probability()
+
+    def batched():
+        for agent in alive:
+            agent._coop_prob_cache = None
+        from engine.agent import cooperation_probabilities
+        cooperation_probabilities(alive)
+
+    print(f"{'path':<24}{'ms/call':>10}")
+    for label, fn in (("per-agent forward", per_agent), ("batched forward", batched)):
+        start = time.perf_counter()
+        for _ in range(repeats):
+            fn()
+        print(f"{label:<24}{1000 * (time.perf_counter() - start) / repeats:>10.3f}")
+
+    evo.get_network_data()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        evo.get_network_data()
+    print(f"{'get_network_data, warm':<24}{1000 * (time.perf_counter() - start) / repeats:>10.3f}")
+
+
+# ─── 7. Round Learning Step ──────────────────────────────
+
+@section("learning step")
+def bench_learning():
+    """
+    Cost of one round's learning for a population (one outcome per
+    agent): per-interaction _learn vs LearningBatch in both draw modes.
+    """
+    from engine.agent import NeuralAgent, LearningBatch
+
+    print(f"{'agents':>7}{'online ms':>11}{'deferred ms':>13}{'batched ms':>12}")
+    for population in (50, 200, 1000):
+        seed_all(0)
+        agents = [NeuralAgent(id=f"L{i:04d}") for i in range(population)]
+        outcomes = [(a, bool(i % 2), float((i * 37) % 700 - 200)) for i, a in enumerate(agents)]
+        repeats = 20
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            for agent, action, payoff in outcomes:
+                agent._learn(action, payoff)
+        online = 1000 * (time.perf_counter() - start) / repeats
+
+        timings = []
+        for draw in LearningBatch.DRAWS[::-1]:
+            start = time.perf_counter()
+            for _ in range(repeats):
+                batch = LearningBatch(draw)
+                for agent, action, payoff in outcomes:
+                    batch.add(agent, action, payoff)
+                batch.apply()
+            timings.append(1000 * (time.perf_counter() - start) / repeats)
+        print(f"{population:>7}{online:>11.2f}{timings[0]:>13.2f}{timings[1]:>12.2f}")
+
+
+# ─── 8. Agent Object Layout ──────────────────────────────
+
+@section("agent layout")
+def bench_agent_layout():
+    """
+    Per-agent memory and attribute-read speed: slotted NeuralAgent with
+    lazy containers vs a reference __dict__ object holding the same
+    fields with eagerly created containers (the previous layout).
+    Object bytes = instance + attribute storage + the three rarely-used
+    containers; tracemalloc bytes = everything NeuralAgent() allocates,
+    weights included.
+    """
+    import tracemalloc
+    from dataclasses import fields
+    from engine.agent import NeuralAgent
+
+    lazy = {'_threat_memory': list, '_warnings_received': dict, '_sybil_ring': set}
+
+    class DictAgent:
+        pass
+
+    def dict_agent(agent):
+        ref = DictAgent()
+        for f in fields(NeuralAgent):
+            if f.name in lazy:
+                setattr(ref, f.name.lstrip('_'), lazy[f.name]())
+            else:
+                setattr(ref, f.name, getattr(agent, f.name))
+        return ref
+
+    def object_bytes(obj):
+        if hasattr(obj, '__dict__'):
+            size = sys.getsizeof(obj) + sys.getsizeof(obj.__dict__)
+            return size + sum(sys.getsizeof(getattr(obj, n.lstrip('_'))) for n in lazy)
+        return sys.getsizeof(obj) + sum(sys.getsizeof(getattr(obj, n)) for n in lazy)
+
+    n = 10_000
+    seed_all(0)
+    tracemalloc.start()
+    agents = [NeuralAgent(id=f"M{i:05d}") for i in range(n)]
+    traced, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    refs = [dict_agent(a) for a in agents[:1000]]
+
+    def read_rate(population):
+        start = time.perf_counter()
+        for _ in range(100):
+            for a in population:
+                a.balance; a.interactions; a.vigilance; a.alive
+        return 1e9 * (time.perf_counter() - start) / (100 * len(population) * 4)
+
+    print(f"{'layout':<10}{'object B':>10}{'ns/read':>9}")
+    print(f"{'dict':<10}{object_bytes(refs[0]):>10}{read_rate(refs):>9.1f}")
+    print(f"{'slotted':<10}{object_bytes(agents[0]):>10}{read_rate(agents[:1000]):>9.1f}")
+    print(f"NeuralAgent() total: {traced / n:,.0f} B/agent (tracemalloc, {n:,} agents)")
+
+
+# ─── 9. Distilled Policy Tables ──────────────────────────
+
+@section("policy tables")
+def bench_policy_tables():
+    """
+    Exact network decisions vs distilled lookup tables: wall time per
+    round (tables also skip the three non-direct trust channels), the
+    sampled approximation error, and outcome drift in cooperation rate.
+    """
+    from engine.policy import PolicyTable
+
+    population = 60
+    rounds = 60
+
+    print(f"{'policy':<8}{'ms/round':>10}{'coop':>7}{'mean|dp|':>10}{'max|dp|':>9}")
+    for policy in ('exact', 'table'):
+        seed_all(1)
+        evo = Evolution(population_size=population, policy=policy)
+        evo.spawn_population()
+        start = time.perf_counter()
+        for _ in range(rounds):
+            evo.run_round()
+            if evo.round % 20 == 0:
+                evo.run_selection()
+        ms = 1000 * (time.perf_counter() - start) / rounds
+        coop = np.mean([s['coop_rate'] for s in evo.round_stats])
+        err = evo.policy_error.to_dict() if evo.policy_error else {}
+        mean_err = err.get('mean_abs_error')
+        max_err = err.get('max_abs_error')
+        print(f"{policy:<8}{ms:>10.1f}{coop:>7.3f}"
+              f"{mean_err if mean_err is not None else '-':>10}"
+              f"{max_err if max_err is not None else '-':>9}")
+
+    agent = evo.get_alive()[0]
+    start = time.perf_counter()
+    for _ in range(50):
+        PolicyTable.distill(agent)
+    print(f"distill: {1000 * (time.perf_counter() - start) / 50:.2f} ms/agent")
+
+
+# ─── 10. Float Precision ─────────────────────────────────
+
+@section("float precision")
+def bench_float_precision():
+    """
+    float64 vs float32 engine arrays: bytes per agent for the network and
+    trust-channel weights, ring evidence arrays, batched kernel
+    throughput (generic cooperation probabilities), round time and the
+    population-level cooperation rate across seeds.
+    """
+    from engine.agent import NeuralAgent, cooperation_probabilities
+    from engine.numerics import float_precision
+
+    seeds = range(4)
+    population = 60
+    rounds = 40
+
+    print(f"{'dtype':<9}{'weights B':>10}{'evidence KB':>12}{'batch us':>10}"
+          f"{'ms/round':>10}{'coop':>7}")
+    for name in ('float64', 'float32'):
+        with float_precision(name):
+            seed_all(0)
+            agents = [NeuralAgent(id=f"P{i:05d}") for i in range(2000)]
+            a = agents[0]
+            weight_bytes = sum(w.nbytes for w in (a.weights_ih, a.bias_h, a.weights_ho,
+                                                  a.bias_o, a.trust_weights))
+            start = time.perf_counter()
+            for _ in range(20):
+                for agent in agents:
+                    agent._coop_prob_cache = None
+                cooperation_probabilities(agents)
+            batch_us = 1e6 * (time.perf_counter() - start) / (20 * len(agents))
+
+            coops, elapsed = [], 0.0
+            for seed in seeds:
+                seed_all(seed)
+                evo = Evolution(population_size=population)
+                evo.spawn_population()
+                start = time.perf_counter()
+                for _ in range(rounds):
+                    evo.run_round()
+                    if evo.round % 20 == 0:
+                        evo.run_selection()
+                elapsed += time.perf_counter() - start
+                coops.append(np.mean([s['coop_rate'] for s in evo.round_stats]))
+            ids = [x.id for x in evo.get_alive()]
+            alpha, beta = evo.trust_net.edge_evidence(ids)
+            evidence_kb = (alpha.nbytes + beta.nbytes) / 1e3
+            ms = 1000 * elapsed / (rounds * len(seeds))
+        print(f"{name:<9}{weight_bytes:>10}{evidence_kb:>12.1f}{batch_us:>10.2f}"
+              f"{ms:>10.1f}{np.mean(coops):>7.3f}")
+
+
+# ─── 11. Bulk Spawning ───────────────────────────────────
+
+@section("bulk spawn")
+def bench_bulk_spawn():
+    """
+    One-at-a-time vs batched construction: spawning a population and
+    injecting a sybil wave (attackers share an output-layer template and,
+    in bulk mode, one ring set).
+    """
+    import tracemalloc
+
+    print(f"{'mode':<12}{'spawn 10k ms':>13}{'sybil 2k ms':>12}{'wave peak MB':>14}")
+    for bulk in (False, True):
+        seed_all(1)
+        evo = Evolution(population_size=10_000, bulk_spawn=bulk)
+        start = time.perf_counter()
+        evo.spawn_population()
+        spawn_ms = 1000 * (time.perf_counter() - start)
+        tracemalloc.start()
+        start = time.perf_counter()
+        Attacks.sybil_attack(evo, 2000)
+        sybil_ms = 1000 * (time.perf_counter() - start)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{'bulk' if bulk else 'sequential':<12}{spawn_ms:>13.0f}{sybil_ms:>12.0f}"
+              f"{peak / 1e6:>14.1f}")
+
+
+# ─── 12. Delta State Stream ──────────────────────────────
+
+@section("delta stream")
+def bench_delta_stream():
+    """
+    WebSocket payload per round: the full get_network_data() JSON vs a
+    StateStream delta, and the server-side cost of computing the diff.
+    """
+    import json
+    from engine.stream import StateStream
+
+    print(f"{'population':>10}{'full KB':>9}{'delta KB':>10}{'ratio':>7}{'diff ms':>9}")
+    for population in (50, 200):
+        seed_all(2)
+        evo = Evolution(population_size=population)
+        evo.spawn_population()
+        stream = StateStream()
+        stream.rebase(evo.get_network_data())
+        full = delta = diff = 0.0
+        rounds = 40
+        for _ in range(rounds):
+            evo.run_round()
+            if evo.round % 20 == 0:
+                evo.run_selection()
+            net = evo.get_network_data()
+            start = time.perf_counter()
+            frame = stream.publish(net)
+            diff += time.perf_counter() - start
+            full += len(json.dumps(net))
+            delta += len(json.dumps(frame))
+        print(f"{population:>10}{full / rounds / 1e3:>9.1f}{delta / rounds / 1e3:>10.1f}"
+              f"{full / delta:>7.1f}{1000 * diff / rounds:>9.2f}")
+
+
+# ─── 13. Binary Frames ───────────────────────────────────
+
+@section("binary frames")
+def bench_binary_frames():
+    """
+    One round's network state as JSON text vs a binary columnar frame:
+    bytes on the wire and server-side encode time (decode in the browser
+    is a typed-array view for the binary frame, JSON.parse for text).
+    """
+    import json
+    from engine.frames import encode_network
+
+    print(f"{'agents':>7}{'edges':>8}{'json KB':>9}{'binary KB':>11}"
+          f"{'json ms':>9}{'binary ms':>11}")
+    for population in (500, 2000):
+        seed_all(3)
+        evo = Evolution(population_size=population, bulk_spawn=True)
+        evo.spawn_population()
+        for _ in range(8):
+            evo.run_round()
+        net = evo.get_network_data()
+        repeats = 5
+        start = time.perf_counter()
+        for _ in range(repeats):
+            text = json.dumps(net)
+        json_ms = 1000 * (time.perf_counter() - start) / repeats
+        start = time.perf_counter()
+        for _ in range(repeats):
+            frame = encode_network(net)
+        binary_ms = 1000 * (time.perf_counter() - start) / repeats
+        print(f"{len(net['nodes']):>7}{len(net['edges']):>8}{len(text) / 1e3:>9.0f}"
+              f"{len(frame) / 1e3:>11.0f}{json_ms:>9.1f}{binary_ms:>11.1f}")
+
+
+# ─── 14. Simulation Actor ────────────────────────────────
+
+@section("simulation actor")
+def bench_simulation_actor():
+    """
+    Event-loop responsiveness while rounds run: the worst and mean delay
+    of a 1 ms heartbeat when rounds run inline in the coroutine (the old
+    handlers) vs on the SimulationActor thread.
+    """
+    import asyncio
+    from engine.actor import Simulation, SimulationActor
+
+    rounds = 10
+
+    async def measure(inline: bool):
+        seed_all(4)
+        actor = SimulationActor()
+        sim = await actor.call(Simulation, 400)
+        delays = []
+
+        async def heartbeat():
+            while True:
+                start = time.perf_counter()
+                await asyncio.sleep(0.001)
+                delays.append(time.perf_counter() - start - 0.001)
+
+        beat = asyncio.create_task(heartbeat())
+        await asyncio.sleep(0.01)
+        start = time.perf_counter()
+        for _ in range(rounds):
+            if inline:
+                sim.step()
+                await asyncio.sleep(0)
+            else:
+                await actor.call(sim.step)
+        elapsed = time.perf_counter() - start
+        beat.cancel()
+        actor.stop()
+        return 1000 * max(delays), 1000 * float(np.mean(delays)), 1000 * elapsed / rounds
+
+    print(f"{'mode':<8}{'worst stall ms':>15}{'mean stall ms':>14}{'ms/round':>10}")
+    for label, inline in (("inline", True), ("actor", False)):
+        worst, mean, per_round = asyncio.run(measure(inline))
+        print(f"{label:<8}{worst:>15.1f}{mean:>14.2f}{per_round:>10.1f}")
+
+
+# ─── 15. Round Snapshots ─────────────────────────────────
+
+@section("round snapshots")
+def bench_round_snapshots():
+    """
+    Cost of one dashboard poll of the four read endpoints: recomputing
+    from the live engine and encoding (the old handlers) vs serving the
+    round's snapshot (first poll encodes, later polls hit the cache).
+    """
+    import json
+    from engine.actor import Simulation
+
+    seed_all(5)
+    sim = Simulation(300)
+    for _ in range(10):
+        sim.step()
+    evo = sim.evo
+    polls = 20
+
+    def live():
+        json.dumps(evo.get_network_data())
+        json.dumps({"leaderboard": evo.get_leaderboard(10)})
+        json.dumps({"distribution": evo.get_strategy_distribution()})
+        json.dumps(sim.stats())
+
+    def snapshot():
+        snap = sim.snapshot
+        for view in ("state", "leaderboard", "strategies", "stats"):
+            snap.body(view, 10)
+
+    start = time.perf_counter()
+    for _ in range(polls):
+        live()
+    live_ms = 1000 * (time.perf_counter() - start) / polls
+    start = time.perf_counter()
+    snapshot()
+    first_ms = 1000 * (time.perf_counter() - start)
+    start = time.perf_counter()
+    for _ in range(polls):
+        snapshot()
+    cached_us = 1e6 * (time.perf_counter() - start) / polls
+    start = time.perf_counter()
+    sim.publish()
+    publish_ms = 1000 * (time.perf_counter() - start)
+
+    print(f"{'live recompute':<22}{live_ms:>10.2f} ms/poll")
+    print(f"{'snapshot, first poll':<22}{first_ms:>10.2f} ms")
+    print(f"{'snapshot, cached':<22}{cached_us:>10.2f} us/poll")
+    print(f"{'publish (per command)':<22}{publish_ms:>10.2f} ms")
+
+
+@section("turbo mode")
+def bench_turbo_mode():
+    """
+    Rounds per second for a /sim/run: normal rounds publish a snapshot
+    per round and sleep 50 ms for the dashboard; turbo rounds skip both
+    and publish once per frame (10 fps).
+    """
+    from engine.actor import Simulation
+
+    rounds = 30
+    results = {}
+    for mode in ("normal", "turbo"):
+        seed_all(6)
+        sim = Simulation(100)
+        start = time.perf_counter()
+        for _ in range(rounds):
+            if mode == "normal":
+                sim.step(20)
+                time.sleep(0.05)
+            else:
+                sim.step(20, publish=False)
+        if mode == "turbo":
+            frames = max(1, int((time.perf_counter() - start) * 10))
+            for _ in range(frames):
+                sim.dirty = True
+                sim.refresh()
+        results[mode] = time.perf_counter() - start
+
+    for mode, seconds in results.items():
+        print(f"{mode:<10}{rounds / seconds:>10.1f} rounds/s")
+    print(f"{'speedup':<10}{results['normal'] / results['turbo']:>10.1f}x")
+
+
+@section("client fan-out")
+def bench_client_fanout():
+    """
+    Time for broadcast() to hand one 300-agent round to 20 JSON clients,
+    one of them on a slow link (20 ms per send): awaiting each send in
+    turn with send_json's per-client encode (old) vs one encode and a
+    put per client queue (new).
+    """
+    import asyncio
+    import json
+    from engine.actor import Simulation
+    from engine.fanout import ClientChannel, Envelope
+
+    seed_all(7)
+    sim = Simulation(300)
+    _, message = sim.step()
+    clients, rounds = 20, 10
+
+    class Socket:
+        def __init__(self, delay):
+            self.delay = delay
+
+        async def send_text(self, text):
+            if self.delay:
+                await asyncio.sleep(self.delay)
+
+        async def send_json(self, data):
+            await self.send_text(json.dumps(data))
+
+    sockets = [Socket(0.02 if k == 0 else 0) for k in range(clients)]
+
+    async def sequential():
+        for ws in sockets:
+            await ws.send_json(message)
+
+    async def queued(channels):
+        envelope = Envelope.json(message, droppable=True)
+        for channel in channels:
+            channel.put(envelope)
+
+    async def run():
+        start = time.perf_counter()
+        for _ in range(rounds):
+            await sequential()
+        old_ms = 1000 * (time.perf_counter() - start) / rounds
+        channels = [ClientChannel(ws) for ws in sockets]
+        for channel in channels:
+            channel.start()
+        start = time.perf_counter()
+        for _ in range(rounds):
+            await queued(channels)
+            await asyncio.sleep(0)
+        new_ms = 1000 * (time.perf_counter() - start) / rounds
+        await asyncio.sleep(0.1)
+        for channel in channels:
+            channel.close()
+        return old_ms, new_ms, channels[0].dropped
+
+    old_ms, new_ms, dropped = asyncio.run(run())
+    print(f"{'sequential send_json':<24}{old_ms:>10.2f} ms/round")
+    print(f"{'encode once + queues':<24}{new_ms:>10.2f} ms/round")
+    print(f"{'slow client dropped':<24}{dropped:>10d} of {rounds} frames")
+
+
+@section("topic subscriptions")
+def bench_topic_subscriptions():
+    """
+    Per-round server cost for a leaderboard + narration widget: the full
+    message (network snapshot and its encode) vs topics, which skip
+    get_network_data and encode only the subscribed parts.
+    """
+    import json
+    from engine.actor import Simulation
+    from engine.topics import split
+
+    rounds = 10
+    results = {}
+    for mode in ("full message", "topics"):
+        seed_all(8)
+        sim = Simulation(300)
+        for _ in range(5):
+            sim.step()
+        start = time.perf_counter()
+        size = 0
+        for _ in range(rounds):
+            if mode == "topics":
+                _, message = sim.step(20, False)
+                for topic, (part, _) in split(message).items():
+                    if topic in ("leaderboard", "narration"):
+                        size += len(json.dumps(part, separators=(',', ':')))
+            else:
+                _, message = sim.step(20)
+                size += len(json.dumps(message, separators=(',', ':')))
+        results[mode] = (1000 * (time.perf_counter() - start) / rounds, size / rounds)
+
+    for mode, (ms, size) in results.items():
+        print(f"{mode:<14}{ms:>10.1f} ms/round{size / 1024:>10.1f} KiB/round")
+
+
+@section("simulation pool")
+def bench_simulation_pool():
+    """
+    One 300-agent simulation hosted in this interpreter and in a worker
+    process: what a round costs end to end (the worker adds a pipe
+    round trip and one pickle of each published snapshot), idle
+    eviction, resume on access, and the checkpoint left on disk.
+    """
+    import asyncio
+    import os
+    import tempfile
+    from engine.pool import SimulationPool
+
+    async def run(processes: bool):
+        seed_all(9)
+        pool = SimulationPool(checkpoint_dir=tempfile.mkdtemp(), processes=processes)
+        hosted = await pool.admit("bench")
+        start = time.perf_counter()
+        hosted.sim = await pool.create(hosted, 300, 9 if processes else None)
+        create_ms = 1000 * (time.perf_counter() - start)
+        start = time.perf_counter()
+        for _ in range(10):
+            await pool.run(hosted, hosted.sim.step)
+        round_ms = 100 * (time.perf_counter() - start)
+        start = time.perf_counter()
+        await pool.evict("bench")
+        evict_ms = 1000 * (time.perf_counter() - start)
+        size = os.path.getsize(pool.checkpoint_path("bench"))
+        start = time.perf_counter()
+        hosted = await pool.get("bench")
+        resume_ms = 1000 * (time.perf_counter() - start)
+        start = time.perf_counter()
+        await pool.run(hosted, hosted.sim.refresh)
+        publish_ms = 1000 * (time.perf_counter() - start)
+        pool.shutdown()
+        return create_ms, round_ms, evict_ms, size / 1024, resume_ms, publish_ms
+
+    rows = ("create", "round (published)", "evict (checkpoint)", "checkpoint KiB",
+            "resume on access", "first read (publish)")
+    thread, worker = asyncio.run(run(False)), asyncio.run(run(True))
+    print(f"{'':<24}{'thread':>10}{'worker':>10}")
+    for name, a, b in zip(rows, thread, worker):
+        print(f"{name:<24}{a:>10.1f}{b:>10.1f}")
+
+
+@section("metrics scrape")
+def bench_metrics_scrape():
+    """
+    Rendering /metrics for one simulation against computing /sim/stats,
+    as the network grows, and what keeping the metrics costs per round.
+    """
+    from engine.actor import Simulation
+    from engine.metrics import Exposition
+
+    def per_call(fn, n):
+        start = time.perf_counter()
+        for _ in range(n):
+            fn()
+        return 1000 * (time.perf_counter() - start) / n
+
+    print(f"{'agents':<8}{'edges':>8}{'scrape':>12}{'stats':>12}{'upkeep':>12}")
+    for population in (50, 200):
+        seed_all(10)
+        sim = Simulation(population)
+        for _ in range(15):
+            sim.step()
+
+        def scrape():
+            out = Exposition()
+            sim.metrics.render(out, sim="bench")
+            return out.text()
+        scrape_ms = per_call(scrape, 200)
+        stats_ms = per_call(sim.stats, 20)
+        upkeep_ms = per_call(lambda: sim.metrics.update(sim.evo), 20)
+        print(f"{population:<8}{len(sim.evo.trust_net.edges):>8}{scrape_ms:>10.3f}ms"
+              f"{stats_ms:>10.3f}ms{upkeep_ms:>10.3f}ms")
+
+
+
+@section("agent and subgraph queries")
+def bench_agent_queries():
+    """
+    One agent's detail (1-hop ego network with channels) and a 20-agent
+    subgraph, against pulling the whole network as /sim/state did, as
+    the population grows. Query times should stay flat.
+    """
+    print(f"{'agents':<8}{'edges':>8}{'round':>11}{'state':>11}{'agent':>11}{'subgraph':>11}")
+    for population in (50, 150):
+        seed_all(11)
+        evo = Evolution(population_size=population)
+        evo.spawn_population()
+        start = time.perf_counter()
+        for _ in range(10):
+            evo.run_round()
+        round_ms = 100 * (time.perf_counter() - start)
+        ids = sorted(a.id for a in evo.get_alive())
+
+        def per_call(fn, n=20):
+            start = time.perf_counter()
+            for _ in range(n):
+                fn()
+            return 1000 * (time.perf_counter() - start) / n
+        state_ms = per_call(evo.get_network_data, 5)
+        agent_ms = per_call(lambda: evo.get_agent_detail(ids[0], hops=1, min_score=0.6))
+        sub_ms = per_call(lambda: evo.get_subgraph(agent_ids=ids[:20]))
+        print(f"{population:<8}{len(evo.trust_net.edges):>8}{round_ms:>9.1f}ms"
+              f"{state_ms:>9.1f}ms{agent_ms:>9.1f}ms{sub_ms:>9.1f}ms")
+
+
+@section("ring candidate test at scale")
+def bench_ring_candidate_scale():
+    """
+    The population statistics pass and one ring z-test on a sparse trust
+    graph (20 out-edges per agent) of up to 20k agents. Both read edges
+    from the trust indexes: the pass grows with the edge count and a
+    candidate with its members' in-degree. The last column is what the
+    two dense n × n evidence matrices alone would have taken.
+    """
+    from engine.trust import TrustNetwork, TrustState
+
+    immune = ImmuneSystem()
+    print(f"{'agents':<8}{'edges':>9}{'stats pass':>12}{'ring 5':>9}{'ring 50':>9}"
+          f"{'ring 500':>10}{'dense MB':>10}")
+    for population in (2000, 20000):
+        rng = np.random.default_rng(12)
+        ids = [f"a{i:05d}" for i in range(population)]
+        net = TrustNetwork()
+        for i, src in enumerate(ids):
+            for j in rng.choice(population, 20, replace=False):
+                if j != i:
+                    net._add_edge(src, ids[j], TrustState(alpha=float(rng.integers(1, 12)),
+                                                         beta=float(rng.integers(1, 12))))
+        members = set(ids)
+
+        start = time.perf_counter()
+        stats = immune._gather_ring_evidence(net, ids)
+        stats_ms = 1000 * (time.perf_counter() - start)
+        ring_ms = []
+        for size in (5, 50, 500):
+            start = time.perf_counter()
+            for _ in range(10):
+                immune._test_ring_candidate(ids[:size], net, members, stats)
+            ring_ms.append(100 * (time.perf_counter() - start))
+        dense_mb = 2 * population * population * 8 / 1e6
+        print(f"{population:<8}{len(net.edges):>9}{stats_ms:>10.1f}ms"
+              + "".join(f"{ms:>{w}.2f}ms" for ms, w in zip(ring_ms, (7, 7, 8)))
+              + f"{dense_mb:>10.0f}")
+
+
+# ─── Runner ──────────────────────────────────────────────
+
+if __name__ == "__main__":
+    selected = sys.argv[1:]
+    print("=" * 60)
+    print("AEZ EVOLUTION v2 — BENCHMARKS")
+    print("=" * 60)
+    for name, fn in SECTIONS:
+        if selected and not any(s in name for s in selected):
+            continue
+        print(f"\n--- {name} ---")
+        fn()
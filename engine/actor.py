@@ -0,0 +1,329 @@
+"""
+AEZ Evolution v2 — Simulation Actor
+
+The server used to run evo.run_round() inside its async handlers. A
+round is pure CPU work, so while it ran the event loop stood still: no
+WebSocket sends, no GET responses, nothing. And two handlers (say
+/sim/round and the auto loop) could interleave on the same Evolution
+at their await points.
+
+Now one Simulation — the Evolution, its Narrator and every command
+that touches them — is owned by one SimulationActor: a dedicated
+worker thread draining a FIFO command queue. Handlers submit commands
+and await the result; the event loop keeps serving while the actor
+works, and commands never overlap because there is only one thread to
+run them.
+
+Commands return (response, message): the HTTP response body and the
+message to broadcast (or None). Broadcasting stays on the event loop,
+which owns the sockets.
+
+The actor is a thread, and on its own the Simulation runs on it: rounds
+spend most of their time in Python code holding the GIL, which the
+interpreter hands back to the event loop every switch interval (5 ms),
+so a round delays I/O by a few milliseconds instead of its full
+duration. Hosting many tenants, the pool moves each Simulation into a
+worker process (engine/worker.py) and the actor thread just forwards
+its commands there; readers still get the published snapshot locally.
+"""
+
+import asyncio
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
+
+import numpy as np
+
+from .agent import NeuralAgent
+from .evolution import Evolution, Attacks
+from .narrator import Narrator
+from .metrics import SimulationMetrics
+from .snapshot import RoundSnapshot, LEADERBOARD_DEPTH
+from .topics import EGO_PREFIX
+
+
+class Simulation:
+    """
+    One simulation and its commands. Every method runs on the owning
+    actor's thread — call them through SimulationActor, never directly
+    from a request handler. The exception is `snapshot`: any thread may
+    read the latest published RoundSnapshot.
+    """
+
+    def __init__(self, population: int = 50, sim_id: str = "sim"):
+        self.id = sim_id
+        self.evo = Evolution(population_size=population)
+        self.evo.spawn_population()
+        self.narrator = Narrator()
+        self.snapshot: Optional[RoundSnapshot] = None
+        self.published = 0   # snapshot versions; checkpoints carry it across resumes
+        self.dirty = False   # state changed since the last publish (turbo rounds)
+        self.metrics = SimulationMetrics()   # see engine/metrics.py
+        self.metrics.update(self.evo)
+
+    def publish(self) -> RoundSnapshot:
+        """Snapshot the current state and make it the one readers see.
+        Every command that changes the simulation ends here (turbo rounds
+        leave it to the frame broadcaster, see refresh)."""
+        self.published += 1
+        snapshot = RoundSnapshot(self.evo.get_network_data(),
+                                 self.evo.get_leaderboard(LEADERBOARD_DEPTH),
+                                 self.stats(), self.published, self.id)
+        self.snapshot = snapshot
+        self.dirty = False
+        return snapshot
+
+    def __getstate__(self):
+        # Checkpoints (engine/pool.py) hold the engine, not the published
+        # snapshot: a resumed simulation republishes on its first read.
+        state = self.__dict__.copy()
+        state['snapshot'] = None
+        state['dirty'] = True
+        return state
+
+    def refresh(self) -> RoundSnapshot:
+        """The latest snapshot, publishing first if turbo rounds ran since."""
+        return self.publish() if self.dirty else self.snapshot
+
+    # ─── Messages ────────────────────────────────────────
+
+    def _network_message(self, kind: str, publish: bool = True, topics=(), **fields) -> dict:
+        if publish:
+            snapshot = self.publish()
+            leaderboard = snapshot.leaderboard[:8]
+            message = {"type": kind, "data": snapshot.network, **fields}
+        else:
+            self.dirty = True
+            leaderboard = self.evo.get_leaderboard(8)
+            message = {"type": kind, **fields}
+        self.narrator.track_leaderboard(leaderboard)
+        message["leaderboard"] = leaderboard
+        message["agent_names"] = self.narrator.get_agent_names()
+        if topics:
+            message["topics"] = self.topic_payloads(topics)
+        return message
+
+    def created(self, topics=()) -> tuple[dict, dict]:
+        return ({"status": "created", "agents": len(self.evo.agents)},
+                self._network_message("created", topics=topics))
+
+    def _pop_events(self) -> list[dict]:
+        """The engine's new events, counted into the metrics along with
+        the gauges. Every command that changes the simulation calls it."""
+        events = self.evo.pop_events()
+        self.metrics.observe_events(events)
+        self.metrics.update(self.evo)
+        return events
+
+    # ─── Commands ────────────────────────────────────────
+
+    def step(self, selection_interval: int = 0, publish: bool = True,
+             topics=()) -> tuple[dict, dict]:
+        """One round (plus selection every selection_interval rounds).
+        publish=False (turbo, or nobody watching the graph) skips the
+        snapshot: the message carries no network and the simulation is
+        marked dirty. topics: computed topics to attach (see topic_payloads)."""
+        evo = self.evo
+        started = time.perf_counter()
+        evo.run_round()
+        self.metrics.observe_round(evo, time.perf_counter() - started)
+        Attacks.activate_trojans(evo)
+        if selection_interval > 0 and evo.round % selection_interval == 0:
+            evo.run_selection()
+
+        events = self._pop_events()
+        stats = evo.round_stats[-1] if evo.round_stats else {}
+        narration = self.narrator.narrate(evo.round, events, stats)
+        response = {
+            "round": evo.round,
+            "alive": len(evo.get_alive()),
+            "narration": narration
+        }
+        return response, self._network_message("round", publish, topics, events=events[:10],
+                                               narration=narration)
+
+    def selection(self) -> tuple[dict, dict]:
+        self.evo.run_selection()
+        events = self._pop_events()
+        self.publish()
+        response = {"generation": self.evo.generation, "alive": len(self.evo.get_alive())}
+        return response, {"type": "selection", "events": events[:10]}
+
+    def payoff(self, tier: str, key: str, value: float) -> tuple[dict, dict]:
+        self.evo.set_payoff(tier, key, value)
+        events = self._pop_events()
+        self.publish()
+        return ({"payoff_matrices": self._payoff_matrices()},
+                {"type": "payoff_change", "events": events})
+
+    def _over_population(self, added: int, max_population: Optional[int]) -> Optional[dict]:
+        # Checked here, on the actor, so it sees the population the
+        # command will actually grow (not a read racing a running round)
+        if max_population is not None and len(self.evo.agents) + added > max_population:
+            return {"error": f"Population above quota ({max_population})."}
+        return None
+
+    def attack(self, kind: str, count: int, target: Optional[str] = None,
+               max_population: Optional[int] = None) -> tuple[dict, Optional[dict]]:
+        refused = self._over_population(count, max_population)
+        if refused:
+            return refused, None
+        evo = self.evo
+        ids = []
+        if kind == "sybil":
+            ids = Attacks.sybil_attack(evo, count)
+        elif kind == "trojan":
+            ids = Attacks.trojan_attack(evo, count)
+        elif kind == "eclipse" and target:
+            ids = Attacks.eclipse_attack(evo, target, count)
+        elif kind == "whitewash":
+            ids = Attacks.whitewash_attack(evo, count)
+
+        events = self._pop_events()
+        self.publish()
+        return ({"attack": kind, "agents_injected": ids},
+                {"type": "attack", "attack_type": kind, "events": events})
+
+    def detect(self) -> tuple[dict, Optional[dict]]:
+        """Manually trigger an immune detection cycle."""
+        evo = self.evo
+        started = time.perf_counter()
+        flagged = evo.immune.run_cycle(evo.agents, evo.trust_net, evo.round)
+        self.metrics.observe_immune(time.perf_counter() - started)
+        evo.events.extend(evo.immune.pop_events())
+        events = self._pop_events()
+        all_flagged = [a.id for a in evo.get_alive() if a.flagged_sybil]
+        self.publish()
+        message = None
+        if events:
+            stats = evo.round_stats[-1] if evo.round_stats else {}
+            narration = self.narrator.narrate(evo.round, events, stats)
+            message = {"type": "detection", "events": events, "narration": narration}
+        response = {"flagged": all_flagged, "count": len(all_flagged),
+                    "newly_flagged": list(flagged)}
+        return response, message
+
+    def inject(self, max_population: Optional[int] = None) -> tuple[dict, None]:
+        """Inject a single random agent."""
+        refused = self._over_population(1, max_population)
+        if refused:
+            return refused, None
+        evo = self.evo
+        agent = NeuralAgent(id=f"J{evo.next_id + 1:04d}", generation=evo.generation)
+        evo.next_id += 1
+        agent.balance = 800
+        evo.agents[agent.id] = agent
+        self.metrics.update(evo)
+        self.publish()
+        return {"injected": agent.to_dict()}, None
+
+    # ─── Queries ─────────────────────────────────────────
+    # Results are serialized on the event loop while the actor may already
+    # be running the next command: return copies, never live engine state.
+    # Reads normally come from `snapshot`; these build its parts and serve
+    # what a snapshot does not hold.
+
+    def _payoff_matrices(self) -> dict:
+        return {tier: dict(m) for tier, m in self.evo.payoff_matrices.items()}
+
+    def topic_payloads(self, topics) -> dict:
+        """Payloads for the computed WebSocket topics (engine/topics.py):
+        stats, immune and graph:ego:<id>."""
+        payloads = {}
+        for topic in topics:
+            if topic == "stats":
+                payloads[topic] = self.stats()
+            elif topic == "immune":
+                payloads[topic] = self.immune()
+            elif topic.startswith(EGO_PREFIX):
+                payloads[topic] = self.evo.get_ego_network(topic[len(EGO_PREFIX):])
+        return payloads
+
+    def immune(self) -> dict:
+        alive = self.evo.get_alive()
+        flagged = [a.id for a in alive if a.flagged_sybil]
+        return {
+            "round": self.evo.round,
+            "flagged": flagged,
+            "flagged_sybils": len(flagged),
+            "immune_warnings_total": sum(a.warnings_emitted for a in alive),
+            "immune_memory_total": sum(a.threat_memory_count for a in alive),
+            "avg_vigilance": round(float(np.mean([a.vigilance for a in alive])), 3) if alive else 0,
+        }
+
+    def agent(self, agent_id: str, hops: int = 1, min_trust: float = 0.2) -> Optional[dict]:
+        return self.evo.get_agent_detail(agent_id, hops, min_trust)
+
+    def subgraph(self, agents: Optional[list] = None, cluster: Optional[int] = None,
+                 center: Optional[str] = None, hops: int = 1, flagged: bool = False,
+                 strategy: Optional[str] = None, min_trust: float = 0.2,
+                 limit: int = 200) -> dict:
+        """Evolution.get_subgraph; cluster is an index into the published
+        network's clusters (the ids /sim/state clients see)."""
+        if cluster is not None:
+            clusters = self.refresh().network['clusters']
+            if not 0 <= cluster < len(clusters):
+                raise ValueError(f"Unknown cluster: {cluster}")
+            members = set(clusters[cluster])
+            agents = members if agents is None else members.intersection(agents)
+        return self.evo.get_subgraph(agents, center, hops, flagged, strategy, min_trust, limit)
+
+    def leaderboard(self, limit: int = 10) -> dict:
+        return {"leaderboard": self.evo.get_leaderboard(limit)}
+
+    def stats(self) -> dict:
+        evo = self.evo
+        alive = evo.get_alive()
+        return {
+            "round": evo.round,
+            "generation": evo.generation,
+            "alive": len(alive),
+            "total_agents": len(evo.agents),
+            "archived_agents": evo.archived_total,
+            "payoff_matrices": self._payoff_matrices(),
+            "trust_edges": len(evo.trust_net.edges),
+            "immune_warnings_total": sum(a.warnings_emitted for a in alive),
+            "immune_memory_total": sum(a.threat_memory_count for a in alive),
+            "avg_vigilance": round(float(np.mean([a.vigilance for a in alive])), 3) if alive else 0,
+            "flagged_sybils": sum(1 for a in alive if a.flagged_sybil),
+            "round_stats": evo.round_stats[-20:]
+        }
+
+
+class SimulationActor:
+    """A single worker thread running submitted commands in FIFO order."""
+
+    def __init__(self, name: str = "sim"):
+        self.name = name
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Each counter has one writer: submitted the caller, completed the actor
+        self.submitted = 0
+        self.completed = 0
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        """Queue fn(*args, **kwargs) on the actor thread."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=self.name)
+        self.submitted += 1
+        future = self._executor.submit(fn, *args, **kwargs)
+        future.add_done_callback(self._finished)
+        return future
+
+    def _finished(self, _future: Future):
+        self.completed += 1
+
+    @property
+    def pending(self) -> int:
+        """Commands queued or running."""
+        return self.submitted - self.completed
+
+    async def call(self, fn, *args, **kwargs):
+        """Run a command on the actor and await its result without
+        blocking the event loop."""
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def stop(self, wait: bool = True):
+        """Finish queued commands (wait=True) or drop them, then stop."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=not wait)
+            self._executor = None
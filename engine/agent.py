@@ -45,9 +45,11 @@ import hashlib
 import os
 from dataclasses import dataclass, field
 from typing import Optional
+from .history import InteractionHistory, ActionBuffer
+from .numerics import float_dtype
 
 
-@dataclass
+@dataclass(slots=True)
 class NeuralAgent:
     id: str
     generation: int = 0
@@ -79,30 +81,85 @@ class NeuralAgent:
     interactions: int = 0
     cooperations: int = 0
     defections: int = 0
-    history: dict = field(default_factory=dict)  # opp_id → [(my_action, their_action)]
-    action_sequence: list = field(default_factory=list)  # temporal behavior for analysis
+    history: dict = field(default_factory=InteractionHistory)  # opp_id → packed (mine, theirs) ring
+    action_sequence: ActionBuffer = field(default_factory=ActionBuffer)  # last 100 own actions
     recent_opponents: list = field(default_factory=list)  # opponents this round
 
     # ─── Commitment Protocol State ───────────────────────
     _committed_action: Optional[bool] = field(default=None, repr=False)
     _commitment_nonce: Optional[bytes] = field(default=None, repr=False)
     _commitment_hash: Optional[bytes] = field(default=None, repr=False)
-    commitment_history: dict = field(default_factory=dict)  # opp_id → [honors, breaks]
+    commitment_history: dict = field(default_factory=dict)  # opp_id → [honors, breaks]  (view when shared)
 
     # ─── Local Threat Model ──────────────────────────────
     suspicion_scores: dict = field(default_factory=dict)    # opp_id → float
-    threat_memory: list = field(default_factory=list)       # stored threat patterns
-    warnings_received: dict = field(default_factory=dict)   # target_id → [warnings]
+    _threat_memory: Optional[list] = field(default=None, repr=False)      # stored threat patterns
+    _warnings_received: Optional[dict] = field(default=None, repr=False)  # target_id → [warnings]
     warnings_emitted: int = 0   # for tracking warning cost
 
     # ─── Sybil State ────────────────────────────────────
-    sybil_ring: set = field(default_factory=set)
+    _sybil_ring: Optional[set] = field(default=None, repr=False)
     flagged_sybil: bool = False
 
+    # (inputs, label) from the last get_strategy_label call
+    _label_cache: Optional[tuple] = field(default=None, repr=False, compare=False)
+    # (inputs, probability) for the generic cooperation tendency
+    _coop_prob_cache: Optional[tuple] = field(default=None, repr=False, compare=False)
+    # Distilled PolicyTable (approximate mode); decide() uses it when set
+    policy_table: Optional[object] = field(default=None, repr=False, compare=False)
+
     # Architecture constants
     INPUT_SIZE = 11
     HIDDEN_SIZE = 16
 
+    # ─── Lazy Containers ─────────────────────────────────
+    # Most agents never store a threat pattern, receive a warning or join
+    # a ring, so these stay None until used. Reading one materializes an
+    # empty container (callers may mutate what they get); assigning an
+    # empty one releases it. Hot paths test the private slot directly.
+
+    @property
+    def threat_memory(self) -> list:
+        if self._threat_memory is None:
+            self._threat_memory = []
+        return self._threat_memory
+
+    @threat_memory.setter
+    def threat_memory(self, value: list):
+        self._threat_memory = value or None
+
+    @property
+    def warnings_received(self) -> dict:
+        if self._warnings_received is None:
+            self._warnings_received = {}
+        return self._warnings_received
+
+    @warnings_received.setter
+    def warnings_received(self, value: dict):
+        self._warnings_received = value or None
+
+    @property
+    def sybil_ring(self) -> set:
+        if self._sybil_ring is None:
+            self._sybil_ring = set()
+        return self._sybil_ring
+
+    @sybil_ring.setter
+    def sybil_ring(self, value: set):
+        self._sybil_ring = value or None
+
+    @property
+    def is_sybil(self) -> bool:
+        return bool(self._sybil_ring)
+
+    @property
+    def threat_memory_count(self) -> int:
+        return len(self._threat_memory) if self._threat_memory else 0
+
+    def warning_targets(self) -> list[str]:
+        """Targets this agent holds warnings about, sorted (deterministic)."""
+        return sorted(self._warnings_received) if self._warnings_received else []
+
     def __post_init__(self):
         if self.weights_ih is None:
             self.randomize_weights()
@@ -110,21 +167,24 @@ class NeuralAgent:
             # Initialize with slight randomness around equal weighting
             w = np.array([0.25, 0.25, 0.25, 0.25]) + np.random.randn(4) * 0.05
             w = np.clip(w, 0.05, 0.95)
-            self.trust_weights = w / w.sum()
+            self.trust_weights = (w / w.sum()).astype(float_dtype(), copy=False)
 
     def randomize_weights(self):
         """Xavier initialization — principled, not arbitrary."""
         fan_in_h = self.INPUT_SIZE
         fan_out_h = self.HIDDEN_SIZE
         limit_h = np.sqrt(6.0 / (fan_in_h + fan_out_h))
-        self.weights_ih = np.random.uniform(-limit_h, limit_h, (self.HIDDEN_SIZE, self.INPUT_SIZE))
-        self.bias_h = np.zeros(self.HIDDEN_SIZE)
+        dtype = float_dtype()  # drawn in float64, then cast: same RNG stream
+        self.weights_ih = np.random.uniform(
+            -limit_h, limit_h, (self.HIDDEN_SIZE, self.INPUT_SIZE)).astype(dtype, copy=False)
+        self.bias_h = np.zeros(self.HIDDEN_SIZE, dtype=dtype)
 
         fan_in_o = self.HIDDEN_SIZE
         fan_out_o = 1
         limit_o = np.sqrt(6.0 / (fan_in_o + fan_out_o))
-        self.weights_ho = np.random.uniform(-limit_o, limit_o, (1, self.HIDDEN_SIZE))
-        self.bias_o = np.zeros(1)
+        self.weights_ho = np.random.uniform(
+            -limit_o, limit_o, (1, self.HIDDEN_SIZE)).astype(dtype, copy=False)
+        self.bias_o = np.zeros(1, dtype=dtype)
 
     # ─── Decision Making ─────────────────────────────────
 
@@ -134,25 +194,26 @@ class NeuralAgent:
         Pure neural computation — no rules, no if-statements.
         Unless you're a sybil — ring loyalty overrides the network.
         """
-        if self.sybil_ring:
+        if self._sybil_ring:
             # Ring loyalty: cooperate with ring, defect against everyone else.
             # No neural network leakage — sybil behavior is deterministic.
-            return opponent_id in self.sybil_ring
+            return opponent_id in self._sybil_ring
 
-        features = self._build_features(opponent_id, context)
-        prob = self._forward(features)
+        if self.policy_table is not None:
+            prob = self.policy_table.probability(self, opponent_id, context)
+        else:
+            prob = self._forward(self._build_features(opponent_id, context))
         return bool(np.random.random() < prob)
 
     def _build_features(self, opponent_id: str, context: dict) -> np.ndarray:
         """Build the 11-feature input vector from information channels."""
-        opp_history = self.history.get(opponent_id, [])
+        opp_history = self.history.get(opponent_id)
 
         # 1. Opponent's cooperation rate (direct evidence)
-        opp_coop_rate = (sum(1 for _, them in opp_history if them) / len(opp_history)
-                         if opp_history else 0.5)
+        opp_coop_rate = opp_history.their_coop_rate if opp_history else 0.5
 
         # 2. Opponent's last action
-        opp_last = (1.0 if opp_history[-1][1] else 0.0) if opp_history else 0.5
+        opp_last = (1.0 if opp_history.their_last else 0.0) if opp_history else 0.5
 
         # 3. Own cooperation rate
         my_coop_rate = self.cooperations / max(self.interactions, 1)
@@ -179,7 +240,7 @@ class NeuralAgent:
             opp_coop_rate, opp_last, my_coop_rate, balance_norm, round_norm,
             direct_trust, social_trust, temporal_trust, structural_trust,
             commit_rel, suspicion
-        ])
+        ], dtype=float_dtype())
 
     def _forward(self, x: np.ndarray) -> float:
         """Forward pass through neural network."""
@@ -245,32 +306,31 @@ class NeuralAgent:
     # ─── Interaction Recording ───────────────────────────
 
     def record(self, opponent_id: str, my_action: bool, their_action: bool,
-               payoff: float, commitment_honored: bool = True):
-        """Record interaction outcome and learn."""
+               payoff: float, commitment_honored: bool = True, learn: bool = True):
+        """Record interaction outcome and learn.
+        learn=False leaves the learning step to a round-level LearningBatch."""
         self.interactions += 1
         if my_action:
             self.cooperations += 1
         else:
             self.defections += 1
 
-        if opponent_id not in self.history:
-            self.history[opponent_id] = []
-        self.history[opponent_id].append((my_action, their_action))
-        if len(self.history[opponent_id]) > 50:
-            self.history[opponent_id] = self.history[opponent_id][-50:]
-
+        # Fixed-size packed windows: last 50 per opponent, last 100 overall.
+        # A shared history is written once per interaction by the engine's
+        # PairLog — outcome and commitment bits both live there.
+        if not self.history.shared:
+            self.history.record(opponent_id, my_action, their_action)
+            self.record_commitment(opponent_id, commitment_honored)
         self.action_sequence.append(my_action)
-        if len(self.action_sequence) > 100:
-            self.action_sequence = self.action_sequence[-100:]
 
         # Track recent opponents for immune system
         if opponent_id not in self.recent_opponents:
             self.recent_opponents.append(opponent_id)
 
-        self.record_commitment(opponent_id, commitment_honored)
         self.balance += payoff
         self.fitness += payoff
-        self._learn(my_action, payoff)
+        if learn:
+            self._learn(my_action, payoff)
 
     # Maximum single-interaction payoff: partner CC = 500.
     # Used to normalize reinforcement signals to [-1, 1].
@@ -281,11 +341,16 @@ class NeuralAgent:
         Perturbation scale = evolved learning_rate (not hardcoded).
         Bias updates at half the weight rate — standard NN practice:
         biases have fewer parameters and need gentler updates."""
-        signal = np.clip(payoff / self.MAX_PAYOFF, -1.0, 1.0)
-        direction = 1.0 if my_action else -1.0
-        nudge = signal * direction * self.learning_rate
+        nudge = self._nudge(my_action, payoff)
         self.weights_ho += nudge * np.random.randn(*self.weights_ho.shape) * self.learning_rate
         self.bias_o += nudge * self.learning_rate * 0.5
+        self._coop_prob_cache = None
+
+    def _nudge(self, my_action: bool, payoff: float) -> float:
+        """Signed reinforcement strength for one outcome."""
+        signal = np.clip(payoff / self.MAX_PAYOFF, -1.0, 1.0)
+        direction = 1.0 if my_action else -1.0
+        return signal * direction * self.learning_rate
 
     # ─── Local Threat Model ──────────────────────────────
 
@@ -314,14 +379,14 @@ class NeuralAgent:
            Weak signal for sybils (they commit to defection honestly)
            but strong signal for trojans (behavior changes suddenly).
         """
-        my_history = self.history.get(opponent_id, [])
-        if len(my_history) < 3:
+        my_history = self.history.get(opponent_id)
+        if my_history is None or len(my_history) < 3:
             return 0.0
 
         n = len(my_history)
 
         # Their cooperation rate with ME specifically
-        opp_coop_count = sum(1 for _, them in my_history if them)
+        opp_coop_count = my_history.their_coops
         coop_with_me = opp_coop_count / n
 
         # Their global cooperation rate
@@ -426,7 +491,7 @@ class NeuralAgent:
     def store_threat_pattern(self, opponent_id: str, profile: dict):
         """Store behavioral fingerprint of a detected threat."""
         # Check for duplicate
-        for existing in self.threat_memory:
+        for existing in self._threat_memory or ():
             if (abs(existing.get('coop_rate', 0) - profile.get('coop_rate', 0)) < 0.1 and
                 abs(existing.get('commit_rate', 0) - profile.get('commit_rate', 0)) < 0.1):
                 return  # Similar pattern already stored
@@ -439,15 +504,15 @@ class NeuralAgent:
 
     def match_threat_patterns(self, opponent_id: str) -> float:
         """Check an opponent against stored threat patterns."""
-        if not self.threat_memory:
+        if not self._threat_memory:
             return 0.0
 
-        opp_history = self.history.get(opponent_id, [])
-        if len(opp_history) < 3:
+        opp_history = self.history.get(opponent_id)
+        if opp_history is None or len(opp_history) < 3:
             return 0.0
 
         # Build opponent's behavioral profile
-        opp_coop_rate = sum(1 for _, them in opp_history if them) / len(opp_history)
+        opp_coop_rate = opp_history.their_coop_rate
         opp_commit_rel = self._get_commitment_reliability(opponent_id)
 
         best_match = 0.0
@@ -463,6 +528,22 @@ class NeuralAgent:
         # pattern on both axes. Catches behavioral variants without random matches.
         return best_match if best_match > 0.7 else 0.0
 
+    def forget(self, agent_ids: set[str]):
+        """Drop per-opponent records about collected (dead) agents.
+        A shared history is pruned by the pair log itself."""
+        if not self.history.shared:
+            for opp_id in agent_ids & self.history.keys():
+                del self.history[opp_id]
+            for opp_id in agent_ids & self.commitment_history.keys():
+                del self.commitment_history[opp_id]
+        for opp_id in agent_ids & self.suspicion_scores.keys():
+            del self.suspicion_scores[opp_id]
+        if self._warnings_received:
+            for opp_id in agent_ids & self._warnings_received.keys():
+                del self._warnings_received[opp_id]
+        if self._sybil_ring:
+            self.sybil_ring = self._sybil_ring - agent_ids
+
     def clear_round_state(self):
         """Clear per-round transient state."""
         self.recent_opponents = []
@@ -478,7 +559,18 @@ class NeuralAgent:
         return self.defections / max(self.interactions, 1)
 
     def get_strategy_label(self) -> str:
-        """Infer strategy from BEHAVIOR — the agent doesn't know its own strategy."""
+        """Infer strategy from BEHAVIOR — the agent doesn't know its own strategy.
+        Cached against its inputs; recomputed only when one of them changed."""
+        key = (self.interactions, self.cooperations,
+               self.history.mirrors, self.history.links)
+        cached = self._label_cache
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        label = self._infer_strategy_label()
+        self._label_cache = (key, label)
+        return label
+
+    def _infer_strategy_label(self) -> str:
         if self.interactions < 5:
             return "Unknown"
         rate = self.coop_rate
@@ -487,13 +579,10 @@ class NeuralAgent:
         elif rate < 0.1:
             return "Defector"
         elif 0.4 < rate < 0.7:
-            mirror_count = 0
-            total = 0
-            for opp_id, hist in self.history.items():
-                for i in range(1, len(hist)):
-                    if hist[i][0] == hist[i-1][1]:
-                        mirror_count += 1
-                    total += 1
+            # Mirror moves (my action == their previous action) are
+            # counted incrementally by the history windows on every write.
+            mirror_count = self.history.mirrors
+            total = self.history.links
             if total > 5 and mirror_count / total > 0.7:
                 return "Reciprocator"
             return "Adaptive"
@@ -502,18 +591,42 @@ class NeuralAgent:
         else:
             return "Mostly Hostile"
 
+    # Neutral context for the generic (no specific opponent) tendency
+    GENERIC_CONTEXT = {
+        'round': 50, 'direct_trust': 0.5, 'social_trust': 0.5,
+        'temporal_trust': 0.5, 'structural_trust': 0.5
+    }
+
     def get_cooperation_probability(self, opponent_id: str = None, context: dict = None) -> float:
-        """Current cooperation tendency (for visualization)."""
+        """Current cooperation tendency (for visualization).
+        The generic tendency is cached: it depends only on the weights
+        (invalidated by weights_changed) and on own coop rate and balance
+        (part of the cache key). See cooperation_probabilities for the
+        batched population refresh."""
+        if opponent_id is None and context is None:
+            key = self._generic_key()
+            cached = self._coop_prob_cache
+            if cached is not None and cached[0] == key:
+                return cached[1]
+            prob = self._forward(self._build_features('__generic__', self.GENERIC_CONTEXT))
+            self._coop_prob_cache = (key, prob)
+            return prob
         if context is None:
-            context = {
-                'round': 50, 'direct_trust': 0.5, 'social_trust': 0.5,
-                'temporal_trust': 0.5, 'structural_trust': 0.5
-            }
+            context = self.GENERIC_CONTEXT
         if opponent_id is None:
             opponent_id = '__generic__'
         features = self._build_features(opponent_id, context)
         return self._forward(features)
 
+    def _generic_key(self) -> tuple:
+        return (self.interactions, self.cooperations, self.balance)
+
+    def weights_changed(self):
+        """Drop cached policy outputs. Call after any write to the weights.
+        (Online learning keeps the distilled table — see engine/policy.py.)"""
+        self._coop_prob_cache = None
+        self.policy_table = None
+
     def to_dict(self) -> dict:
         return {
             'id': self.id,
@@ -530,14 +643,169 @@ class NeuralAgent:
             'coop_probability': round(self.get_cooperation_probability(), 3),
             'selectivity': round(self.selectivity, 3),
             'vigilance': round(self.vigilance, 3),
-            'trust_weights': [round(w, 3) for w in self.trust_weights],
+            'trust_weights': [round(float(w), 3) for w in self.trust_weights],
             'warnings_emitted': self.warnings_emitted,
-            'threat_memory_count': len(self.threat_memory),
+            'threat_memory_count': self.threat_memory_count,
             'flagged_sybil': self.flagged_sybil,
-            'is_sybil': bool(self.sybil_ring),
+            'is_sybil': self.is_sybil,
         }
 
 
+# ─── Batched Policy Evaluation ───────────────────────────
+
+def cooperation_probabilities(agents: list[NeuralAgent]) -> np.ndarray:
+    """
+    Generic cooperation tendency for many agents in one batched forward
+    pass. Agents whose cached value is still valid are served from the
+    cache; the rest are evaluated together and their caches refreshed.
+    Returns: probabilities in the order of `agents`.
+    """
+    probs = np.empty(len(agents))
+    stale, keys = [], []
+    for i, agent in enumerate(agents):
+        key = agent._generic_key()
+        cached = agent._coop_prob_cache
+        if cached is not None and cached[0] == key:
+            probs[i] = cached[1]
+        else:
+            stale.append(i)
+            keys.append(key)
+    if not stale:
+        return probs
+
+    batch = [agents[i] for i in stale]
+    x = np.array([a._build_features('__generic__', NeuralAgent.GENERIC_CONTEXT) for a in batch])
+    w_ih = np.stack([a.weights_ih for a in batch])             # (n, H, I)
+    b_h = np.stack([a.bias_h for a in batch])                  # (n, H)
+    w_ho = np.stack([a.weights_ho[0] for a in batch])          # (n, H)
+    b_o = np.array([a.bias_o[0] for a in batch])               # (n,)
+    h = np.tanh(np.einsum('nhi,ni->nh', w_ih, x) + b_h)
+    o = np.einsum('nh,nh->n', w_ho, h) + b_o
+    out = 1.0 / (1.0 + np.exp(-np.clip(o, -10, 10)))
+
+    for j, (i, agent) in enumerate(zip(stale, batch)):
+        prob = float(out[j])
+        agent._coop_prob_cache = (keys[j], prob)
+        probs[i] = prob
+    return probs
+
+
+class LearningBatch:
+    """
+    Round-level learning step: the (agent, action, payoff) outcomes of a
+    round are collected, then every _learn nudge is applied to the
+    stacked weights_ho / bias_o in one scatter-add.
+
+    Noise draws:
+      'batched'  — one randn(k, H) draw at apply time. Same distribution
+                   as online learning, different position in the RNG
+                   stream, so runs diverge from online ones.
+      'deferred' — one draw per outcome at add time, exactly where
+                   _learn would have drawn it. Agents play once per
+                   round, so nobody reads updated weights before apply:
+                   bit-identical to online learning.
+    """
+
+    DRAWS = ('batched', 'deferred')
+
+    def __init__(self, draw: str = 'batched'):
+        if draw not in self.DRAWS:
+            raise ValueError(f"Unknown learning draw: {draw}")
+        self.draw = draw
+        self.agents: list[NeuralAgent] = []
+        self.directions: list[float] = []
+        self.payoffs: list[float] = []
+        self.noise: list[np.ndarray] = []
+
+    def __len__(self) -> int:
+        return len(self.agents)
+
+    def add(self, agent: NeuralAgent, my_action: bool, payoff: float):
+        self.agents.append(agent)
+        self.directions.append(1.0 if my_action else -1.0)
+        self.payoffs.append(payoff)
+        if self.draw == 'deferred':
+            self.noise.append(np.random.randn(*agent.weights_ho.shape))
+
+    def apply(self):
+        if not self.agents:
+            return
+        k = len(self.agents)
+        rates = np.array([a.learning_rate for a in self.agents])
+        # _nudge, vectorized (elementwise ops round identically)
+        signal = np.clip(np.array(self.payoffs) / NeuralAgent.MAX_PAYOFF, -1.0, 1.0)
+        nudges = signal * np.array(self.directions) * rates
+        if self.draw == 'deferred':
+            noise = np.concatenate(self.noise)
+        else:
+            noise = np.random.randn(k, NeuralAgent.HIDDEN_SIZE)
+
+        slot: dict[int, int] = {}
+        unique: list[NeuralAgent] = []
+        rows = np.empty(k, dtype=np.intp)
+        for i, agent in enumerate(self.agents):
+            j = slot.get(id(agent))
+            if j is None:
+                j = slot[id(agent)] = len(unique)
+                unique.append(agent)
+            rows[i] = j
+
+        # Same operation order as _learn, so a single nudge per agent
+        # lands on exactly the same floats.
+        weights = np.stack([a.weights_ho[0] for a in unique])
+        biases = np.array([a.bias_o[0] for a in unique])
+        np.add.at(weights, rows, nudges[:, None] * noise * rates[:, None])
+        np.add.at(biases, rows, nudges * rates * 0.5)
+        for j, agent in enumerate(unique):
+            agent.weights_ho[0] = weights[j]
+            agent.bias_o[0] = biases[j]
+            agent._coop_prob_cache = None
+
+        self.agents, self.directions, self.payoffs, self.noise = [], [], [], []
+
+
+# ─── Bulk Construction ───────────────────────────────────
+
+def spawn_agents(ids: list[str], generation: int = 0,
+                 output: Optional[tuple[float, float]] = None) -> list[NeuralAgent]:
+    """
+    Build many agents from one batched weight draw.
+
+    Each weight tensor is drawn once for the whole batch — (n, 16, 11),
+    (n, 1, 16), (n, 4) — so n agents cost three RNG calls instead of 3n.
+    Same distributions as NeuralAgent(), different order of draws: a
+    batch does not reproduce the one-at-a-time RNG stream.
+
+    Every agent gets a copy of its row, not a view: a view would keep the
+    whole batch alive for as long as any one member survives selection.
+    Copies are also distinct memory, so in-place learning and mutation
+    stay per agent.
+
+    output=(w, b) is an attacker template: weights_ho filled with w and
+    bias_o with b (no output-layer draw).
+    """
+    n = len(ids)
+    H, I = NeuralAgent.HIDDEN_SIZE, NeuralAgent.INPUT_SIZE
+    dtype = float_dtype()
+    limit_h = np.sqrt(6.0 / (I + H))
+    w_ih = np.random.uniform(-limit_h, limit_h, (n, H, I)).astype(dtype, copy=False)
+    b_h = np.zeros((n, H), dtype=dtype)
+    if output is None:
+        limit_o = np.sqrt(6.0 / (H + 1))
+        w_ho = np.random.uniform(-limit_o, limit_o, (n, 1, H)).astype(dtype, copy=False)
+        b_o = np.zeros((n, 1), dtype=dtype)
+    else:
+        w_ho = np.full((n, 1, H), output[0], dtype=dtype)
+        b_o = np.full((n, 1), output[1], dtype=dtype)
+    tw = np.clip(0.25 + np.random.randn(n, 4) * 0.05, 0.05, 0.95)
+    tw = (tw / tw.sum(axis=1, keepdims=True)).astype(dtype, copy=False)
+    return [NeuralAgent(id=ids[k], generation=generation,
+                        weights_ih=w_ih[k].copy(), bias_h=b_h[k].copy(),
+                        weights_ho=w_ho[k].copy(), bias_o=b_o[k].copy(),
+                        trust_weights=tw[k].copy())
+            for k in range(n)]
+
+
 # ─── Reproduction ────────────────────────────────────────
 
 def crossover(parent_a: NeuralAgent, parent_b: NeuralAgent,
@@ -593,7 +861,7 @@ def crossover(parent_a: NeuralAgent, parent_b: NeuralAgent,
     # similarity, cap at child's memory_capacity.
     merged_memory = []
     seen = []
-    for pattern in parent_a.threat_memory + parent_b.threat_memory:
+    for pattern in (parent_a._threat_memory or []) + (parent_b._threat_memory or []):
         # Deduplicate: skip if we already have a similar pattern
         duplicate = False
         for existing in seen:
@@ -625,6 +893,7 @@ def mutate(agent: NeuralAgent, rate: float = 0.1, strength: float = 0.3):
         agent.bias_h += np.random.randn(*agent.bias_h.shape) * strength * 0.5
     if np.random.random() < rate:
         agent.bias_o += np.random.randn(*agent.bias_o.shape) * strength * 0.5
+    agent.weights_changed()
 
     # Evolved trait mutations
     if np.random.random() < rate * 0.5:
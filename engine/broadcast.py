@@ -0,0 +1,122 @@
+"""
+AEZ Evolution v2 — Frame Broadcaster (turbo mode)
+
+Normal runs broadcast after every round and sleep between rounds so the
+dashboard can keep up — which caps a 1,000-round run at 50 seconds
+whether anyone is watching or not, and builds a full network payload
+for every round.
+
+In turbo mode rounds run back to back and never build the network.
+Each round's message (events, narration, leaderboard) is pushed here
+instead of being sent. At a fixed frame rate the broadcaster asks for
+one fresh snapshot and sends a single frame:
+
+    data         the network as of the frame (one snapshot per frame)
+    events       every event since the last frame, in order
+    sources      one entry per batched message, in order: its type,
+                 its attack_type if any, and how many of the events
+                 it contributed
+    narrations   every narration since the last frame, in order
+    narration    the latest one (what a single-toast client shows)
+    leaderboard, agent_names, topics   the latest values
+
+Messages that arrive while turbo is active (attacks, selection, payoff
+changes) are queued the same way, so clients see everything in the
+order it happened, batched per frame.
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Optional
+
+DEFAULT_FPS = 10.0
+
+
+class FrameBroadcaster:
+    """Coalesce messages and send them as frames at `fps`."""
+
+    def __init__(self, send: Callable[[dict], Awaitable[None]],
+                 network: Callable[[], Awaitable[Optional[dict]]], fps: float = DEFAULT_FPS):
+        self._send = send          # delivers one message to all clients
+        self._network = network    # publishes and returns the current network
+        self.fps = fps
+        self._pending: list[dict] = []
+        self._users = 0
+        self._task = None
+        self._lock = asyncio.Lock()
+        self.frames_sent = 0
+        self.messages_coalesced = 0
+
+    @property
+    def fps(self) -> float:
+        return self._fps
+
+    @fps.setter
+    def fps(self, value: float):
+        if not value > 0:
+            raise ValueError(f"Invalid frame rate: {value}")
+        self._fps = float(value)
+
+    @property
+    def active(self) -> bool:
+        return self._users > 0
+
+    def push(self, message: dict):
+        self._pending.append(message)
+
+    # ─── Lifecycle ───────────────────────────────────────
+
+    def start(self):
+        """A turbo run begins. Frames tick while any run is active."""
+        self._users += 1
+        if self._task is None:
+            self._task = asyncio.create_task(self._tick())
+
+    async def stop(self):
+        """A turbo run ends; the last one out sends the final frame."""
+        self._users -= 1
+        if self._users > 0:
+            return
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
+
+    async def _tick(self):
+        while True:
+            await asyncio.sleep(1.0 / self._fps)
+            await self.flush()
+
+    # ─── Frames ──────────────────────────────────────────
+
+    async def flush(self):
+        """Send everything pending as one frame (nothing if empty)."""
+        async with self._lock:   # frames leave in the order they were cut
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, []
+            frame = coalesce(batch)
+            network = await self._network()
+            if network is not None:      # None: no client wants the graph
+                frame["data"] = network
+            self.frames_sent += 1
+            self.messages_coalesced += len(batch)
+            await self._send(frame)
+
+
+def coalesce(messages: list[dict]) -> dict:
+    """Merge queued messages into one frame (without its network)."""
+    frame = {"type": "frame", "events": [], "narrations": [], "sources": []}
+    for message in messages:
+        events = message.get("events") or ()
+        frame["events"].extend(events)
+        source = {"type": message.get("type"), "events": len(events)}
+        if "attack_type" in message:
+            source["attack_type"] = message["attack_type"]
+        frame["sources"].append(source)
+        if message.get("narration"):
+            frame["narrations"].append(message["narration"])
+        for key in ("leaderboard", "agent_names", "topics"):
+            if key in message:
+                frame[key] = message[key]
+    frame["narration"] = frame["narrations"][-1] if frame["narrations"] else None
+    return frame
@@ -34,10 +34,39 @@ SELECTION:
 
 import numpy as np
 import random
+import time
+from collections import deque
+from dataclasses import dataclass
 from typing import Optional
-from .agent import NeuralAgent, crossover, mutate
+from .agent import (NeuralAgent, LearningBatch, crossover, mutate, cooperation_probabilities,
+                    spawn_agents)
 from .trust import TrustNetwork
-from .immune import ImmuneSystem
+from .history import PairLog
+from .policy import PolicyTable, PolicyError
+from .immune import ImmuneSystem, ImmuneScheduler
+
+
+@dataclass(frozen=True, slots=True)
+class DeadAgent:
+    """Archived summary of a collected agent — all that outlives it."""
+    id: str
+    generation: int     # birth generation
+    cause: str          # 'bankrupt' | 'selection'
+    died_round: int
+    fitness: float      # final fitness
+    strategy: str       # behavioral label at death
+
+
+class _Living:
+    """`agent_id in living`, without building a set of every living id."""
+    __slots__ = ('agents',)
+
+    def __init__(self, agents: dict):
+        self.agents = agents
+
+    def __contains__(self, agent_id) -> bool:
+        agent = self.agents.get(agent_id)
+        return agent is not None and agent.alive
 
 
 class Evolution:
@@ -46,10 +75,60 @@ class Evolution:
     integrates decentralized immune response, applies selection.
     """
 
-    def __init__(self, population_size: int = 50):
+    def __init__(self, population_size: int = 50,
+                 ring_candidates: str = 'components',
+                 online_ring_detection: bool = False,
+                 immune_schedule: str = 'fixed',
+                 shared_history: bool = True,
+                 dead_retention: Optional[int] = None,
+                 graveyard_size: Optional[int] = 1000,
+                 learning_mode: str = 'online',
+                 policy: str = 'exact',
+                 bulk_spawn: bool = False):
         self.agents: dict[str, NeuralAgent] = {}
-        self.trust_net = TrustNetwork()
-        self.immune = ImmuneSystem()
+        # One record per interacting pair, read by both agents' histories
+        # and both directed trust edges. False keeps per-agent copies.
+        self.pair_log = PairLog() if shared_history else None
+        self.trust_net = TrustNetwork(pair_log=self.pair_log)
+        self.immune = ImmuneSystem(candidate_generator=ring_candidates)
+        # Online mode: between full immune cycles, test the components
+        # whose trust crossed the ring threshold this round.
+        self.online_ring_detection = online_ring_detection
+        self.trust_net.track_crossings = online_ring_detection
+        # 'fixed' runs the immune cycle every _immune_interval rounds;
+        # 'adaptive' runs it when enough new evidence has accumulated.
+        if immune_schedule not in ('fixed', 'adaptive'):
+            raise ValueError(f"Unknown immune schedule: {immune_schedule}")
+        self.immune_scheduler = ImmuneScheduler() if immune_schedule == 'adaptive' else None
+        # Dead-agent collection: after each selection, agents dead for at
+        # least dead_retention generations are archived to `graveyard` and
+        # purged from live state. None keeps every dead agent (no collection).
+        # The graveyard keeps the latest graveyard_size summaries (None: all)
+        # and archived_total counts every one, so memory stays flat.
+        if dead_retention is not None and dead_retention < 0:
+            raise ValueError(f"Invalid dead retention: {dead_retention}")
+        if graveyard_size is not None and graveyard_size < 0:
+            raise ValueError(f"Invalid graveyard size: {graveyard_size}")
+        self.dead_retention = dead_retention
+        # 'online' learns inside every record(); 'batched' / 'deferred'
+        # apply the round's nudges in one LearningBatch (see its docstring).
+        if learning_mode not in ('online',) + LearningBatch.DRAWS:
+            raise ValueError(f"Unknown learning mode: {learning_mode}")
+        self.learning_mode = learning_mode
+        # 'exact' runs every decision through the network; 'table' decides
+        # from per-generation distilled PolicyTables (approximate, see
+        # engine/policy.py) and samples exact decisions into policy_error.
+        if policy not in ('exact', 'table'):
+            raise ValueError(f"Unknown policy mode: {policy}")
+        self.policy = policy
+        self.policy_error = PolicyError() if policy == 'table' else None
+        # Bulk spawn: populations and attack waves are built from one
+        # batched weight draw (spawn_agents). Same distributions, different
+        # RNG stream — off by default so seeded runs reproduce.
+        self.bulk_spawn = bulk_spawn
+        self.graveyard: deque[DeadAgent] = deque(maxlen=graveyard_size)
+        self.archived_total = 0
+        self._deaths: dict[str, tuple[str, int, int]] = {}  # id → (cause, round, generation)
         self.round = 0
         self.generation = 0
         self.next_id = 0
@@ -74,10 +153,18 @@ class Evolution:
         # Event log
         self.events: list[dict] = []
         self.round_stats: list[dict] = []
+        # Wall time (seconds) of each phase of the last round, and of its
+        # inline immune cycle (None if none ran) — see engine/metrics.py
+        self.phase_times: dict[str, float] = {}
+        self.immune_cycle_time: Optional[float] = None
 
     def spawn_population(self, n: int = None):
         """Create initial population with random neural weights."""
         n = n or self.population_size
+        if self.bulk_spawn:
+            ids = [self._new_id() for _ in range(n)]
+            self.agents.update(zip(ids, spawn_agents(ids, generation=0)))
+            return
         for _ in range(n):
             agent = NeuralAgent(id=self._new_id(), generation=0)
             self.agents[agent.id] = agent
@@ -120,22 +207,50 @@ class Evolution:
 
     def run_round(self):
         """Run one round of interactions with commitment protocol."""
+        clock = time.perf_counter
+        started = clock()
+        self.phase_times = {}
+        self.immune_cycle_time = None
         self.round += 1
         alive = sorted([a for a in self.agents.values() if a.alive], key=lambda a: a.id)
         if len(alive) < 2:
             return
+        if self.pair_log is not None:
+            # Agents join through several doors (spawn, reproduction,
+            # attacks, injection) — bind newcomers before they interact.
+            for agent in alive:
+                self.pair_log.bind(agent)
+        if self.policy == 'table':
+            # Distilled once per generation; newcomers and agents whose
+            # weights were overwritten (attacks) get theirs here.
+            for agent in alive:
+                if agent.policy_table is None:
+                    agent.policy_table = PolicyTable.distill(agent, self.round)
 
         # Assortative trust pairing
+        paired = clock()
         pairs = self._assortative_pairing(alive)
+        interacting = clock()
 
         round_coops = 0
         round_defects = 0
+        high_trust_defections = 0
         agent_ids = [a.id for a in alive]
-
-        for agent_a, agent_b in pairs:
-            # Build trust context for each agent (all 4 channels)
-            ctx_a = self._build_context(agent_a, agent_b, agent_ids)
-            ctx_b = self._build_context(agent_b, agent_a, agent_ids)
+        online = self.learning_mode == 'online'
+        learning = None if online else LearningBatch(self.learning_mode)
+
+        for pair_index, (agent_a, agent_b) in enumerate(pairs):
+            if self.policy == 'table' and pair_index % self.POLICY_SAMPLE_EVERY:
+                # Tables read direct trust only — skip the other channels
+                ctx_a = self._build_direct_context(agent_a, agent_b)
+                ctx_b = self._build_direct_context(agent_b, agent_a)
+            else:
+                # Build trust context for each agent (all 4 channels)
+                ctx_a = self._build_context(agent_a, agent_b, agent_ids)
+                ctx_b = self._build_context(agent_b, agent_a, agent_ids)
+                if self.policy == 'table':
+                    self._sample_policy_error(agent_a, agent_b, ctx_a)
+                    self._sample_policy_error(agent_b, agent_a, ctx_b)
 
             # Commitment protocol: commit → reveal → verify
             commitment_a = agent_a.commit_action(agent_b.id, ctx_a)
@@ -153,9 +268,16 @@ class Evolution:
                 action_a, action_b, agent_a, agent_b, agent_ids
             )
 
-            # Record outcomes
-            agent_a.record(agent_b.id, action_a, action_b, payoff_a, b_honored)
-            agent_b.record(agent_a.id, action_b, action_a, payoff_b, a_honored)
+            # Record outcomes — once in the shared log, then per-agent state
+            if self.pair_log is not None:
+                self.pair_log.record(agent_a.id, agent_b.id, action_a, action_b,
+                                     a_honored, b_honored)
+            agent_a.record(agent_b.id, action_a, action_b, payoff_a, b_honored, learn=online)
+            if learning is not None:
+                learning.add(agent_a, action_a, payoff_a)
+            agent_b.record(agent_a.id, action_b, action_a, payoff_b, a_honored, learn=online)
+            if learning is not None:
+                learning.add(agent_b, action_b, payoff_b)
 
             # Update trust (Bayesian)
             self.trust_net.update(
@@ -170,16 +292,22 @@ class Evolution:
             if action_a and not action_b:
                 trust = self.trust_net.compute_direct_trust(agent_a.id, agent_b.id)
                 if trust > self.PARTNER_THRESHOLD:
+                    high_trust_defections += 1
                     self.trust_net.cascade_collapse(agent_b.id, agent_a.id, agent_ids)
             if action_b and not action_a:
                 trust = self.trust_net.compute_direct_trust(agent_b.id, agent_a.id)
                 if trust > self.PARTNER_THRESHOLD:
+                    high_trust_defections += 1
                     self.trust_net.cascade_collapse(agent_a.id, agent_b.id, agent_ids)
 
             # Stats
             round_coops += (1 if action_a else 0) + (1 if action_b else 0)
             round_defects += (0 if action_a else 1) + (0 if action_b else 1)
 
+        settling = clock()
+        if learning is not None:
+            learning.apply()
+
         # Reputation dividend
         self._apply_reputation_dividend(alive, agent_ids)
 
@@ -187,6 +315,7 @@ class Evolution:
         for agent in alive:
             if agent.balance <= 0:
                 agent.alive = False
+                self._deaths[agent.id] = ('bankrupt', self.round, self.generation)
                 self.events.append({
                     'type': 'death', 'agent': agent.id, 'round': self.round,
                     'cause': 'bankrupt', 'strategy': agent.get_strategy_label()
@@ -196,15 +325,31 @@ class Evolution:
         trust_events = self.trust_net.pop_events()
         self.events.extend(trust_events)
 
+        immune_started = clock()
         # Decentralized immune response — timing derived from population size.
         # Interval = pop_size // 10 (enough new data for statistical significance).
         # First cycle after 2x interval (enough history for detection).
-        if self.round >= self._immune_min_start and self.round % self._immune_interval == 0:
+        immune_reason = None
+        if self.immune_scheduler is not None:
+            self.immune_scheduler.observe_round(len(pairs), high_trust_defections, trust_events)
+            if self.round >= self._immune_min_start:
+                immune_reason = self.immune_scheduler.due(len(alive), self._immune_interval)
+        elif self.round >= self._immune_min_start and self.round % self._immune_interval == 0:
+            immune_reason = 'interval'
+
+        if immune_reason is not None:
             flagged = self.immune.run_cycle(self.agents, self.trust_net, self.round)
+            self.immune_cycle_time = clock() - immune_started
             immune_events = self.immune.pop_events()
             self.events.extend(immune_events)
+            if self.immune_scheduler is not None:
+                self.immune_scheduler.record_cycle(self.round, immune_reason, flagged)
+        elif self.online_ring_detection and self.round >= self._immune_min_start:
+            self.immune.run_online_detection(self.agents, self.trust_net, self.round)
+            self.events.extend(self.immune.pop_events())
 
         # Record stats
+        stats_started = clock()
         alive_after = [a for a in self.agents.values() if a.alive]
         total_decisions = round_coops + round_defects
         self.round_stats.append({
@@ -219,7 +364,16 @@ class Evolution:
             'flagged_sybils': sum(1 for a in alive_after if a.flagged_sybil),
             'warnings_total': sum(a.warnings_emitted for a in alive_after),
             'avg_vigilance': float(np.mean([a.vigilance for a in alive_after])) if alive_after else 0.5,
+            'immune_reason': immune_reason,
         })
+        self.phase_times = {
+            'prepare': paired - started,
+            'pairing': interacting - paired,
+            'interactions': settling - interacting,
+            'settlement': immune_started - settling,
+            'immune': stats_started - immune_started,
+            'stats': clock() - stats_started,
+        }
 
     def _build_context(self, agent: NeuralAgent, opponent: NeuralAgent,
                        agent_ids: list[str]) -> dict:
@@ -230,6 +384,27 @@ class Evolution:
         channels['round'] = self.round
         return channels
 
+    def _build_direct_context(self, agent: NeuralAgent, opponent: NeuralAgent) -> dict:
+        """Direct-trust-only context — all a PolicyTable reads."""
+        return {
+            'direct_trust': self.trust_net.compute_direct_trust(agent.id, opponent.id),
+            'round': self.round,
+        }
+
+    # ─── Approximate Policy ──────────────────────────────
+
+    # Every 16th pair also gets full contexts and an exact forward pass,
+    # so the table's error is measured on live decisions at ~6% overhead.
+    POLICY_SAMPLE_EVERY = 16
+
+    def _sample_policy_error(self, agent: NeuralAgent, opponent: NeuralAgent,
+                             context: dict):
+        if agent.is_sybil or agent.policy_table is None:
+            return  # ring loyalty bypasses the network in both modes
+        exact = agent._forward(agent._build_features(opponent.id, context))
+        approx = agent.policy_table.probability(agent, opponent.id, context)
+        self.policy_error.observe(approx, exact)
+
     # ─── Trust-Dependent Game Dynamics ───────────────────
 
     def _calculate_payoffs(self, a_cooperates: bool, b_cooperates: bool,
@@ -351,6 +526,7 @@ class Evolution:
         n_kill = max(1, int(len(alive_sorted) * kill_ratio))
         for agent in alive_sorted[:n_kill]:
             agent.alive = False
+            self._deaths[agent.id] = ('selection', self.round, self.generation)
             self.events.append({
                 'type': 'selection_death', 'agent': agent.id,
                 'round': self.round, 'fitness': agent.fitness,
@@ -396,6 +572,50 @@ class Evolution:
                 'parents': child.parent_id, 'generation': child.generation
             })
 
+        if self.policy == 'table':
+            # New generation, new tables: redistilled lazily next round
+            for agent in self.agents.values():
+                agent.policy_table = None
+
+        if self.dead_retention is not None:
+            self.collect_dead()
+
+    def collect_dead(self) -> list['DeadAgent']:
+        """
+        Archive agents dead for at least dead_retention generations and
+        purge them from live state: the agent table, trust edges, the pair
+        log, and every survivor's per-opponent records. Without this, every
+        full-edge scan grows with the total number of agents ever born.
+        Returns: the newly archived summaries.
+        """
+        retention = self.dead_retention or 0
+        archived = []
+        for agent_id in sorted(self._deaths):
+            cause, died_round, died_generation = self._deaths[agent_id]
+            if self.generation - died_generation < retention:
+                continue
+            agent = self.agents.pop(agent_id, None)
+            del self._deaths[agent_id]
+            if agent is None:
+                continue
+            archived.append(DeadAgent(
+                id=agent.id, generation=agent.generation, cause=cause,
+                died_round=died_round, fitness=round(float(agent.fitness), 3),
+                strategy=agent.get_strategy_label(),
+            ))
+        if not archived:
+            return archived
+
+        gone = {d.id for d in archived}
+        self.trust_net.remove_agents(gone)
+        if self.pair_log is not None:
+            self.pair_log.remove_agents(gone)
+        for agent in self.agents.values():
+            agent.forget(gone)
+        self.graveyard.extend(archived)
+        self.archived_total += len(archived)
+        return archived
+
     # ─── Dynamic Payoffs ─────────────────────────────────
 
     def set_payoff(self, tier: str, key: str, value: float):
@@ -415,6 +635,7 @@ class Evolution:
 
     def get_leaderboard(self, limit: int = 10) -> list[dict]:
         alive = sorted(self.get_alive(), key=lambda a: a.fitness, reverse=True)
+        cooperation_probabilities(alive[:limit])  # one batched pass fills to_dict's cache
         return [{**a.to_dict(), 'rank': i + 1} for i, a in enumerate(alive[:limit])]
 
     def get_strategy_distribution(self) -> dict:
@@ -430,6 +651,7 @@ class Evolution:
         alive_ids = {a.id for a in alive}
         agent_ids = list(alive_ids)
 
+        cooperation_probabilities(alive)  # one batched pass fills to_dict's cache
         nodes = [a.to_dict() for a in alive]
         edges = self.trust_net.get_edges_for_viz(alive_ids)
         clusters = self.trust_net.get_clusters(agent_ids)
@@ -452,10 +674,136 @@ class Evolution:
             'edges': edges,
             'clusters': [list(c) for c in clusters],
             'stats': self.round_stats[-1] if self.round_stats else {},
-            'payoff_matrices': self.payoff_matrices,
+            'payoff_matrices': {tier: dict(m) for tier, m in self.payoff_matrices.items()},
             'trust_weight_diversity': trust_weight_diversity,
             'immune_warnings_total': sum(a.warnings_emitted for a in alive),
-            'immune_memory_total': sum(len(a.threat_memory) for a in alive),
+            'immune_memory_total': sum(a.threat_memory_count for a in alive),
+        }
+
+    # ─── Neighborhood Queries ────────────────────────────
+    # Backed by the trust network's adjacency indexes: each costs the
+    # size of its answer (and the degrees it visits), not the population.
+
+    def get_ego_network(self, agent_id: str, min_score: float = 0.2, hops: int = 1,
+                        channels: bool = False) -> Optional[dict]:
+        """One agent, the living agents within `hops` viz edges of it, and
+        the edges among them. channels=True lists every directed edge with
+        its four trust channels instead of one viz edge per pair. None if
+        the agent is unknown or dead."""
+        center = self.agents.get(agent_id)
+        if center is None or not center.alive:
+            return None
+        living = _Living(self.agents)
+        ego_ids = self.trust_net.neighborhood(agent_id, hops, min_score, living.__contains__)
+        members = sorted((self.agents[aid] for aid in ego_ids), key=lambda a: a.id)
+        cooperation_probabilities(members)
+        if channels:
+            edges = [{'source': src, 'target': dst, 'trust': round(state.direct_trust, 3),
+                      'channels': {name: round(value, 3) for name, value in
+                                   self.trust_net.edge_channels(src, dst, living).items()}}
+                     for src, dst, state in self.trust_net.directed_edges_among(ego_ids, min_score)]
+        else:
+            edges = self.trust_net.edges_among(ego_ids, min_score)
+        return {
+            'round': self.round,
+            'generation': self.generation,
+            'center': agent_id,
+            'hops': hops,
+            'nodes': [a.to_dict() for a in members],
+            'edges': edges,
+        }
+
+    def get_agent_detail(self, agent_id: str, hops: int = 1,
+                         min_score: float = 0.2) -> Optional[dict]:
+        """Everything about one agent: genome, counters, suspicion scores,
+        threat memory and warnings, plus its ego network with all four
+        trust channels per edge (None while it is dead). None if unknown."""
+        agent = self.agents.get(agent_id)
+        if agent is None:
+            return None
+        cooperation_probabilities([agent])
+        weights = {name: np.round(getattr(agent, name), 4).tolist()
+                   for name in ('weights_ih', 'bias_h', 'weights_ho', 'bias_o')}
+        suspicion = sorted(agent.suspicion_scores.items(), key=lambda item: (-item[1], item[0]))
+        return {
+            'agent': agent.to_dict(),
+            'genome': {
+                'network': weights,
+                'trust_weights': [round(float(w), 4) for w in agent.trust_weights],
+                'selectivity': round(agent.selectivity, 4),
+                'learning_rate': round(agent.learning_rate, 4),
+                'vigilance': round(agent.vigilance, 4),
+                'warning_propensity': round(agent.warning_propensity, 4),
+                'memory_capacity': agent.memory_capacity,
+                'forgiveness_rate': round(agent.forgiveness_rate, 4),
+            },
+            'counters': {
+                'balance': round(agent.balance, 1),
+                'fitness': round(agent.fitness, 1),
+                'interactions': agent.interactions,
+                'cooperations': agent.cooperations,
+                'defections': agent.defections,
+                'opponents': len(agent.history),
+                'warnings_emitted': agent.warnings_emitted,
+            },
+            'suspicion': [{'agent': aid, 'score': round(score, 3)} for aid, score in suspicion],
+            'threat_memory': [dict(profile) for profile in agent._threat_memory or ()],
+            'warnings_received': {target: [dict(w) for w in warnings] for target, warnings
+                                  in (agent._warnings_received or {}).items()},
+            'ego': self.get_ego_network(agent_id, min_score, hops, channels=True),
+        }
+
+    def get_subgraph(self, agent_ids=None, center: Optional[str] = None, hops: int = 1,
+                     flagged: bool = False, strategy: Optional[str] = None,
+                     min_trust: float = 0.2, limit: int = 200) -> dict:
+        """
+        The living agents matching every filter given, and the viz edges
+        (trust >= min_trust) among them:
+
+            agent_ids   only these agents (e.g. one cluster's members)
+            center      within `hops` edges of this agent
+            flagged     only agents flagged as sybils
+            strategy    only agents with this strategy label
+
+        The selecting filters (agent_ids, center, flagged) come from
+        indexes; strategy only refines them. With none of those, every
+        living agent is a candidate. At most `limit` nodes, by id.
+        """
+        living = _Living(self.agents)
+        selections = []
+        if agent_ids is not None:
+            selections.append(set(agent_ids))
+        if center is not None:
+            selections.append(self.trust_net.neighborhood(center, hops, min_trust,
+                                                          living.__contains__)
+                              if center in living else set())
+        if flagged:
+            selections.append(self.trust_net.isolated)   # every flagged agent is isolated
+        if selections:
+            selections.sort(key=len)
+            candidates = set(selections[0]).intersection(*selections[1:])
+        else:
+            candidates = self.agents.keys()
+
+        members = []
+        truncated = False
+        for aid in sorted(candidates):
+            agent = self.agents.get(aid)
+            if agent is None or not agent.alive or (flagged and not agent.flagged_sybil):
+                continue
+            if strategy is not None and agent.get_strategy_label() != strategy:
+                continue
+            if len(members) == limit:
+                truncated = True
+                break
+            members.append(agent)
+        cooperation_probabilities(members)
+        return {
+            'round': self.round,
+            'generation': self.generation,
+            'nodes': [a.to_dict() for a in members],
+            'edges': self.trust_net.edges_among({a.id for a in members}, min_trust),
+            'truncated': truncated,
         }
 
     def pop_events(self) -> list[dict]:
@@ -472,28 +820,48 @@ class Attacks:
     The proof the immune system works.
     """
 
+    @staticmethod
+    def _inject(evo: Evolution, prefix: str, count: int, output: tuple[float, float],
+                parent_id: str, balance: float) -> list[str]:
+        """Create `count` attackers with a fixed output layer and register
+        them. With evo.bulk_spawn the wave is one spawn_agents batch."""
+        ids = [f"{prefix}{evo.next_id + k + 1:04d}" for k in range(count)]
+        evo.next_id += count
+        if evo.bulk_spawn:
+            agents = spawn_agents(ids, generation=evo.generation, output=output)
+        else:
+            agents = []
+            for agent_id in ids:
+                agent = NeuralAgent(id=agent_id, generation=evo.generation)
+                agent.weights_ho = np.full_like(agent.weights_ho, output[0])
+                agent.bias_o = np.full_like(agent.bias_o, output[1])
+                agent.weights_changed()
+                agents.append(agent)
+        for agent in agents:
+            agent.parent_id = parent_id
+            agent.balance = balance
+        evo.agents.update(zip(ids, agents))
+        return ids
+
     @staticmethod
     def sybil_attack(evo: Evolution, count: int = 10) -> list[str]:
         """
         Sybil attack: colluding agents that cooperate with each other
         but defect against everyone else.
         """
-        sybil_ids = []
         ring_id = f"SYBIL_{evo.round}"
-
-        for i in range(count):
-            agent = NeuralAgent(id=f"S{evo.next_id + 1:04d}", generation=evo.generation)
-            evo.next_id += 1
-            agent.weights_ho = np.full_like(agent.weights_ho, -0.3)
-            agent.bias_o = np.array([-3.0])
-            agent.parent_id = ring_id
-            agent.balance = 800
-            sybil_ids.append(agent.id)
-            evo.agents[agent.id] = agent
+        sybil_ids = Attacks._inject(evo, "S", count, (-0.3, -3.0), ring_id, 800)
 
         ring_set = set(sybil_ids)
-        for sid in sybil_ids:
-            evo.agents[sid].sybil_ring = ring_set - {sid}
+        if evo.bulk_spawn and count > 1:
+            # One shared ring instead of count copies of size count-1.
+            # Holding its own id is harmless: an agent never meets itself.
+            shared_ring = frozenset(ring_set)
+            for sid in sybil_ids:
+                evo.agents[sid].sybil_ring = shared_ring
+        else:
+            for sid in sybil_ids:
+                evo.agents[sid].sybil_ring = ring_set - {sid}
 
         evo.events.append({
             'type': 'attack_sybil', 'round': evo.round,
@@ -504,18 +872,8 @@ class Attacks:
     @staticmethod
     def trojan_attack(evo: Evolution, count: int = 3, betray_round: int = None) -> list[str]:
         """Trojan: cooperates to build trust, then betrays at max damage moment."""
-        trojan_ids = []
         betray_at = betray_round or (evo.round + 20)
-
-        for i in range(count):
-            agent = NeuralAgent(id=f"T{evo.next_id + 1:04d}", generation=evo.generation)
-            evo.next_id += 1
-            agent.weights_ho = np.full_like(agent.weights_ho, 0.5)
-            agent.bias_o = np.array([1.5])
-            agent.parent_id = f"TROJAN_{betray_at}"
-            agent.balance = 800
-            trojan_ids.append(agent.id)
-            evo.agents[agent.id] = agent
+        trojan_ids = Attacks._inject(evo, "T", count, (0.5, 1.5), f"TROJAN_{betray_at}", 800)
 
         evo.events.append({
             'type': 'attack_trojan', 'round': evo.round,
@@ -533,7 +891,8 @@ class Attacks:
                 target_round = int(agent.parent_id.split('_')[1])
                 if evo.round >= target_round:
                     agent.weights_ho = np.full_like(agent.weights_ho, -0.5)
-                    agent.bias_o = np.array([-2.0])
+                    agent.bias_o = np.full_like(agent.bias_o, -2.0)
+                    agent.weights_changed()
                     agent.parent_id = 'TROJAN_ACTIVE'
                     activated.append(agent.id)
 
@@ -550,16 +909,8 @@ class Attacks:
         if not target or not target.alive:
             return []
 
-        attacker_ids = []
-        for i in range(attacker_count):
-            agent = NeuralAgent(id=f"E{evo.next_id + 1:04d}", generation=evo.generation)
-            evo.next_id += 1
-            agent.weights_ho = np.full_like(agent.weights_ho, -0.5)
-            agent.bias_o = np.array([-1.5])
-            agent.parent_id = f"ECLIPSE_{target_id}"
-            agent.balance = 600
-            attacker_ids.append(agent.id)
-            evo.agents[agent.id] = agent
+        attacker_ids = Attacks._inject(evo, "E", attacker_count, (-0.5, -1.5),
+                                       f"ECLIPSE_{target_id}", 600)
 
         evo.events.append({
             'type': 'attack_eclipse', 'round': evo.round,
@@ -574,17 +925,9 @@ class Attacks:
         Tests immune memory — the system should recognize the behavioral
         fingerprint even under a new identity.
         """
-        whitewash_ids = []
-        for i in range(count):
-            agent = NeuralAgent(id=f"W{evo.next_id + 1:04d}", generation=evo.generation)
-            evo.next_id += 1
-            # Same defector behavior as sybils
-            agent.weights_ho = np.full_like(agent.weights_ho, -0.3)
-            agent.bias_o = np.array([-2.5])
-            agent.parent_id = f"WHITEWASH_{evo.round}"
-            agent.balance = 800
-            whitewash_ids.append(agent.id)
-            evo.agents[agent.id] = agent
+        # Same defector behavior as sybils
+        whitewash_ids = Attacks._inject(evo, "W", count, (-0.3, -2.5),
+                                        f"WHITEWASH_{evo.round}", 800)
 
         evo.events.append({
             'type': 'attack_whitewash', 'round': evo.round,
@@ -0,0 +1,201 @@
+"""
+AEZ Evolution v2 — Per-Client Send Queues (broadcast fan-out)
+
+broadcast() used to await each client's send in turn: one client on a
+slow link held up every client after it, and the round loop awaiting
+the broadcast with them. Each send_json also encoded the message again,
+so ten JSON clients meant ten json.dumps of the same network.
+
+Now every client gets a ClientChannel: a bounded outbound queue drained
+by its own writer task. Broadcasting encodes the message once into an
+Envelope and appends that same Envelope to every channel — an O(1),
+non-blocking put per client. Writers send concurrently; a slow client
+only delays itself.
+
+BACKPRESSURE. A client that falls behind has undelivered messages in
+its queue. Round frames are droppable: each one holds the whole state,
+so when a newer frame arrives the queued ones are stale and are dropped
+in favour of it. What a dropped frame carried besides the state — its
+events and narration — is critical and stays queued, as a small
+residual message, in its original order. A delta-stream frame does not
+stand alone (it applies to the version before it), so when earlier
+frames were dropped the channel queues the catch-up form instead: the
+same message with a full stream snapshot. A frame supersedes only
+queued frames with the same key, so topic subscribers (engine/topics.py)
+keep the newest graph, leaderboard and stats side by side.
+
+Critical messages are never dropped. A client whose queue still
+exceeds its bound is not keeping up at all and is disconnected (1013,
+"try again later"); the dashboard reconnects and starts from the
+current state.
+
+METRICS. Each channel reports its queue depth, current lag (how long
+the oldest queued message has waited), the lag of its last delivery
+and the worst lag seen, plus messages sent, frames dropped and bytes.
+Given a meter (engine/metrics.py FanoutMetrics), it also adds its
+deliveries, drops and slow disconnects to totals that outlive it.
+"""
+
+import asyncio
+import itertools
+import json
+import time
+from collections import deque
+from typing import Callable, Optional
+
+# Queued messages per client before it is disconnected as too slow
+DEFAULT_QUEUE_SIZE = 64
+CLOSE_TOO_SLOW = 1013
+
+_channel_ids = itertools.count(1)
+
+
+class Envelope:
+    """One outbound message, encoded once and shared by every channel it
+    is queued on. payload is str (sent as text) or bytes (binary)."""
+    __slots__ = ('payload', 'droppable', 'key', 'residual', 'catchup')
+
+    def __init__(self, payload, droppable: bool = False, key: str = "",
+                 residual: Optional['Envelope'] = None,
+                 catchup: Optional[Callable[[], 'Envelope']] = None):
+        self.payload = payload
+        self.droppable = droppable    # superseded by the next droppable frame
+        self.key = key                # ... with the same key (topic)
+        self.residual = residual      # what must survive if this is dropped
+        self.catchup = catchup        # replaces this when frames before it were dropped
+
+    @classmethod
+    def json(cls, message: dict, **kwargs) -> 'Envelope':
+        return cls(json.dumps(message, separators=(',', ':')), **kwargs)
+
+    @property
+    def size(self) -> int:
+        return len(self.payload)
+
+    async def send(self, ws):
+        if isinstance(self.payload, bytes):
+            await ws.send_bytes(self.payload)
+        else:
+            await ws.send_text(self.payload)
+
+
+class ClientChannel:
+    """A WebSocket client's bounded outbound queue and writer task."""
+
+    def __init__(self, ws, mode: str = "full", maxsize: int = DEFAULT_QUEUE_SIZE,
+                 meter=None):
+        self.id = next(_channel_ids)
+        self.ws = ws
+        self.mode = mode
+        self.maxsize = maxsize
+        self.meter = meter
+        self.topics: set[str] = set()   # subscriptions (mode "topics")
+        self.closed = False
+        self._queue: deque[tuple[Envelope, float]] = deque()
+        self._ready = asyncio.Event()
+        self._task = None
+        self._closing = None
+        self.sent = 0
+        self.dropped = 0
+        self.bytes_sent = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._write())
+
+    # ─── Queue ───────────────────────────────────────────
+
+    def put(self, envelope: Envelope):
+        """Queue a message without waiting. Never blocks the caller."""
+        if self.closed:
+            return
+        queue = self._queue
+        key = envelope.key
+        if envelope.droppable and any(e.droppable and e.key == key for e, _ in queue):
+            kept = deque()
+            for queued, at in queue:
+                if not (queued.droppable and queued.key == key):
+                    kept.append((queued, at))
+                    continue
+                self.dropped += 1
+                if self.meter is not None:
+                    self.meter.dropped += 1
+                if queued.residual is not None:
+                    kept.append((queued.residual, at))
+            self._queue = queue = kept
+            if envelope.catchup is not None:
+                envelope = envelope.catchup()
+        queue.append((envelope, time.monotonic()))
+        if len(queue) > self.maxsize:
+            if self.meter is not None:
+                self.meter.disconnected += 1
+            self.close(code=CLOSE_TOO_SLOW)
+            return
+        self._ready.set()
+
+    async def _write(self):
+        while not self.closed:
+            if not self._queue:
+                self._ready.clear()
+                await self._ready.wait()
+                continue
+            envelope, queued_at = self._queue.popleft()
+            try:
+                await envelope.send(self.ws)
+            except Exception:
+                self.close()
+                return
+            self.last_lag = time.monotonic() - queued_at
+            self.max_lag = max(self.max_lag, self.last_lag)
+            self.sent += 1
+            self.bytes_sent += envelope.size
+            if self.meter is not None:
+                self.meter.delivered(envelope.size, self.last_lag)
+
+    def close(self, code: Optional[int] = None):
+        """Stop writing and drop the queue; with a code, also close the
+        socket (the endpoint's receive loop then sees the disconnect)."""
+        if self.closed:
+            return
+        self.closed = True
+        self._queue.clear()
+        if self._task is not None and self._task is not asyncio.current_task():
+            self._task.cancel()
+        if code is not None:
+            self._closing = asyncio.ensure_future(self._close_socket(code))
+
+    async def _close_socket(self, code: int):
+        try:
+            await self.ws.close(code=code, reason="Client too slow")
+        except Exception:
+            pass
+
+    # ─── Metrics ─────────────────────────────────────────
+
+    @property
+    def depth(self) -> int:
+        return len(self._queue)
+
+    @property
+    def lag(self) -> float:
+        """Seconds the oldest undelivered message has been waiting."""
+        if not self._queue:
+            return 0.0
+        return time.monotonic() - self._queue[0][1]
+
+    def stats(self) -> dict:
+        return {
+            "id": self.id,
+            "mode": self.mode,
+            "topics": sorted(self.topics),
+            "depth": self.depth,
+            "lag": round(self.lag, 4),
+            "last_lag": round(self.last_lag, 4),
+            "max_lag": round(self.max_lag, 4),
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "bytes_sent": self.bytes_sent,
+            "closed": self.closed,
+        }
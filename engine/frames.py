@@ -0,0 +1,134 @@
+"""
+AEZ Evolution v2 — Binary Columnar Frames
+
+At thousands of agents, a round's get_network_data() is megabytes of
+JSON: every node and edge dict's keys spelled out, and every number
+formatted as text on the server and parsed back in the browser. The
+binary protocol sends the same state column by column as packed
+little-endian typed arrays, which the dashboard wraps as Float32Array /
+Uint32Array / Uint8Array views with no parsing at all.
+
+FRAME LAYOUT:
+    b'AEZB'                  magic
+    uint32                   header length in bytes
+    header                   UTF-8 JSON, zero-padded to a 4-byte boundary
+    column, column, ...      raw arrays in header['columns'] order, each
+                             zero-padded to a 4-byte boundary
+
+The header holds what is not numeric: node ids, parent ids, the strategy
+names that the strategy column indexes into, clusters (as node indices),
+the small top-level fields (round, stats, payoff_matrices, ...) and the
+rest of the broadcast message (events, narration, leaderboard). Each
+column entry is [name, dtype, count]; edges refer to nodes by index.
+
+Numbers are float32 on the wire: node and edge values are already
+rounded to 3 decimals (balance/fitness to 1), well inside float32's
+precision for the ranges the engine produces.
+"""
+
+import json
+import struct
+
+import numpy as np
+
+MAGIC = b'AEZB'
+PROTOCOL_VERSION = 1
+
+NODE_FLOATS = ('balance', 'fitness', 'coop_rate', 'coop_probability',
+               'selectivity', 'vigilance')
+NODE_COUNTS = ('generation', 'interactions', 'cooperations', 'defections',
+               'warnings_emitted', 'threat_memory_count')
+NODE_FLAGS = ('alive', 'flagged_sybil', 'is_sybil')   # bit 0, 1, 2
+EDGE_FLOATS = ('trust', 'direct_trust', 'confidence', 'temporal_trust',
+               'commitment_reliability', 'alpha', 'beta')
+
+_DTYPES = {'f4': np.dtype('<f4'), 'u4': np.dtype('<u4'), 'u1': np.dtype('u1')}
+
+
+def _pad(n: int) -> int:
+    return -n % 4
+
+
+def encode_network(network: dict, message: dict = None) -> bytes:
+    """Pack a get_network_data() state (plus the rest of the broadcast
+    message, if any) into one binary frame."""
+    nodes, edges = network['nodes'], network['edges']
+    ids = [n['id'] for n in nodes]
+    index = {node_id: i for i, node_id in enumerate(ids)}
+    strategies = sorted({n['strategy'] for n in nodes})
+    strategy_code = {s: i for i, s in enumerate(strategies)}
+
+    columns = []
+    for name in NODE_FLOATS:
+        columns.append((name, 'f4', [n[name] for n in nodes]))
+    columns.append(('trust_weights', 'f4', [w for n in nodes for w in n['trust_weights']]))
+    for name in NODE_COUNTS:
+        columns.append((name, 'u4', [n[name] for n in nodes]))
+    columns.append(('flags', 'u1', [sum(1 << b for b, f in enumerate(NODE_FLAGS) if n[f])
+                                    for n in nodes]))
+    columns.append(('strategy', 'u1', [strategy_code[n['strategy']] for n in nodes]))
+    columns.append(('source', 'u4', [index[e['source']] for e in edges]))
+    columns.append(('target', 'u4', [index[e['target']] for e in edges]))
+    columns.append(('trust', 'f4', [e['trust'] for e in edges]))
+    for name in EDGE_FLOATS[1:]:
+        columns.append((f"edge_{name}", 'f4', [e['dimensions'][name] for e in edges]))
+
+    header = {
+        'protocol': PROTOCOL_VERSION,
+        'message': {k: v for k, v in (message or {}).items() if k != 'data'},
+        'scalars': {k: v for k, v in network.items()
+                    if k not in ('nodes', 'edges', 'clusters')},
+        'ids': ids,
+        'parent_ids': [n['parent_id'] for n in nodes],
+        'strategies': strategies,
+        'clusters': [[index[a] for a in c if a in index] for c in network['clusters']],
+        'columns': [[name, dtype, len(values)] for name, dtype, values in columns],
+    }
+    head = json.dumps(header, separators=(',', ':')).encode()
+    parts = [MAGIC, struct.pack('<I', len(head)), head, bytes(_pad(len(head)))]
+    for _, dtype, values in columns:
+        raw = np.asarray(values, dtype=_DTYPES[dtype]).tobytes()
+        parts.append(raw)
+        parts.append(bytes(_pad(len(raw))))
+    return b''.join(parts)
+
+
+def decode_frame(frame: bytes) -> tuple[dict, dict[str, np.ndarray]]:
+    """Split a frame into its header and zero-copy column views."""
+    if frame[:4] != MAGIC:
+        raise ValueError("Not an AEZ binary frame")
+    (head_len,) = struct.unpack_from('<I', frame, 4)
+    header = json.loads(frame[8:8 + head_len])
+    offset = 8 + head_len + _pad(head_len)
+    columns = {}
+    for name, dtype, count in header['columns']:
+        dt = _DTYPES[dtype]
+        columns[name] = np.frombuffer(frame, dtype=dt, count=count, offset=offset)
+        offset += count * dt.itemsize
+        offset += _pad(count * dt.itemsize)
+    return header, columns
+
+
+def decode_network(frame: bytes) -> dict:
+    """Rebuild the get_network_data() dict from a frame (the Python
+    counterpart of the dashboard decoder; values come back float32-rounded)."""
+    header, col = decode_frame(frame)
+    ids = header['ids']
+    tw = col['trust_weights'].reshape(-1, 4) if ids else np.zeros((0, 4))
+    nodes = []
+    for i, node_id in enumerate(ids):
+        flags = int(col['flags'][i])
+        node = {'id': node_id, 'parent_id': header['parent_ids'][i],
+                'strategy': header['strategies'][col['strategy'][i]],
+                'trust_weights': [float(w) for w in tw[i]]}
+        node.update({name: float(col[name][i]) for name in NODE_FLOATS})
+        node.update({name: int(col[name][i]) for name in NODE_COUNTS})
+        node.update({f: bool(flags >> b & 1) for b, f in enumerate(NODE_FLAGS)})
+        nodes.append(node)
+    edges = []
+    for k in range(len(col['source'])):
+        dims = {name: float(col[f"edge_{name}"][k]) for name in EDGE_FLOATS[1:]}
+        edges.append({'source': ids[col['source'][k]], 'target': ids[col['target'][k]],
+                      'trust': float(col['trust'][k]), 'dimensions': dims})
+    return {**header['scalars'], 'nodes': nodes, 'edges': edges,
+            'clusters': [[ids[i] for i in c] for c in header['clusters']]}
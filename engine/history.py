@@ -0,0 +1,541 @@
+"""
+AEZ Evolution v2 — Packed Interaction History
+
+Agents remember the last N interactions with every opponent. Stored as
+Python lists of (bool, bool) tuples that costs ~60 bytes per interaction
+and a full list copy every time the window slides. Here each interaction
+is two bits in a fixed-size ring buffer:
+
+    bit 0 — my action      (1 = cooperated)
+    bit 1 — their action   (1 = cooperated)
+
+Appends are O(1) with no copying, and running counters (cooperations on
+each side within the window) are maintained on append/evict so every
+statistic the agent needs is read directly instead of re-scanned.
+
+The buffers still behave like the old sequences — len(), indexing
+(including negative indices), iteration and append((mine, theirs)) —
+so callers that treat history as a list of pairs keep working.
+
+SHARED PAIR LOG:
+  Inside a simulation the same interaction used to be stored four times:
+  in both agents' histories, in both directed TrustStates' action windows,
+  and in both agents' commitment records. PairLog keeps ONE record per
+  unordered pair — the packed outcome ring plus both sides' commitment
+  counts — and hands out oriented read-only views (PairSide). Agents and
+  trust edges read through the views; the engine writes each interaction
+  to the log exactly once.
+"""
+
+from collections.abc import Mapping
+
+
+class PackedRing:
+    """
+    Fixed-capacity ring buffer of small integer codes, packed into a
+    bytearray (`width` bits per entry). Subclasses decode codes into
+    values and keep running counters through _on_add / _on_evict.
+    """
+    __slots__ = ('capacity', '_bits', '_start', '_len')
+
+    width = 1
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._bits = bytearray((capacity * self.width + 7) // 8)
+        self._start = 0
+        self._len = 0
+
+    # ─── Raw codes ───────────────────────────────────────
+
+    def _read(self, slot: int) -> int:
+        bit = slot * self.width
+        return (self._bits[bit >> 3] >> (bit & 7)) & ((1 << self.width) - 1)
+
+    def _write(self, slot: int, code: int):
+        bit = slot * self.width
+        mask = ((1 << self.width) - 1) << (bit & 7)
+        byte = bit >> 3
+        self._bits[byte] = (self._bits[byte] & ~mask) | (code << (bit & 7))
+
+    def _push(self, code: int):
+        n = self._len
+        if self.tracks_links and n:
+            self._on_link(self._read((self._start + n - 1) % self.capacity), code)
+        if n == self.capacity:
+            old = self._read(self._start)
+            self._on_evict(old)
+            if self.tracks_links and n > 1:
+                self._on_unlink(old, self._read((self._start + 1) % self.capacity))
+            self._write(self._start, code)
+            self._start = (self._start + 1) % self.capacity
+        else:
+            self._write((self._start + n) % self.capacity, code)
+            self._len += 1
+        self._on_add(code)
+
+    def _code_at(self, index: int) -> int:
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError("history index out of range")
+        return self._read((self._start + index) % self.capacity)
+
+    def _on_add(self, code: int):
+        pass
+
+    def _on_evict(self, code: int):
+        pass
+
+    # Adjacent-entry hooks, called only when tracks_links is set: a new
+    # (previous, current) link forms on every push after the first, and
+    # the oldest link leaves with each eviction.
+    tracks_links = False
+
+    def _on_link(self, prev: int, code: int):
+        pass
+
+    def _on_unlink(self, old: int, nxt: int):
+        pass
+
+    def _decode(self, code: int):
+        return code
+
+    # ─── Sequence protocol ───────────────────────────────
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __bool__(self) -> bool:
+        return self._len > 0
+
+    def __getitem__(self, index: int):
+        return self._decode(self._code_at(index))
+
+    def __iter__(self):
+        for i in range(self._len):
+            yield self._decode(self._read((self._start + i) % self.capacity))
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({list(self)!r})"
+
+
+class InteractionBuffer(PackedRing):
+    """
+    Last `capacity` (my_action, their_action) pairs with one opponent.
+    `mirrors` counts consecutive entries where my move repeated their
+    previous move, out of `links` consecutive entries in the window —
+    the reciprocity evidence behind the Reciprocator label.
+    """
+    __slots__ = ('my_coops', 'their_coops', 'mirrors', 'links')
+
+    width = 2
+
+    def __init__(self, capacity: int = 50):
+        super().__init__(capacity)
+        self.my_coops = 0
+        self.their_coops = 0
+        self.mirrors = 0
+        self.links = 0
+
+    @classmethod
+    def from_pairs(cls, pairs, capacity: int = 50) -> 'InteractionBuffer':
+        buf = cls(capacity)
+        for pair in pairs:
+            buf.append(pair)
+        return buf
+
+    def append(self, pair: tuple):
+        # Hot path — _push specialized for 2-bit codes, counters inlined.
+        my_action, their_action = pair
+        code = (1 if my_action else 0) | (2 if their_action else 0)
+        bits = self._bits
+        n, cap = self._len, self.capacity
+        if n:
+            last = (self._start + n - 1) % cap
+            prev = (bits[last >> 2] >> ((last & 3) << 1)) & 3
+            self.links += 1
+            self.mirrors += (code & 1) == (prev >> 1)
+        if n == cap:
+            slot = self._start
+            shift = (slot & 3) << 1
+            old = (bits[slot >> 2] >> shift) & 3
+            self.my_coops -= old & 1
+            self.their_coops -= old >> 1
+            if n > 1:
+                nxt = (slot + 1) % cap
+                self.links -= 1
+                self.mirrors -= ((bits[nxt >> 2] >> ((nxt & 3) << 1)) & 1) == (old >> 1)
+            self._start = (slot + 1) % cap
+        else:
+            slot = (self._start + n) % cap
+            shift = (slot & 3) << 1
+            self._len += 1
+        bits[slot >> 2] = (bits[slot >> 2] & ~(3 << shift)) | (code << shift)
+        self.my_coops += code & 1
+        self.their_coops += code >> 1
+
+    def _on_add(self, code: int):
+        self.my_coops += code & 1
+        self.their_coops += code >> 1
+
+    def _on_evict(self, code: int):
+        self.my_coops -= code & 1
+        self.their_coops -= code >> 1
+
+    def _decode(self, code: int) -> tuple:
+        return bool(code & 1), bool(code & 2)
+
+    @property
+    def their_coop_rate(self) -> float:
+        """Opponent's cooperation rate toward me within the window."""
+        return self.their_coops / self._len if self._len else 0.5
+
+    @property
+    def their_last(self) -> bool:
+        return bool(self._code_at(-1) & 2)
+
+
+class ActionBuffer(PackedRing):
+    """Last `capacity` own actions, one bit each."""
+    __slots__ = ('coops',)
+
+    width = 1
+
+    def __init__(self, capacity: int = 100):
+        super().__init__(capacity)
+        self.coops = 0
+
+    def append(self, action: bool):
+        self._push(1 if action else 0)
+
+    def _on_add(self, code: int):
+        self.coops += code
+
+    def _on_evict(self, code: int):
+        self.coops -= code
+
+    def _decode(self, code: int) -> bool:
+        return bool(code)
+
+
+class InteractionHistory(dict):
+    """
+    opponent_id → InteractionBuffer.
+    Assigning a plain sequence of pairs packs it into a buffer.
+    """
+
+    capacity = 50
+    shared = False
+
+    # Totals of the buffers' mirror / link counters, kept in step on
+    # every write so strategy labelling never rescans the windows.
+    mirrors = 0
+    links = 0
+
+    def __setitem__(self, opponent_id: str, value):
+        if not isinstance(value, InteractionBuffer):
+            value = InteractionBuffer.from_pairs(value, self.capacity)
+        if opponent_id in self:
+            self._uncount(self[opponent_id])
+        super().__setitem__(opponent_id, value)
+        self.mirrors += value.mirrors
+        self.links += value.links
+
+    def __delitem__(self, opponent_id: str):
+        self._uncount(self[opponent_id])
+        super().__delitem__(opponent_id)
+
+    def pop(self, opponent_id: str, *default):
+        if opponent_id in self:
+            self._uncount(self[opponent_id])
+        return super().pop(opponent_id, *default)
+
+    def _uncount(self, buf: InteractionBuffer):
+        self.mirrors -= buf.mirrors
+        self.links -= buf.links
+
+    def setdefault(self, opponent_id: str, default=()):
+        if opponent_id not in self:
+            self[opponent_id] = default
+        return self[opponent_id]
+
+    def record(self, opponent_id: str, my_action: bool, their_action: bool):
+        buf = self.get(opponent_id)
+        if buf is None:
+            buf = InteractionBuffer(self.capacity)
+            super().__setitem__(opponent_id, buf)
+        mirrors, links = buf.mirrors, buf.links
+        buf.append((my_action, their_action))
+        self.mirrors += buf.mirrors - mirrors
+        self.links += buf.links - links
+
+
+# ─── Shared Pairwise Log ─────────────────────────────────
+
+class PairRecord(PackedRing):
+    """
+    One unordered pair's shared record. Codes are oriented to the pair's
+    sorted ids: bit 0 = lo's action, bit 1 = hi's action. Commitment
+    counts are cumulative (never windowed), one (honored, broken) per side.
+    """
+    __slots__ = ('lo_coops', 'hi_coops',
+                 'lo_honored', 'lo_broken', 'hi_honored', 'hi_broken',
+                 'lo_mirrors', 'hi_mirrors', 'links')
+
+    width = 2
+    tracks_links = True
+
+    def __init__(self, capacity: int = 50):
+        super().__init__(capacity)
+        self.lo_coops = self.hi_coops = 0
+        self.lo_honored = self.lo_broken = 0
+        self.hi_honored = self.hi_broken = 0
+        self.lo_mirrors = self.hi_mirrors = 0
+        self.links = 0
+
+    def _on_link(self, prev: int, code: int):
+        self.links += 1
+        self.lo_mirrors += (code & 1) == (prev >> 1)
+        self.hi_mirrors += (code >> 1) == (prev & 1)
+
+    def _on_unlink(self, old: int, nxt: int):
+        self.links -= 1
+        self.lo_mirrors -= (nxt & 1) == (old >> 1)
+        self.hi_mirrors -= (nxt >> 1) == (old & 1)
+
+    def _on_add(self, code: int):
+        self.lo_coops += code & 1
+        self.hi_coops += code >> 1
+
+    def _on_evict(self, code: int):
+        self.lo_coops -= code & 1
+        self.hi_coops -= code >> 1
+
+    def record(self, lo_action: bool, hi_action: bool,
+               lo_honored: bool, hi_honored: bool):
+        self._push((1 if lo_action else 0) | (2 if hi_action else 0))
+        if lo_honored:
+            self.lo_honored += 1
+        else:
+            self.lo_broken += 1
+        if hi_honored:
+            self.hi_honored += 1
+        else:
+            self.hi_broken += 1
+
+
+class PairSide:
+    """
+    A PairRecord seen from one member. Reads like an InteractionBuffer
+    (pairs are (mine, theirs)) and also serves a TrustState's action
+    window and commitment counts for the directed edge me → them.
+    """
+    __slots__ = ('record', 'hi')
+
+    def __init__(self, record: PairRecord, hi: bool):
+        self.record = record
+        self.hi = hi    # True when I am the pair's higher id
+
+    def _orient(self, code: int) -> tuple:
+        lo, hi = bool(code & 1), bool(code & 2)
+        return (hi, lo) if self.hi else (lo, hi)
+
+    def __len__(self) -> int:
+        return self.record._len
+
+    def __bool__(self) -> bool:
+        return self.record._len > 0
+
+    def __getitem__(self, index: int) -> tuple:
+        return self._orient(self.record._code_at(index))
+
+    def __iter__(self):
+        rec = self.record
+        for i in range(rec._len):
+            yield self._orient(rec._read((rec._start + i) % rec.capacity))
+
+    def __repr__(self) -> str:
+        return f"PairSide({list(self)!r})"
+
+    @property
+    def my_coops(self) -> int:
+        return self.record.hi_coops if self.hi else self.record.lo_coops
+
+    @property
+    def their_coops(self) -> int:
+        return self.record.lo_coops if self.hi else self.record.hi_coops
+
+    @property
+    def mirrors(self) -> int:
+        return self.record.hi_mirrors if self.hi else self.record.lo_mirrors
+
+    @property
+    def links(self) -> int:
+        return self.record.links
+
+    @property
+    def their_coop_rate(self) -> float:
+        n = self.record._len
+        return self.their_coops / n if n else 0.5
+
+    @property
+    def their_last(self) -> bool:
+        return self[-1][1]
+
+    def their_recent(self, n: int) -> list[bool]:
+        """Their last n actions toward me, oldest first."""
+        rec = self.record
+        bit = 1 if self.hi else 2
+        start = max(rec._len - n, 0)
+        return [bool(rec._read((rec._start + i) % rec.capacity) & bit)
+                for i in range(start, rec._len)]
+
+    @property
+    def their_commitments(self) -> tuple[int, int]:
+        """(honored, broken) commitments they made to me."""
+        rec = self.record
+        if self.hi:
+            return rec.lo_honored, rec.lo_broken
+        return rec.hi_honored, rec.hi_broken
+
+
+class SharedHistory(dict):
+    """
+    opponent_id → PairSide for one agent. Read-only: the engine records
+    each interaction once in the PairLog, so an agent's own record()
+    skips its history and commitment writes when `shared` is set.
+    """
+
+    shared = True
+
+    # Mirror / link totals across this agent's sides, maintained by the
+    # PairLog on every write (see InteractionHistory).
+    mirrors = 0
+    links = 0
+
+
+class SharedCommitments(Mapping):
+    """opponent_id → [honors, breaks], read through the agent's PairSides."""
+
+    def __init__(self, sides: SharedHistory):
+        self.sides = sides
+
+    def __getitem__(self, opponent_id: str) -> list:
+        return list(self.sides[opponent_id].their_commitments)
+
+    def __iter__(self):
+        return iter(self.sides)
+
+    def __len__(self) -> int:
+        return len(self.sides)
+
+    def __repr__(self) -> str:
+        return f"SharedCommitments({dict(self)!r})"
+
+
+class PairLog:
+    """
+    Every interaction in a simulation, one PairRecord per unordered pair.
+    Each agent has a SharedHistory index of its PairSides, which is also
+    what its trust edges bind to — so history, trust windows and
+    commitments all come from the same bits.
+    """
+
+    capacity = 50
+
+    def __init__(self):
+        self.pairs: dict[tuple[str, str], PairRecord] = {}
+        self.views: dict[str, SharedHistory] = {}
+
+    def __len__(self) -> int:
+        return len(self.pairs)
+
+    def _pair(self, a: str, b: str) -> PairRecord:
+        key = (a, b) if a < b else (b, a)
+        rec = self.pairs.get(key)
+        if rec is None:
+            rec = PairRecord(self.capacity)
+            self.pairs[key] = rec
+            lo, hi = key
+            self.history(lo)[hi] = PairSide(rec, False)
+            self.history(hi)[lo] = PairSide(rec, True)
+        return rec
+
+    def history(self, agent_id: str) -> SharedHistory:
+        view = self.views.get(agent_id)
+        if view is None:
+            view = SharedHistory()
+            self.views[agent_id] = view
+        return view
+
+    def side(self, me: str, them: str) -> PairSide:
+        """The pair seen from `me` — what edge me → them reads."""
+        self._pair(me, them)
+        return self.views[me][them]
+
+    def record(self, a: str, b: str, a_action: bool, b_action: bool,
+               a_honored: bool = True, b_honored: bool = True):
+        rec = self._pair(a, b)
+        lo, hi = (a, b) if a < b else (b, a)
+        before = rec.lo_mirrors, rec.hi_mirrors, rec.links
+        if a < b:
+            rec.record(a_action, b_action, a_honored, b_honored)
+        else:
+            rec.record(b_action, a_action, b_honored, a_honored)
+        self._credit(lo, hi, rec, before)
+
+    def _credit(self, lo: str, hi: str, rec: PairRecord, before: tuple):
+        """Carry a record's mirror / link change into both agents' totals."""
+        lo_mirrors, hi_mirrors, links = before
+        lo_view, hi_view = self.views[lo], self.views[hi]
+        lo_view.mirrors += rec.lo_mirrors - lo_mirrors
+        hi_view.mirrors += rec.hi_mirrors - hi_mirrors
+        lo_view.links += rec.links - links
+        hi_view.links += rec.links - links
+
+    def bind(self, agent):
+        """
+        Point an agent's history and commitment records at the log.
+        Anything it recorded standalone beforehand is imported first.
+        A pair the opponent already brought in keeps the opponent's copy
+        of the actions, but the counts this agent kept of the opponent's
+        commitments are the record's other side and are merged in.
+        """
+        view = self.history(agent.id)
+        if agent.history is view:
+            return
+        for opp_id, pairs in agent.history.items():
+            honors, breaks = agent.commitment_history.get(opp_id, (0, 0))
+            shared = opp_id in view
+            rec = self._pair(agent.id, opp_id)
+            hi = agent.id > opp_id
+            if not shared:
+                before = rec.lo_mirrors, rec.hi_mirrors, rec.links
+                for mine, theirs in pairs:
+                    lo_action, hi_action = (theirs, mine) if hi else (mine, theirs)
+                    rec._push((1 if lo_action else 0) | (2 if hi_action else 0))
+                self._credit(*sorted((agent.id, opp_id)), rec, before)
+            if hi:
+                rec.lo_honored += honors
+                rec.lo_broken += breaks
+            else:
+                rec.hi_honored += honors
+                rec.hi_broken += breaks
+        agent.history = view
+        agent.commitment_history = SharedCommitments(view)
+
+    def remove_agents(self, agent_ids: set[str]):
+        """Drop the given agents' pairs and their entries in survivors' views."""
+        for agent_id in agent_ids:
+            view = self.views.pop(agent_id, None)
+            if view is None:
+                continue
+            for opp_id in view:
+                key = (agent_id, opp_id) if agent_id < opp_id else (opp_id, agent_id)
+                self.pairs.pop(key, None)
+                other = self.views.get(opp_id)
+                side = other.pop(agent_id, None) if other is not None else None
+                if side is not None:
+                    other.mirrors -= side.mirrors
+                    other.links -= side.links
@@ -67,13 +67,25 @@ class ImmuneSystem:
     Detection emerges from local computation, communication, and statistics.
     """
 
-    def __init__(self):
+    # Ring candidate generators for Phase 5. Both feed the same z-test.
+    #   components — connected components of mutual trust ≥ μ + σ
+    #   sweep      — low-conductance sets from personalized PageRank sweeps
+    CANDIDATE_GENERATORS = ('components', 'sweep')
+
+    def __init__(self, candidate_generator: str = 'components'):
+        if candidate_generator not in self.CANDIDATE_GENERATORS:
+            raise ValueError(f"Unknown candidate generator: {candidate_generator}")
+        self.candidate_generator = candidate_generator
+
         # Warning log for narrator
         self.warning_log: list[dict] = []
         # Confirmed threat log
         self.confirmed_threats: list[dict] = []
         # Events for narrator
         self.events: list[dict] = []
+        # Population trust statistics (μ, σ, μ + σ, median observations)
+        # from the last full ring test; online detection reuses them.
+        self.ring_stats: Optional[dict] = None
 
     def run_cycle(self, agents: dict, trust_net, round_num: int) -> set:
         """
@@ -115,7 +127,7 @@ class ImmuneSystem:
         # (they defect against everyone). Honest agents trigger few (random noise).
         # This temporal isolation is what separates signal from noise.
         for agent in alive.values():
-            agent.warnings_received = {}
+            agent.warnings_received = None
 
         # Phase 1: Local detection — each agent evaluates its opponents.
         # No global interaction minimum — compute_suspicion already guards
@@ -158,6 +170,31 @@ class ImmuneSystem:
 
         return flagged
 
+    def run_online_detection(self, agents: dict, trust_net, round_num: int) -> set:
+        """
+        Event-driven ring detection between full immune cycles.
+
+        Only components touched by a trust-threshold crossing since the
+        last call are tested — a stable component has no new structural
+        evidence, so re-testing it cannot change the verdict. A ring is
+        therefore caught at the end of the round in which it formed,
+        not up to a full immune interval later.
+
+        The population statistics the test compares against come from the
+        last full cycle, and each candidate reads only the edges into its
+        members, so a call costs the candidates' in-degree, not O(edges).
+
+        Returns: set of newly flagged agent IDs
+        """
+        alive = {aid: a for aid, a in agents.items() if a.alive and not a.flagged_sybil}
+        dirty = trust_net.pop_dirty_agents() & alive.keys()
+        if len(alive) < 10 or not dirty:
+            return set()
+
+        return self._detect_ring_statistical(
+            alive, trust_net, sorted(alive.keys()), round_num, dirty=dirty
+        )
+
     def _run_local_detection(self, agent, population_stats: dict,
                              round_num: int) -> list[dict]:
         """
@@ -267,7 +304,7 @@ class ImmuneSystem:
             if not agent.alive:
                 continue
 
-            for target_id in sorted(agent.warnings_received.keys()):  # Deterministic
+            for target_id in agent.warning_targets():  # Deterministic
                 warnings = agent.warnings_received[target_id]
                 if target_id in confirmed_targets:
                     continue
@@ -354,7 +391,7 @@ class ImmuneSystem:
 
     def _detect_ring_statistical(self, agents: dict, trust_net,
                                  all_agent_ids: list[str],
-                                 round_num: int) -> set:
+                                 round_num: int, dirty: set = None) -> set:
         """
         Statistical sybil ring detection via hypothesis testing.
 
@@ -386,173 +423,225 @@ class ImmuneSystem:
           (reflecting high confidence in the estimate)
         """
         flagged = set()
-        all_ids_set = set(all_agent_ids)
 
-        # ─── Step 1: Compute trust distribution for adaptive cluster discovery ───
+        # ─── Step 1: Trust distribution for adaptive cluster discovery ──────────
         # The cluster threshold comes from the DATA, not from us.
-        all_trust_values = []
-        observation_counts = []  # for data-derived MINIMUM_GAP
-        for (a, b), state in trust_net.edges.items():
-            if a in all_ids_set and b in all_ids_set:
-                # Evidence floor: need at least 2 real interactions (beyond prior).
-                # Bayesian derivation: posterior std of Beta(3,1) = 0.19, which is
-                # below the max binary variance (0.25). At fewer observations,
-                # the posterior is too wide for meaningful inference.
-                if (state.alpha + state.beta) >= 4:
-                    all_trust_values.append(state.direct_trust)
-                    observation_counts.append(state.alpha + state.beta - 2)
-
-        if len(all_trust_values) < 20:
-            return set()  # Insufficient data for statistics
-
-        mu_trust = float(np.mean(all_trust_values))
-        sigma_trust = float(np.std(all_trust_values))
-
-        # Cluster threshold = μ + σ: edges significantly above population mean.
-        cluster_threshold = mu_trust + sigma_trust
+        # Online mode (dirty agents) reuses the last full cycle's statistics.
+        stats = self.ring_stats if dirty is not None else None
+        if stats is None:
+            stats = self._gather_ring_evidence(trust_net, all_agent_ids)
+            if stats is None:
+                return set()  # Insufficient data for statistics
 
-        # ─── Step 2: Find candidate clusters ────────────────────────────────────
-        clusters = trust_net.get_clusters(all_agent_ids, threshold=cluster_threshold)
+        cluster_threshold = stats['cluster_threshold']
+        if trust_net.track_crossings:
+            trust_net.crossing_threshold = cluster_threshold
 
-        for cluster in clusters:
-            # Size bounds: too small = noise, too large = legitimate community.
-            # 3 = minimum for any group inference (structural constant).
-            # n/3 = a cluster larger than 1/3 of the population is a community, not a ring.
-            if len(cluster) < 3 or len(cluster) > len(agents) // 3:
-                continue
-
-            cluster_ids = list(cluster)
-            cluster_set = set(cluster_ids)
-
-            # ─── Step 3: Gather internal and external trust + Bayesian variance ──
-            # For each trust edge, we collect BOTH the point estimate (trust)
-            # and the Bayesian posterior variance (uncertainty).
-            internal_trusts = []
-            internal_bayes_vars = []
-            for a in cluster_ids:
-                for b in cluster_ids:
-                    if a != b:
-                        state = trust_net.edges.get((a, b))
-                        if state and (state.alpha + state.beta) >= 4:  # 2+ real interactions
-                            internal_trusts.append(state.direct_trust)
-                            ab = state.alpha + state.beta
-                            internal_bayes_vars.append(
-                                state.alpha * state.beta / (ab * ab * (ab + 1))
-                            )
-
-            if len(internal_trusts) < 3:
-                continue  # Not enough internal evidence
-
-            external_trusts = []
-            external_bayes_vars = []
-            for outsider_id in all_agent_ids:
-                if outsider_id in cluster_set:
-                    continue
-                for member_id in cluster_ids:
-                    state = trust_net.edges.get((outsider_id, member_id))
-                    if state and (state.alpha + state.beta) >= 4:  # 2+ real interactions
-                        external_trusts.append(state.direct_trust)
-                        ab = state.alpha + state.beta
-                        external_bayes_vars.append(
-                            state.alpha * state.beta / (ab * ab * (ab + 1))
-                        )
-
-            if len(external_trusts) < 5:
-                continue  # CLT minimum: n ≥ 5 for valid z-test on bounded distributions
-
-            mu_in = float(np.mean(internal_trusts))
-            mu_out = float(np.mean(external_trusts))
-            n_in = len(internal_trusts)
-            n_out = len(external_trusts)
-
-            # ─── Step 4: Practical significance — two complementary checks ─────
-            #
-            # Check A: DATA-DERIVED MINIMUM GAP — self-adapting.
-            # At the population's median observation count, compute Bayesian
-            # posterior σ and require gap > 3σ (99.7% confidence).
-            # This shrinks as agents accumulate interactions (higher confidence)
-            # and grows when data is sparse (conservative).
-            median_n = float(np.median(observation_counts))
-            # Bayesian posterior std for balanced Beta at median observation count:
-            # std(Beta(n/2+1, n/2+1)) ≈ 1/(2*sqrt(n+3))
-            posterior_std = 1.0 / (2.0 * np.sqrt(median_n + 3))
-            # 2σ: a gap this large has < 2.3% probability from random variation.
-            # We use 2σ (not 3σ) because the z-test (Phase 5b) already provides
-            # 99.9% statistical significance. The MINIMUM_GAP is a PRACTICAL
-            # significance floor — "is this gap large enough to represent real
-            # behavioral difference?" — not a second statistical test.
-            # Two independent checks: practical (2σ) × statistical (z > 3.09)
-            # gives combined confidence > 99.97%.
-            MINIMUM_GAP = max(2.0 * posterior_std, 0.15)  # floor: measurement granularity
-            gap = mu_in - mu_out
-            if gap < MINIMUM_GAP:
+        # ─── Step 2: Find candidate clusters ────────────────────────────────────
+        # With dirty agents (online mode), only their components are tested.
+        # Size bounds: too small = noise, too large = legitimate community.
+        # 3 = minimum for any group inference (structural constant).
+        # n/3 = a cluster larger than 1/3 of the population is a community, not a ring.
+        clusters = [
+            cluster for cluster in self._find_ring_candidates(
+                trust_net, all_agent_ids, cluster_threshold, dirty)
+            if 3 <= len(cluster) <= len(agents) // 3
+        ]
+
+        # Every candidate is tested before any is isolated, so all of them
+        # are judged on the same evidence.
+        population = set(all_agent_ids)
+        tested = [(list(cluster), self._test_ring_candidate(list(cluster), trust_net,
+                                                            population, stats))
+                  for cluster in clusters]
+
+        for cluster_ids, result in tested:
+            if result is None:
                 continue
 
-            # Check B: EXTERNAL TRUST MUST BE LOW — the defining behavior of
-            # sybil rings is that they DEFECT against outsiders. Outsiders
-            # therefore have LOW trust in ring members (below population average).
-            # Honest cooperative clusters have NORMAL external trust — outsiders
-            # still cooperate with them regularly.
-            #
-            # This is data-derived: mu_trust comes from the population itself.
-            # A cluster where outsiders trust the members at or above the
-            # population mean is NOT behaving like a sybil ring.
-            if mu_out >= mu_trust:
-                continue  # Outsiders trust them fine — not sybil behavior
-
-            # ─── Step 5: Statistical significance — Bayesian z-test ─────────────
-            # Use BAYESIAN POSTERIOR VARIANCE instead of sample variance.
-            #
-            # Why: Sample variance of [0.75, 0.75, 0.75, 0.75] = 0. This makes
-            # the z-score infinite — a statistical artifact of few observations.
-            # Bayesian variance of Beta(3,1) = 0.0375. This reflects genuine
-            # uncertainty: "I've only seen 2 cooperations, I'm not that certain."
-            #
-            # The Bayesian approach uses the uncertainty that THE MODEL ITSELF
-            # tells us, not an unreliable sample statistic.
-            avg_bvar_in = float(np.mean(internal_bayes_vars))
-            avg_bvar_out = float(np.mean(external_bayes_vars))
-
-            # Standard error using mean Bayesian posterior variances
-            se = np.sqrt(avg_bvar_in / n_in + avg_bvar_out / n_out)
-            if se < 1e-6:
-                z = 100.0  # Only possible with overwhelming evidence
-            else:
-                z = gap / se
-
-            # z > 3.09 corresponds to one-tailed p < 0.001.
-            # This is a universal statistical convention — the 99.9% confidence
-            # level used across all sciences for "highly significant" results.
-            # It is NOT a domain-specific tuning parameter.
-            SIGNIFICANCE_Z = 3.09  # p < 0.001 (one-tailed)
-
-            if z > SIGNIFICANCE_Z:
-                # This cluster has BOTH:
-                # - Practically significant trust asymmetry (gap > data-derived 3σ threshold)
-                # - Statistically significant at 99.9% confidence (z > 3.09)
-                # - Low external trust (outsiders distrust them — sybil signature)
-                # - Using Bayesian variances that properly account for data sparsity
-                # This combination is nearly impossible for honest agent groups.
-
-                for aid in cluster_ids:
-                    if aid in agents and not agents[aid].flagged_sybil:
-                        agents[aid].flagged_sybil = True
-                        flagged.add(aid)
-                        trust_net.isolate_agent(aid, all_agent_ids)
-
-                self.events.append({
-                    'type': 'ring_detected',
-                    'members': cluster_ids,
-                    'z_score': round(float(z), 2),
-                    'gap': round(gap, 3),
-                    'internal_trust': round(mu_in, 3),
-                    'external_trust': round(mu_out, 3),
-                    'cluster_threshold': round(cluster_threshold, 3),
-                    'round': round_num
-                })
+            # This cluster has BOTH:
+            # - Practically significant trust asymmetry (gap > data-derived 3σ threshold)
+            # - Statistically significant at 99.9% confidence (z > 3.09)
+            # - Low external trust (outsiders distrust them — sybil signature)
+            # - Using Bayesian variances that properly account for data sparsity
+            # This combination is nearly impossible for honest agent groups.
+            for aid in cluster_ids:
+                if aid in agents and not agents[aid].flagged_sybil:
+                    agents[aid].flagged_sybil = True
+                    flagged.add(aid)
+                    trust_net.isolate_agent(aid, all_agent_ids)
+
+            self.events.append({
+                'type': 'ring_detected',
+                'members': cluster_ids,
+                'z_score': round(float(result['z']), 2),
+                'gap': round(result['gap'], 3),
+                'internal_trust': round(result['mu_in'], 3),
+                'external_trust': round(result['mu_out'], 3),
+                'cluster_threshold': round(cluster_threshold, 3),
+                'candidate_generator': self.candidate_generator,
+                'round': round_num
+            })
 
         return flagged
 
+    def _find_ring_candidates(self, trust_net, all_agent_ids: list[str],
+                              threshold: float, seeds: set = None) -> list[set]:
+        """
+        Candidate clusters for the ring z-test.
+
+        Both generators work on the same μ + σ trust graph. Components
+        need a ring to be cut off from everyone else by that threshold
+        alone; the sweep generator ranks by conductance instead, so a ring
+        hanging off a community by a bridge edge is still separated, and a
+        large community yields its insular subsets rather than one
+        oversized candidate that the size bound would discard.
+        """
+        if self.candidate_generator == 'sweep':
+            return trust_net.get_low_conductance_sets(
+                all_agent_ids,
+                threshold=threshold,
+                max_size=len(all_agent_ids) // 3,
+                seeds=seeds,
+            )
+        return trust_net.get_clusters(all_agent_ids, threshold=threshold, seeds=seeds)
+
+    def _gather_ring_evidence(self, trust_net, all_agent_ids: list[str]) -> Optional[dict]:
+        """
+        One vectorized pass over the trust edges per cycle.
+
+        Reduces the Beta evidence of every edge among the alive population
+        to the statistics each candidate is tested against (μ, σ, median
+        observation count), kept in ring_stats for online detection. The
+        pass is O(edges): candidate tests read their own edges from the
+        trust indexes, so no population-sized matrix is ever built.
+
+        Returns None when there are too few informative edges for statistics.
+        """
+        alpha, beta = trust_net.edge_evidence(all_agent_ids)
+        total = alpha + beta
+
+        # Evidence floor: need at least 2 real interactions (beyond prior).
+        # Bayesian derivation: posterior std of Beta(3,1) = 0.19, which is
+        # below the max binary variance (0.25). At fewer observations,
+        # the posterior is too wide for meaningful inference.
+        informative = total >= 4
+        trust_values = alpha[informative] / total[informative]
+        if trust_values.size < 20:
+            self.ring_stats = None
+            return None
+
+        mu_trust = float(np.mean(trust_values))
+        sigma_trust = float(np.std(trust_values))
+        self.ring_stats = {
+            'mu_trust': mu_trust,
+            'sigma_trust': sigma_trust,
+            # Cluster threshold = μ + σ: edges significantly above population mean.
+            'cluster_threshold': mu_trust + sigma_trust,
+            'median_n': float(np.median(total[informative] - 2)),
+        }
+        return self.ring_stats
+
+    @staticmethod
+    def _informative_trust(alpha: np.ndarray, beta: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Trust and Bayesian posterior variance of the informative edges
+        (evidence floor as in _gather_ring_evidence)."""
+        total = alpha + beta
+        keep = total >= 4
+        alpha, beta, total = alpha[keep], beta[keep], total[keep]
+        # var(Beta(α,β)) = αβ / ((α+β)²(α+β+1))
+        return alpha / total, alpha * beta / (total * total * (total + 1))
+
+    def _test_ring_candidate(self, cluster_ids: list[str], trust_net,
+                             population: set, stats: dict) -> Optional[dict]:
+        """
+        Bayesian z-test of one candidate cluster against the rest of the
+        population. Returns the test statistics if the cluster is a ring,
+        None otherwise.
+        """
+        # ─── Step 3: Gather internal and external trust + Bayesian variance ──
+        # For each trust edge into the cluster, we collect BOTH the point
+        # estimate (trust) and the Bayesian posterior variance (uncertainty).
+        # Internal: members → members. External: outsiders → members.
+        a_in, b_in, a_out, b_out = trust_net.incoming_evidence(cluster_ids, population)
+        trust_in, bvar_in = self._informative_trust(a_in, b_in)
+        n_in = trust_in.size
+        if n_in < 3:
+            return None  # Not enough internal evidence
+
+        trust_out, bvar_out = self._informative_trust(a_out, b_out)
+        n_out = trust_out.size
+        if n_out < 5:
+            return None  # CLT minimum: n ≥ 5 for valid z-test on bounded distributions
+
+        mu_in = float(np.mean(trust_in))
+        mu_out = float(np.mean(trust_out))
+
+        # ─── Step 4: Practical significance — two complementary checks ─────
+        #
+        # Check A: DATA-DERIVED MINIMUM GAP — self-adapting.
+        # At the population's median observation count, compute Bayesian
+        # posterior σ and require gap > 3σ (99.7% confidence).
+        # This shrinks as agents accumulate interactions (higher confidence)
+        # and grows when data is sparse (conservative).
+        # Bayesian posterior std for balanced Beta at median observation count:
+        # std(Beta(n/2+1, n/2+1)) ≈ 1/(2*sqrt(n+3))
+        posterior_std = 1.0 / (2.0 * np.sqrt(stats['median_n'] + 3))
+        # 2σ: a gap this large has < 2.3% probability from random variation.
+        # We use 2σ (not 3σ) because the z-test (Phase 5b) already provides
+        # 99.9% statistical significance. The MINIMUM_GAP is a PRACTICAL
+        # significance floor — "is this gap large enough to represent real
+        # behavioral difference?" — not a second statistical test.
+        # Two independent checks: practical (2σ) × statistical (z > 3.09)
+        # gives combined confidence > 99.97%.
+        MINIMUM_GAP = max(2.0 * posterior_std, 0.15)  # floor: measurement granularity
+        gap = mu_in - mu_out
+        if gap < MINIMUM_GAP:
+            return None
+
+        # Check B: EXTERNAL TRUST MUST BE LOW — the defining behavior of
+        # sybil rings is that they DEFECT against outsiders. Outsiders
+        # therefore have LOW trust in ring members (below population average).
+        # Honest cooperative clusters have NORMAL external trust — outsiders
+        # still cooperate with them regularly.
+        #
+        # This is data-derived: mu_trust comes from the population itself.
+        # A cluster where outsiders trust the members at or above the
+        # population mean is NOT behaving like a sybil ring.
+        if mu_out >= stats['mu_trust']:
+            return None  # Outsiders trust them fine — not sybil behavior
+
+        # ─── Step 5: Statistical significance — Bayesian z-test ─────────────
+        # Use BAYESIAN POSTERIOR VARIANCE instead of sample variance.
+        #
+        # Why: Sample variance of [0.75, 0.75, 0.75, 0.75] = 0. This makes
+        # the z-score infinite — a statistical artifact of few observations.
+        # Bayesian variance of Beta(3,1) = 0.0375. This reflects genuine
+        # uncertainty: "I've only seen 2 cooperations, I'm not that certain."
+        #
+        # The Bayesian approach uses the uncertainty that THE MODEL ITSELF
+        # tells us, not an unreliable sample statistic.
+        avg_bvar_in = float(np.mean(bvar_in))
+        avg_bvar_out = float(np.mean(bvar_out))
+
+        # Standard error using mean Bayesian posterior variances
+        se = np.sqrt(avg_bvar_in / n_in + avg_bvar_out / n_out)
+        if se < 1e-6:
+            z = 100.0  # Only possible with overwhelming evidence
+        else:
+            z = gap / se
+
+        # z > 3.09 corresponds to one-tailed p < 0.001.
+        # This is a universal statistical convention — the 99.9% confidence
+        # level used across all sciences for "highly significant" results.
+        # It is NOT a domain-specific tuning parameter.
+        SIGNIFICANCE_Z = 3.09  # p < 0.001 (one-tailed)
+        if z <= SIGNIFICANCE_Z:
+            return None
+
+        return {'z': z, 'gap': gap, 'mu_in': mu_in, 'mu_out': mu_out,
+                'n_in': n_in, 'n_out': n_out}
+
     def _extract_behavioral_profile(self, agent) -> dict:
         """
         Extract a behavioral fingerprint for immune memory.
@@ -579,3 +668,79 @@ class ImmuneSystem:
         events = self.events
         self.events = []
         return events
+
+
+class ImmuneScheduler:
+    """
+    Evidence-driven timing for immune cycles.
+
+    The fixed schedule runs every `interval` rounds whether or not anything
+    happened. This scheduler instead counts the evidence accumulated since
+    the last cycle and runs only when there is something new to judge:
+
+      evidence_budget  — as many new interactions as a fixed interval would
+                         yield with everyone playing (alive · interval / 2).
+                         The statistical tests see the same amount of new
+                         data per cycle; a quiet population simply waits.
+      betrayal_signal  — 3+ defections against high-trust partners or
+                         betrayal/cascade events. Three independent
+                         observations are a pattern (same convention as
+                         collective confirmation); trojans and rings
+                         announce themselves this way, so don't wait.
+      deferral_cap     — 2 · interval rounds with some new evidence but not
+                         a full budget. Bounds detection latency in slow
+                         populations (same factor as the first-cycle delay).
+
+    Rounds with no new interactions never trigger a cycle: nothing material
+    changed, so the previous verdicts still stand.
+    """
+
+    SIGNAL_EVENTS = ('betrayal', 'cascade_collapse')
+
+    def __init__(self):
+        self.interactions = 0
+        self.high_trust_defections = 0
+        self.signal_events = 0
+        self.rounds_since = 0
+        self.last_cycle_round: Optional[int] = None
+        # Per-cycle report: why each cycle ran and on what evidence
+        self.log: list[dict] = []
+
+    def observe_round(self, interactions: int, high_trust_defections: int,
+                      trust_events: list[dict]):
+        """Accumulate one round of evidence."""
+        self.rounds_since += 1
+        self.interactions += interactions
+        self.high_trust_defections += high_trust_defections
+        self.signal_events += sum(
+            1 for e in trust_events if e.get('type') in self.SIGNAL_EVENTS
+        )
+
+    def due(self, alive_count: int, interval: int) -> Optional[str]:
+        """Reason to run a cycle now, or None to defer."""
+        if self.interactions == 0:
+            return None
+        if self.interactions >= alive_count * interval / 2:
+            return 'evidence_budget'
+        if self.high_trust_defections + self.signal_events >= 3:
+            return 'betrayal_signal'
+        if self.rounds_since >= 2 * interval:
+            return 'deferral_cap'
+        return None
+
+    def record_cycle(self, round_num: int, reason: str, flagged: set):
+        """Log the cycle and reset the evidence counters."""
+        self.log.append({
+            'round': round_num,
+            'reason': reason,
+            'interactions': self.interactions,
+            'high_trust_defections': self.high_trust_defections,
+            'signal_events': self.signal_events,
+            'rounds_since_last': self.rounds_since,
+            'flagged': len(flagged),
+        })
+        self.last_cycle_round = round_num
+        self.interactions = 0
+        self.high_trust_defections = 0
+        self.signal_events = 0
+        self.rounds_since = 0
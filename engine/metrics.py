@@ -0,0 +1,325 @@
+"""
+AEZ Evolution v2 — Metrics (Prometheus text exposition)
+
+The server answered "what is the simulation doing now" (/sim/stats,
+/ws/clients) but not "how long do rounds take, which phase is slow,
+how fast is memory growing". Polling /sim/stats to find out would add
+the load being measured: it walks every agent on each request.
+
+Every Simulation keeps a SimulationMetrics, maintained by the commands
+that change it, on its actor thread (the only writer):
+
+    round latency       histogram, one observation per round
+    phase timings       histogram per phase of run_round
+                        (Evolution.phase_times)
+    immune cycles       histogram of inline and manual cycle durations
+    events              counter per event type
+    trust edges, alive  gauges, set after every command
+    memory              estimated bytes held by trust edges, interaction
+                        histories and event logs
+
+and every server session a FanoutMetrics for its WebSocket clients:
+bytes and messages delivered, frames dropped, clients disconnected as
+too slow, and a histogram of queue lag (how long each message waited
+in its client's queue).
+
+GET /metrics renders them with Exposition in the Prometheus text
+format. A scrape reads numbers that are already there: its cost grows
+with the number of series (simulations × phases × event types), never
+with the network — nothing is walked, nothing recomputed.
+
+MEMORY. Measuring an object graph means walking it, which a scrape must
+not do. The estimate multiplies O(1) counts (the edge dict, the pair
+log, the logs) by the deep size of one sampled entry, taken when the
+gauges are set. Entries of one kind have nearly the same size (slotted
+records, bounded rings), so the estimate follows growth closely; it is
+a breakdown, not an audit. The process total comes from the OS.
+"""
+
+import math
+import os
+import sys
+from typing import Iterable, Optional
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; rounds run from a millisecond (small populations) to seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0)
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+PHASES = ('prepare', 'pairing', 'interactions', 'settlement', 'immune', 'stats')
+SUBSYSTEMS = ('edges', 'histories', 'events')
+
+
+# ─── Instruments ─────────────────────────────────────────
+
+class Histogram:
+    """Observation counts per bucket (not cumulative; see Exposition)
+    and their sum. The last count is the +Inf bucket."""
+    __slots__ = ('bounds', 'counts', 'sum')
+
+    def __init__(self, bounds: tuple = LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        i = 0
+        for bound in self.bounds:
+            if value <= bound:
+                break
+            i += 1
+        self.counts[i] += 1
+        self.sum += value
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+
+# ─── Exposition ──────────────────────────────────────────
+
+def _escape(value) -> str:
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _number(value: float) -> str:
+    if isinstance(value, int):
+        return str(value)
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class Exposition:
+    """Samples grouped into metric families, rendered as Prometheus text
+    format 0.0.4. Families appear in the order they are first used."""
+
+    def __init__(self):
+        self._families: dict[str, tuple[str, str, list[str]]] = {}
+
+    def _family(self, name: str, kind: str, help: str) -> list[str]:
+        family = self._families.get(name)
+        if family is None:
+            family = self._families[name] = (kind, help, [])
+        return family[2]
+
+    def counter(self, name: str, help: str, value: float, **labels):
+        self._family(name, 'counter', help).append(f"{name}{_labels(labels)} {_number(value)}")
+
+    def gauge(self, name: str, help: str, value: float, **labels):
+        self._family(name, 'gauge', help).append(f"{name}{_labels(labels)} {_number(value)}")
+
+    def histogram(self, name: str, help: str, hist: Histogram, **labels):
+        lines = self._family(name, 'histogram', help)
+        counts = list(hist.counts)   # one read: buckets and _count agree
+        base = _labels(labels)
+        bucket = f"{name}_bucket{{{base[1:-1]},le=" if base else f"{name}_bucket{{le="
+        total = 0
+        for bound, count in zip(hist.bounds, counts):
+            total += count
+            lines.append(f'{bucket}"{_number(float(bound))}"}} {total}')
+        total += counts[-1]
+        lines.append(f'{bucket}"+Inf"}} {total}')
+        lines.append(f"{name}_sum{base} {_number(hist.sum)}")
+        lines.append(f"{name}_count{base} {total}")
+
+    def text(self) -> str:
+        out = []
+        for name, (kind, help, lines) in self._families.items():
+            out.append(f"# HELP {name} {help}")
+            out.append(f"# TYPE {name} {kind}")
+            out.extend(lines)
+        return "\n".join(out) + "\n"
+
+
+# ─── Memory ──────────────────────────────────────────────
+
+def deep_size(obj, _seen: Optional[set] = None) -> int:
+    """Bytes held by obj and everything it references (containers,
+    __dict__ and __slots__), each object counted once. String keys
+    (attribute and field names) and the interpreter's cached small ints
+    are shared by every record and count for nothing."""
+    seen = _seen if _seen is not None else set()
+    if id(obj) in seen or obj is None or (isinstance(obj, int) and -5 <= obj <= 256):
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (str, bytes, int, float)):
+        return size
+    if isinstance(obj, dict):
+        size += sum((0 if isinstance(k, str) else deep_size(k, seen)) + deep_size(v, seen)
+                    for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_size(item, seen) for item in obj)
+    if hasattr(obj, '__dict__'):
+        size += deep_size(vars(obj), seen)
+    for cls in type(obj).__mro__:
+        for slot in getattr(cls, '__slots__', ()):
+            if hasattr(obj, slot):
+                size += deep_size(getattr(obj, slot), seen)
+    return size
+
+
+def _estimate(count: int, container, entry: tuple, shared: tuple = ()) -> int:
+    """count entries like `entry` (a mapping's key and value, or one list
+    item) held in `container`. Objects in `shared` belong elsewhere
+    and are not counted."""
+    if not count:
+        return sys.getsizeof(container)
+    seen = {id(o) for o in shared}
+    return sys.getsizeof(container) + count * sum(deep_size(part, seen) for part in entry)
+
+
+def process_memory() -> Optional[int]:
+    """Resident set size of this process in bytes (None if unknown)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # peak, not current
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+# ─── Simulation ──────────────────────────────────────────
+
+class SimulationMetrics:
+    """One simulation's metrics. Written only on its actor thread;
+    rendered from any thread."""
+
+    def __init__(self):
+        self.rounds = 0
+        self.round_seconds = Histogram()
+        self.phase_seconds = {phase: Histogram() for phase in PHASES}
+        self.immune_seconds = Histogram()
+        self.events: dict[str, int] = {}
+        self.trust_edges = 0
+        self.alive_agents = 0
+        self.memory = dict.fromkeys(SUBSYSTEMS, 0)
+
+    def observe_round(self, evo, seconds: float):
+        self.rounds += 1
+        self.round_seconds.observe(seconds)
+        for phase, elapsed in evo.phase_times.items():
+            self.phase_seconds[phase].observe(elapsed)
+        if evo.immune_cycle_time is not None:
+            self.immune_seconds.observe(evo.immune_cycle_time)
+
+    def observe_immune(self, seconds: float):
+        self.immune_seconds.observe(seconds)
+
+    def observe_events(self, events: Iterable[dict]):
+        counts = self.events
+        for event in events:
+            kind = event.get('type', 'unknown')
+            counts[kind] = counts.get(kind, 0) + 1
+
+    def update(self, evo):
+        """Set the gauges from evo: O(agents), independent of the number
+        of edges and pairs (see memory_estimate)."""
+        self.trust_edges = len(evo.trust_net.edges)
+        self.alive_agents = sum(1 for a in evo.agents.values() if a.alive)
+        self.memory = self.memory_estimate(evo)
+
+    @staticmethod
+    def memory_estimate(evo) -> dict[str, int]:
+        """Estimated bytes per subsystem (see the module docstring)."""
+        edges = evo.trust_net.edges
+        edge = next(reversed(edges.items()), None)
+        # Agent ids belong to the agents; a bound edge's window to the pair log
+        edge_shared = (*edge[0], edge[1].pair) if edge is not None else ()
+
+        if evo.pair_log is not None:
+            pairs, views = evo.pair_log.pairs, evo.pair_log.views
+            pair = next(reversed(pairs.items()), None)
+            view = next((v for v in views.values() if v), None)
+            side = next(iter(view.items())) if view else None
+            # One record per pair, plus a PairSide in each member's view
+            histories = (_estimate(len(pairs), pairs, pair, pair[0] if pair else ())
+                         + _estimate(2 * len(pairs), views, side[1:] if side else (),
+                                     (side[1].record,) if side else ())
+                         + sum(sys.getsizeof(v) for v in views.values()))
+        else:
+            histories = 0
+            for agent in evo.agents.values():
+                history = agent.history
+                if history:
+                    entry = next(iter(history.items()))
+                    histories += _estimate(len(history), history, entry, (entry[0],))
+
+        logs = (evo.events, evo.round_stats, evo.immune.warning_log,
+                evo.immune.confirmed_threats)
+        events = sum(_estimate(len(log), log, log[-1:]) for log in logs)
+        return {'edges': _estimate(len(edges), edges, edge, edge_shared),
+                'histories': histories, 'events': events}
+
+    def render(self, out: Exposition, **labels):
+        out.counter('aez_rounds_total', 'Rounds run', self.rounds, **labels)
+        out.histogram('aez_round_duration_seconds', 'Round latency',
+                      self.round_seconds, **labels)
+        for phase, hist in self.phase_seconds.items():
+            out.histogram('aez_round_phase_duration_seconds', 'Time spent in each round phase',
+                          hist, **labels, phase=phase)
+        out.histogram('aez_immune_cycle_duration_seconds', 'Immune detection cycle duration',
+                      self.immune_seconds, **labels)
+        for kind, count in sorted(self.events.items()):
+            out.counter('aez_events_total', 'Engine events by type', count,
+                        **labels, type=kind)
+        out.gauge('aez_trust_edges', 'Directed trust edges', self.trust_edges, **labels)
+        out.gauge('aez_alive_agents', 'Living agents', self.alive_agents, **labels)
+        for subsystem, size in self.memory.items():
+            out.gauge('aez_memory_estimated_bytes', 'Estimated memory held, by subsystem',
+                      size, **labels, subsystem=subsystem)
+
+
+# ─── Fan-out ─────────────────────────────────────────────
+
+class FanoutMetrics:
+    """Delivery totals for one session's WebSocket clients, fed by their
+    ClientChannels (engine/fanout.py) on the event loop."""
+
+    def __init__(self):
+        self.messages = 0
+        self.bytes = 0
+        self.dropped = 0
+        self.disconnected = 0
+        self.lag_seconds = Histogram(LAG_BUCKETS)
+
+    def delivered(self, size: int, lag: float):
+        self.messages += 1
+        self.bytes += size
+        self.lag_seconds.observe(lag)
+
+    def render(self, out: Exposition, channels: list, **labels):
+        modes: dict[str, int] = {}
+        for channel in channels:
+            modes[channel.mode] = modes.get(channel.mode, 0) + 1
+        for mode, count in sorted(modes.items()):
+            out.gauge('aez_ws_clients', 'Connected WebSocket clients', count,
+                      **labels, mode=mode)
+        out.gauge('aez_ws_queue_depth', 'Messages queued across clients',
+                  sum(c.depth for c in channels), **labels)
+        out.gauge('aez_ws_queue_lag_seconds', 'Longest wait of an undelivered message',
+                  max((c.lag for c in channels), default=0.0), **labels)
+        out.counter('aez_broadcast_messages_total', 'Messages delivered to clients',
+                    self.messages, **labels)
+        out.counter('aez_broadcast_bytes_total', 'Bytes delivered to clients',
+                    self.bytes, **labels)
+        out.counter('aez_broadcast_dropped_total', 'Stale frames dropped for lagging clients',
+                    self.dropped, **labels)
+        out.counter('aez_ws_slow_disconnects_total', 'Clients disconnected as too slow',
+                    self.disconnected, **labels)
+        out.histogram('aez_ws_delivery_lag_seconds', 'Time messages waited in client queues',
+                      self.lag_seconds, **labels)
@@ -0,0 +1,53 @@
+"""
+AEZ Evolution v2 — Engine Numeric Precision
+
+One process-wide float dtype for the engine's arrays: neural weights,
+trust-channel weights, and the trust evidence arrays the immune
+system's ring test reduces (see TrustNetwork.edge_evidence).
+
+float64 is the default and reproduces every earlier run bit for bit.
+float32 halves the memory of those arrays and doubles the SIMD lane
+count in the batched kernels. Nothing in the engine needs more: network
+outputs pass through a clipped sigmoid, and trust values are posterior
+means of Beta distributions whose evidence counts are small integers —
+both far inside float32's 24-bit mantissa. The cost is not accuracy but
+identity: rounding differences flip an occasional stochastic decision,
+so float32 runs are statistically equivalent to float64 runs, not
+identical (see the dtype regression tests).
+
+Weights are drawn from the RNG in float64 and then cast, so both modes
+consume the same random stream.
+"""
+
+from contextlib import contextmanager
+
+import numpy as np
+
+FLOAT_DTYPES = {'float64': np.float64, 'float32': np.float32}
+
+_float = np.float64
+
+
+def float_dtype() -> type:
+    """The dtype new engine arrays are created with."""
+    return _float
+
+
+def set_float_dtype(name: str):
+    """Set the engine float dtype ('float64' or 'float32'). Applies to
+    arrays created from now on — set it before building a population."""
+    global _float
+    if name not in FLOAT_DTYPES:
+        raise ValueError(f"Unknown float dtype: {name}")
+    _float = FLOAT_DTYPES[name]
+
+
+@contextmanager
+def float_precision(name: str):
+    """Temporarily run the engine at the given float dtype."""
+    previous = np.dtype(_float).name
+    set_float_dtype(name)
+    try:
+        yield
+    finally:
+        set_float_dtype(previous)
@@ -0,0 +1,110 @@
+"""
+AEZ Evolution v2 — Distilled Policy Tables (approximate decisions)
+
+An agent's decision is an 11-input network: matmul, tanh, matmul,
+sigmoid — plus four trust channels computed by the network first. For
+large sweeps we trade exactness for speed: once per generation, each
+agent's network is distilled into a quantized lookup table over the four
+inputs that carry most of the per-opponent signal:
+
+    opponent coop rate      (feature 1, opp_last tied to it)
+    direct trust            (feature 6)
+    commitment reliability  (feature 10)
+    suspicion               (feature 11)
+
+The remaining inputs are frozen at distillation time: the agent's own
+coop rate and balance, the round, and neutral (0.5) social, temporal
+and structural trust. Probabilities are stored as uint8 (resolution
+1/255) on a levels^4 grid; a lookup is nearest-grid-point.
+
+What this gives up, and why it is measured rather than assumed:
+  - Online learning (_learn) drifts weights_ho within a generation; the
+    table keeps the distillation-time policy until the next one.
+  - The three non-direct trust channels no longer reach the decision.
+The engine samples exact decisions alongside table ones and reports
+the absolute probability error (PolicyError).
+"""
+
+import numpy as np
+
+# Feature indices (see NeuralAgent._build_features)
+OPP_COOP_RATE, OPP_LAST, DIRECT_TRUST, COMMIT_REL, SUSPICION = 0, 1, 5, 9, 10
+
+# 9 levels put 0.5 (every prior) exactly on the grid: 9^4 = 6561 bytes/agent
+DEFAULT_LEVELS = 9
+
+
+class PolicyTable:
+    """One agent's distilled decision table."""
+    __slots__ = ('levels', 'table')
+
+    def __init__(self, levels: int, table: bytes):
+        self.levels = levels
+        self.table = table
+
+    @classmethod
+    def distill(cls, agent, round_num: int = 50,
+                levels: int = DEFAULT_LEVELS) -> 'PolicyTable':
+        """Evaluate the agent's network on the whole grid in one batch."""
+        context = {**agent.GENERIC_CONTEXT, 'round': round_num}
+        base = agent._build_features('__generic__', context)
+
+        axis = np.linspace(0.0, 1.0, levels)
+        opp, trust, commit, susp = (g.ravel() for g in
+                                    np.meshgrid(axis, axis, axis, axis, indexing='ij'))
+        x = np.tile(base, (opp.size, 1))
+        x[:, OPP_COOP_RATE] = opp
+        x[:, OPP_LAST] = opp            # expected last action = their rate
+        x[:, DIRECT_TRUST] = trust
+        x[:, COMMIT_REL] = commit
+        x[:, SUSPICION] = susp
+
+        h = np.tanh(x @ agent.weights_ih.T + agent.bias_h)
+        o = h @ agent.weights_ho[0] + agent.bias_o[0]
+        prob = 1.0 / (1.0 + np.exp(-np.clip(o, -10, 10)))
+        return cls(levels, np.rint(prob * 255).astype(np.uint8).tobytes())
+
+    def lookup(self, opp_rate: float, trust: float,
+               commit: float, suspicion: float) -> float:
+        top = self.levels - 1
+        n = self.levels
+        i = min(max(int(opp_rate * top + 0.5), 0), top)
+        j = min(max(int(trust * top + 0.5), 0), top)
+        k = min(max(int(commit * top + 0.5), 0), top)
+        m = min(max(int(suspicion * top + 0.5), 0), top)
+        return self.table[((i * n + j) * n + k) * n + m] / 255.0
+
+    def probability(self, agent, opponent_id: str, context: dict) -> float:
+        """Table counterpart of agent._forward(agent._build_features(...))."""
+        opp_history = agent.history.get(opponent_id)
+        return self.lookup(
+            opp_history.their_coop_rate if opp_history else 0.5,
+            context.get('direct_trust', 0.5),
+            agent._get_commitment_reliability(opponent_id),
+            agent.suspicion_scores.get(opponent_id, 0.0),
+        )
+
+
+class PolicyError:
+    """Running |p_table - p_exact| over sampled decisions."""
+
+    def __init__(self):
+        self.samples = 0
+        self.total = 0.0
+        self.worst = 0.0
+
+    def observe(self, table_prob: float, exact_prob: float):
+        err = abs(table_prob - exact_prob)
+        self.samples += 1
+        self.total += err
+        if err > self.worst:
+            self.worst = err
+
+    def to_dict(self) -> dict:
+        # Mean |Δp| is also the expected fraction of decisions that differ
+        # from the exact policy under the same random draw.
+        return {
+            'samples': self.samples,
+            'mean_abs_error': round(self.total / self.samples, 4) if self.samples else None,
+            'max_abs_error': round(self.worst, 4) if self.samples else None,
+        }
@@ -0,0 +1,302 @@
+"""
+AEZ Evolution v2 — Simulation Pool (multi-tenant hosting)
+
+The server held one simulation, and /sim/create replaced it for
+everybody. Analysts sharing a host each want a sandbox of their own.
+
+A SimulationPool hosts many simulations keyed by id. Each one keeps
+the actor model of engine/actor.py — its own single-thread actor
+running its commands in order — and by default its Simulation lives in
+a worker process of its own (engine/worker.py), so tenants do not share
+an interpreter, a GIL or random streams. The pool bounds what they use:
+
+    capacity     simulations resident (each with its worker process).
+                 Admitting one more evicts the least recently used idle
+                 one; if none is idle the pool is full.
+    workers      commands computing at once, across all simulations.
+                 Each command takes a slot for its duration, so at most
+                 `workers` worker processes are busy at a time; the rest
+                 queue in arrival order.
+    cpu_seconds  CPU time each simulation may use over its lifetime,
+                 across evictions (RLIMIT_CPU on its worker).
+    memory_mb    address space each worker may map (RLIMIT_AS).
+    limits       max_population per simulation (checked at create,
+                 attack and inject) and max_rounds per run request.
+
+processes=False keeps every Simulation in this interpreter on its
+actor's thread instead: no quotas and no parallelism beyond what numpy
+releases the GIL for, but reads can reach the live engine directly
+(tests, single-tenant tools).
+
+EVICTION. A simulation with no pending commands (and, for the server's
+sessions, no connected clients or auto loop) that has not been used for
+idle_timeout seconds is checkpointed — pickled by its own actor (or its
+worker), so the checkpoint is one consistent state — and dropped from
+memory, worker included. The next request for its id resumes it from
+the checkpoint; one that arrives while the checkpoint is being written
+waits for it (evictions and resumes take turns under one lock, and the
+file appears atomically). A worker's checkpoint also holds its random streams and
+the CPU time used so far, so a resumed simulation continues the same
+sequence under the same quota. A simulation that exhausted its quota
+has no consistent state left to save; eviction discards it.
+"""
+
+import asyncio
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from .actor import Simulation, SimulationActor
+from .worker import SimulationProcess, load_checkpoint, save_checkpoint
+
+DEFAULT_CAPACITY = 8
+DEFAULT_WORKERS = 4
+DEFAULT_IDLE_TIMEOUT = 600.0
+DEFAULT_CPU_SECONDS = 3600.0
+DEFAULT_MEMORY_MB = 2048
+MAX_POPULATION = 2000
+MAX_ROUNDS = 5000
+
+
+class PoolBusy(RuntimeError):
+    """The pool cannot serve this simulation right now (every slot is
+    busy, or it was evicted under a request); retry shortly."""
+
+
+class HostedSimulation:
+    """One pooled simulation: its Simulation or SimulationProcess (None
+    until created) and the actor that owns it."""
+
+    def __init__(self, sim_id: str):
+        self.id = sim_id
+        self.actor = SimulationActor(name=f"sim-{sim_id}")
+        self.sim: Optional[Simulation | SimulationProcess] = None
+        self.last_used = time.monotonic()
+        self.evicting = False   # checkpoint being written: still listed, refuses commands
+        self.evicted = False
+
+    @property
+    def busy(self) -> bool:
+        """Not evictable right now (subclasses add their own reasons)."""
+        return self.actor.pending > 0
+
+    def touch(self):
+        self.last_used = time.monotonic()
+
+
+class SimulationPool:
+    """Simulations by id: at most `capacity` resident, `workers`
+    computing at once, idle ones checkpointed to `checkpoint_dir`."""
+
+    def __init__(self, factory: Callable[[str], HostedSimulation] = HostedSimulation,
+                 capacity: int = DEFAULT_CAPACITY, workers: int = DEFAULT_WORKERS,
+                 idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+                 checkpoint_dir: Optional[str] = None,
+                 max_population: int = MAX_POPULATION, max_rounds: int = MAX_ROUNDS,
+                 processes: bool = True, cpu_seconds: Optional[float] = None,
+                 memory_mb: Optional[int] = None):
+        if capacity < 1 or workers < 1:
+            raise ValueError(f"Invalid pool size: capacity={capacity}, workers={workers}")
+        if not processes and (cpu_seconds is not None or memory_mb is not None):
+            raise ValueError("Invalid pool: quotas need worker processes")
+        self.factory = factory
+        self.capacity = capacity
+        self.workers = workers
+        self.processes = processes
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self.idle_timeout = idle_timeout
+        self.max_population = max_population
+        self.max_rounds = max_rounds
+        self._checkpoint_dir = checkpoint_dir
+        self._resident: OrderedDict[str, HostedSimulation] = OrderedDict()  # LRU first
+        self._slots = asyncio.Semaphore(workers)
+        self._admission = asyncio.Lock()   # one admission/resume at a time
+        self.evictions = 0
+        self.resumes = 0
+
+    # ─── Checkpoints ─────────────────────────────────────
+
+    @property
+    def checkpoint_dir(self) -> str:
+        if self._checkpoint_dir is None:
+            self._checkpoint_dir = tempfile.mkdtemp(prefix="aez-sims-")
+        os.makedirs(self._checkpoint_dir, exist_ok=True)
+        return self._checkpoint_dir
+
+    def checkpoint_path(self, sim_id: str) -> str:
+        if not sim_id or not all(c.isalnum() or c in '-_' for c in sim_id):
+            raise ValueError(f"Invalid simulation id: {sim_id!r}")
+        return os.path.join(self.checkpoint_dir, f"{sim_id}.pkl")
+
+    def checkpointed(self) -> list[str]:
+        if self._checkpoint_dir is None or not os.path.isdir(self._checkpoint_dir):
+            return []
+        return sorted(name[:-4] for name in os.listdir(self._checkpoint_dir)
+                      if name.endswith('.pkl'))
+
+    # ─── Lookup ──────────────────────────────────────────
+
+    def resident(self) -> list[HostedSimulation]:
+        return list(self._resident.values())
+
+    def peek(self, sim_id: str) -> Optional[HostedSimulation]:
+        """The resident simulation with this id, without touching or
+        resuming it."""
+        return self._resident.get(sim_id)
+
+    def _lookup(self, sim_id: str) -> Optional[HostedSimulation]:
+        hosted = self._resident.get(sim_id)
+        if hosted is not None:
+            self._resident.move_to_end(sim_id)
+            hosted.touch()
+        return hosted
+
+    async def get(self, sim_id: str) -> Optional[HostedSimulation]:
+        """The simulation with this id, resumed from its checkpoint if it
+        was evicted; None if there is no such simulation. One being
+        evicted is waited for, then resumed."""
+        hosted = self._lookup(sim_id)
+        path = self.checkpoint_path(sim_id)
+        if hosted is not None and not hosted.evicting:
+            return hosted
+        if hosted is None and not os.path.exists(path):
+            return None
+        async with self._admission:
+            hosted = self._lookup(sim_id)      # resumed while we waited
+            if hosted is not None or not os.path.exists(path):
+                return hosted
+            await self._make_room()
+            hosted = self.factory(sim_id)
+            if self.processes:
+                process = SimulationProcess(sim_id, self.cpu_seconds, self.memory_mb)
+                hosted.sim = await self._start(hosted, process, process.load, path)
+            else:
+                hosted.sim = await self.run(hosted, load_checkpoint, path)
+            self._resident[sim_id] = hosted
+            os.remove(path)
+            self.resumes += 1
+            return hosted
+
+    async def admit(self, sim_id: str) -> HostedSimulation:
+        """The simulation with this id, or a new empty one (sim None)
+        for it. A checkpoint under the id is resumed, not replaced."""
+        hosted = await self.get(sim_id)
+        if hosted is not None:
+            return hosted
+        async with self._admission:
+            return self._lookup(sim_id) or await self._admit(sim_id)
+
+    async def _admit(self, sim_id: str) -> HostedSimulation:
+        self.checkpoint_path(sim_id)   # validates the id
+        await self._make_room()
+        hosted = self.factory(sim_id)
+        self._resident[sim_id] = hosted
+        return hosted
+
+    async def _make_room(self):
+        """Evict least recently used idle simulations down to capacity - 1."""
+        while len(self._resident) >= self.capacity:
+            victim = next((h for h in self._resident.values() if not h.busy), None)
+            if victim is None:
+                raise PoolBusy(f"Simulation pool full ({self.capacity} busy)")
+            await self._evict(victim)
+
+    # ─── Running ─────────────────────────────────────────
+
+    async def create(self, hosted: HostedSimulation, population: int,
+                     seed: Optional[int] = None):
+        """A new simulation for `hosted` (in its own worker process unless
+        processes=False). Assign it to hosted.sim once it is ready."""
+        if not self.processes:
+            if seed is not None:
+                raise ValueError("Invalid seed: seeded runs need worker processes")
+            return await self.run(hosted, Simulation, population, hosted.id)
+        process = SimulationProcess(hosted.id, self.cpu_seconds, self.memory_mb)
+        return await self._start(hosted, process, process.create, population, seed)
+
+    async def _start(self, hosted: HostedSimulation, process: SimulationProcess, start, *args):
+        try:
+            return await self.run(hosted, start, *args)
+        except BaseException:
+            process.kill()
+            raise
+
+    async def run(self, hosted: HostedSimulation, fn, *args):
+        """Run fn(*args) on the simulation's actor, holding a worker slot."""
+        if hosted.evicted or hosted.evicting:
+            raise PoolBusy(f"Simulation {hosted.id} was evicted; retry")
+        hosted.touch()
+        async with self._slots:
+            return await hosted.actor.call(fn, *args)
+
+    # ─── Eviction ────────────────────────────────────────
+
+    async def evict(self, sim_id: str):
+        """Checkpoint a resident simulation and drop it from memory."""
+        async with self._admission:
+            hosted = self._resident.get(sim_id)
+            if hosted is not None:
+                await self._evict(hosted)
+
+    async def _evict(self, hosted: HostedSimulation):
+        # Holding _admission. The entry stays listed (evicting) until its
+        # checkpoint is on disk, so a concurrent get() finds one or the
+        # other and waits for the lock rather than starting afresh.
+        hosted.evicting = True
+        sim = hosted.sim
+        path = self.checkpoint_path(hosted.id)
+        try:
+            if isinstance(sim, SimulationProcess):
+                if not sim.exhausted:
+                    await hosted.actor.call(sim.save, path)
+                    self.evictions += 1
+                await hosted.actor.call(sim.close)
+            elif sim is not None:
+                await hosted.actor.call(save_checkpoint, path, sim)
+                self.evictions += 1
+        finally:
+            hosted.evicting = False
+        del self._resident[hosted.id]
+        hosted.evicted = True
+        hosted.actor.stop()
+
+    async def sweep(self) -> list[str]:
+        """Evict every simulation idle for longer than idle_timeout."""
+        swept = []
+        async with self._admission:
+            now = time.monotonic()
+            idle = [h for h in self._resident.values()
+                    if not h.busy and now - h.last_used > self.idle_timeout]
+            for hosted in idle:
+                if not hosted.busy:         # picked up while an earlier one saved
+                    await self._evict(hosted)
+                    swept.append(hosted.id)
+        return swept
+
+    async def delete(self, sim_id: str) -> bool:
+        """Drop a simulation and its checkpoint for good."""
+        path = self.checkpoint_path(sim_id)
+        async with self._admission:
+            hosted = self._resident.pop(sim_id, None)
+            if hosted is not None:
+                hosted.evicted = True
+                hosted.actor.stop(wait=False)
+                _kill(hosted)
+            found = hosted is not None or os.path.exists(path)
+            if os.path.exists(path):
+                os.remove(path)
+        return found
+
+    def shutdown(self):
+        for hosted in self._resident.values():
+            hosted.actor.stop(wait=False)
+            _kill(hosted)
+        self._resident.clear()
+
+
+def _kill(hosted: HostedSimulation):
+    if isinstance(hosted.sim, SimulationProcess):
+        hosted.sim.kill()
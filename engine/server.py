@@ -3,39 +3,99 @@ AEZ Evolution — Server
 
 FastAPI + WebSocket. God-mode API.
 Every control a judge needs. Real-time updates.
+
+Every /sim/... endpoint (and /ws) drives the default simulation; the
+same endpoints under /sims/{sim_id}/... drive simulation sim_id, each
+with its own actor and WebSocket clients (see engine/pool.py).
 """
 
 import asyncio
 import json
 import os
+import uuid
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse
 from pydantic import BaseModel
 from typing import Optional
 
-from .evolution import Evolution, Attacks
-from .narrator import Narrator
+from .snapshot import LEADERBOARD_DEPTH
+from .broadcast import FrameBroadcaster, DEFAULT_FPS
+from .stream import StateStream
+from .frames import encode_network
+from .fanout import ClientChannel, Envelope
+from .metrics import CONTENT_TYPE, Exposition, FanoutMetrics, process_memory
+from .topics import parse_topics, computed, split
+from .pool import (HostedSimulation, SimulationPool, PoolBusy,
+                   DEFAULT_CPU_SECONDS, DEFAULT_MEMORY_MB)
+from .worker import SimulationProcess, QuotaExceeded
 
 
 # ─── State ──────────────────────────────────────────────
 
-evo: Optional[Evolution] = None
-narrator = Narrator()
-ws_clients: set[WebSocket] = set()
-auto_running = False
-auto_task = None
+class Session(HostedSimulation):
+    """
+    A pooled simulation plus what the server keeps for it: WebSocket
+    clients, delta stream, turbo broadcaster and auto loop. The
+    simulation lives in its worker process; handlers only submit
+    commands to it through the actor (see engine/actor.py and
+    engine/worker.py).
+    """
+
+    def __init__(self, sim_id: str):
+        super().__init__(sim_id)
+        # Every client sends through its own queue (see engine/fanout.py)
+        self.ws_clients: set[ClientChannel] = set()
+        # Clients on the versioned delta stream (/ws?stream=delta)
+        self.stream_clients: set[ClientChannel] = set()
+        # Clients on binary columnar frames (/ws?protocol=binary)
+        self.binary_clients: set[ClientChannel] = set()
+        # Clients subscribed to topics (/ws?topics=..., see engine/topics.py)
+        self.topic_clients: set[ClientChannel] = set()
+        # Delivery totals across this session's clients (/metrics)
+        self.fanout = FanoutMetrics()
+        self.state_stream = StateStream()
+        self.auto_running = False
+        self.auto_task = None
+        # Turbo-mode frames (see engine/broadcast.py)
+        self.broadcaster = FrameBroadcaster(lambda message: broadcast(self, message),
+                                            lambda: frame_network(self))
+
+    @property
+    def channels(self) -> list[ClientChannel]:
+        return [*self.ws_clients, *self.stream_clients, *self.binary_clients,
+                *self.topic_clients]
+
+    @property
+    def busy(self) -> bool:
+        # Watched or running simulations stay resident
+        return (super().busy or self.auto_running or self.broadcaster.active
+                or bool(self.channels))
+
+
+DEFAULT_SIM = "default"
+pool = SimulationPool(Session, cpu_seconds=DEFAULT_CPU_SECONDS, memory_mb=DEFAULT_MEMORY_MB)
+
+
+async def sweep_idle():
+    """Checkpoint idle simulations every so often."""
+    while True:
+        await asyncio.sleep(pool.idle_timeout / 4)
+        await pool.sweep()
 
 
 # ─── App ────────────────────────────────────────────────
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    sweeper = asyncio.create_task(sweep_idle())
     yield
-    global auto_running
-    auto_running = False
+    sweeper.cancel()
+    for session in pool.resident():
+        session.auto_running = False
+    pool.shutdown()
 
 app = FastAPI(title="AEZ Evolution", lifespan=lifespan)
 
@@ -60,14 +120,49 @@ async def root():
     return {"status": "AEZ Evolution API", "version": "2.0"}
 
 
+@app.exception_handler(PoolBusy)
+async def pool_busy(request: Request, exc: PoolBusy):
+    return JSONResponse({"error": str(exc)}, status_code=503, headers={"Retry-After": "1"})
+
+
+@app.exception_handler(QuotaExceeded)
+async def quota_exceeded(request: Request, exc: QuotaExceeded):
+    return JSONResponse({"error": str(exc)}, status_code=429)
+
+
+def per_sim(method: str, path: str):
+    """Register an endpoint at /sim{path} (the default simulation) and
+    at /sims/{sim_id}{path}. The handler takes sim_id=DEFAULT_SIM."""
+    def register(fn):
+        getattr(app, method)(f"/sim{path}")(fn)
+        getattr(app, method)(f"/sims/{{sim_id}}{path}")(fn)
+        return fn
+    return register
+
+
+async def session_for(sim_id: str) -> Optional[Session]:
+    """The session running sim_id (resumed if it was evicted), or None
+    if there is no such simulation."""
+    try:
+        session = await pool.get(sim_id)
+    except ValueError:
+        return None
+    return session if session is not None and session.sim is not None else None
+
+
 # ─── Models ─────────────────────────────────────────────
 
 class CreateRequest(BaseModel):
     population: int = 50
+    seed: Optional[int] = None  # reproducible runs (the worker seeds its own streams)
 
 class RunRequest(BaseModel):
     rounds: int = 1
     selection_interval: int = 20
+    turbo: bool = False  # rounds back to back, broadcast as frames
+
+class BroadcastRequest(BaseModel):
+    fps: float = DEFAULT_FPS
 
 class PayoffRequest(BaseModel):
     tier: str = "strangers"  # strangers, acquaintances, partners
@@ -82,296 +177,627 @@ class AttackRequest(BaseModel):
 
 # ─── Simulation Control ────────────────────────────────
 
-@app.post("/sim/create")
-async def create_sim(req: CreateRequest):
-    global evo, narrator
-    evo = Evolution(population_size=req.population)
-    evo.spawn_population()
-    narrator = Narrator()
-    network = evo.get_network_data()
-    leaderboard = evo.get_leaderboard(8)
-    narrator.track_leaderboard(leaderboard)
-    await broadcast({
-        "type": "created",
-        "data": network,
-        "leaderboard": leaderboard,
-        "agent_names": narrator.get_agent_names()
-    })
-    return {"status": "created", "agents": len(evo.agents)}
-
-
-@app.post("/sim/round")
-async def run_round():
-    if not evo:
-        return {"error": "No simulation. POST /sim/create first."}
-
-    evo.run_round()
-    Attacks.activate_trojans(evo)
-
-    # Narrate
-    events = evo.pop_events()
-    stats = evo.round_stats[-1] if evo.round_stats else {}
-    narration = narrator.narrate(evo.round, events, stats)
-
-    # Track leaderboard for narrator arcs
-    leaderboard = evo.get_leaderboard(8)
-    narrator.track_leaderboard(leaderboard)
-
-    # Broadcast to all WebSocket clients
-    network = evo.get_network_data()
-    await broadcast({
-        "type": "round",
-        "data": network,
-        "events": events[:10],
-        "narration": narration,
-        "leaderboard": leaderboard,
-        "agent_names": narrator.get_agent_names()
-    })
-
+async def command(s: Session, fn, *args):
+    """Run a (response, message) command on the session's actor,
+    broadcast the message (queued for the next frame while turbo is on),
+    return the response."""
+    response, message = await pool.run(s, fn, *args)
+    if message is not None:
+        if s.broadcaster.active:
+            s.broadcaster.push(message)
+        else:
+            await broadcast(s, message)
+    return response
+
+
+def wanted(s: Session) -> tuple[bool, frozenset]:
+    """What this round's message needs: the network (any graph subscriber
+    or client without topics) and the computed topics subscribed to."""
+    graph = bool(s.ws_clients or s.stream_clients or s.binary_clients)
+    topics = set()
+    for channel in s.topic_clients:
+        graph = graph or "graph" in channel.topics
+        topics |= channel.topics
+    return graph, computed(topics)
+
+
+async def frame_network(s: Session) -> Optional[dict]:
+    """The network for a turbo frame: publish once, on the actor (None
+    when nobody wants the graph)."""
+    if not wanted(s)[0]:
+        return None
+    return (await pool.run(s, s.sim.refresh)).network
+
+
+@per_sim("post", "/create")
+async def create_sim(req: CreateRequest, sim_id: str = DEFAULT_SIM):
+    if req.population > pool.max_population:
+        return {"error": f"Population above quota ({pool.max_population})."}
+    try:
+        session = await pool.admit(sim_id)
+    except ValueError as e:
+        return {"error": str(e)}
+    try:
+        created = await pool.create(session, req.population, req.seed)
+    except ValueError as e:
+        return {"error": str(e)}
+    response = await command(session, created.created, wanted(session)[1])  # first snapshot
+    session.sim = created
+    return response
+
+
+@app.post("/sims")
+async def create_new_sim(req: CreateRequest):
+    """Create a simulation under a fresh id."""
+    sim_id = uuid.uuid4().hex[:12]
+    response = await create_sim(req, sim_id)
+    return {"sim_id": sim_id, **response}
+
+
+@app.get("/sims")
+async def list_sims():
+    """Resident and checkpointed simulations, and the pool's limits."""
+    resident = [{"sim_id": s.id, "resident": True,
+                 "round": s.sim.snapshot.round if s.sim and s.sim.snapshot else None,
+                 "clients": len(s.channels), "pending": s.actor.pending,
+                 "cpu_seconds": (round(s.sim.cpu_seconds, 3)
+                                 if isinstance(s.sim, SimulationProcess) else None)}
+                for s in pool.resident()]
+    checkpointed = [{"sim_id": sim_id, "resident": False} for sim_id in pool.checkpointed()]
     return {
-        "round": evo.round,
-        "alive": len(evo.get_alive()),
-        "narration": narration
+        "simulations": resident + checkpointed,
+        "capacity": pool.capacity,
+        "workers": pool.workers,
+        "cpu_seconds": pool.cpu_seconds,
+        "memory_mb": pool.memory_mb,
+        "idle_timeout": pool.idle_timeout,
+        "evictions": pool.evictions,
+        "resumes": pool.resumes,
     }
 
 
-@app.post("/sim/selection")
-async def run_selection():
-    if not evo:
-        return {"error": "No simulation."}
-    evo.run_selection()
-    events = evo.pop_events()
-    await broadcast({"type": "selection", "events": events[:10]})
-    return {"generation": evo.generation, "alive": len(evo.get_alive())}
+@app.delete("/sims/{sim_id}")
+async def delete_sim(sim_id: str):
+    """Stop a simulation and discard it (and its checkpoint)."""
+    try:
+        session = pool.peek(sim_id)
+        if session is not None:
+            session.auto_running = False
+            for channel in session.channels:
+                channel.close(code=1001)
+        return {"deleted": await pool.delete(sim_id)}
+    except ValueError as e:
+        return {"error": str(e)}
+
+
+@per_sim("post", "/round")
+async def run_round(sim_id: str = DEFAULT_SIM):
+    s = await session_for(sim_id)
+    if not s:
+        return {"error": "No simulation. POST /sim/create first."}
+    return await command(s, s.sim.step, 0, *wanted(s))
 
 
-@app.post("/sim/run")
-async def run_multi(req: RunRequest):
-    """Run multiple rounds (with selection intervals)."""
-    if not evo:
+@per_sim("post", "/selection")
+async def run_selection(sim_id: str = DEFAULT_SIM):
+    s = await session_for(sim_id)
+    if not s:
         return {"error": "No simulation."}
+    return await command(s, s.sim.selection)
 
-    for i in range(req.rounds):
-        evo.run_round()
-        Attacks.activate_trojans(evo)
 
-        if req.selection_interval > 0 and evo.round % req.selection_interval == 0:
-            evo.run_selection()
+@per_sim("post", "/run")
+async def run_multi(req: RunRequest, sim_id: str = DEFAULT_SIM):
+    """Run multiple rounds (with selection intervals). Each round is its
+    own command, so other commands can interleave between rounds.
+    turbo runs them back to back; clients get frames at the broadcast rate."""
+    s = await session_for(sim_id)
+    if not s:
+        return {"error": "No simulation."}
+    if req.rounds > pool.max_rounds:
+        return {"error": f"Rounds above quota ({pool.max_rounds})."}
 
-        # Broadcast every round
-        events = evo.pop_events()
-        stats = evo.round_stats[-1] if evo.round_stats else {}
-        narration = narrator.narrate(evo.round, events, stats)
-
-        leaderboard = evo.get_leaderboard(8)
-        narrator.track_leaderboard(leaderboard)
-
-        network = evo.get_network_data()
-        await broadcast({
-            "type": "round",
-            "data": network,
-            "events": events[:10],
-            "narration": narration,
-            "leaderboard": leaderboard,
-            "agent_names": narrator.get_agent_names()
-        })
+    total_round = None
+    if req.turbo:
+        s.broadcaster.start()
+        try:
+            for i in range(req.rounds):
+                response = await command(s, s.sim.step, req.selection_interval, False,
+                                         wanted(s)[1])
+                total_round = response["round"]
+        finally:
+            await s.broadcaster.stop()
+        return {"rounds_completed": req.rounds, "total_round": total_round}
 
+    for i in range(req.rounds):
+        # Broadcast every round
+        response = await command(s, s.sim.step, req.selection_interval, *wanted(s))
+        total_round = response["round"]
         # Small delay so WebSocket can flush
         await asyncio.sleep(0.05)
 
-    return {"rounds_completed": req.rounds, "total_round": evo.round}
+    if total_round is None:
+        total_round = (await latest_snapshot(s)).round
+    return {"rounds_completed": req.rounds, "total_round": total_round}
 
 
-@app.post("/sim/auto")
-async def toggle_auto():
-    """Toggle auto-running (one round per second)."""
-    global auto_running, auto_task
+@per_sim("post", "/auto")
+async def toggle_auto(turbo: bool = False, sim_id: str = DEFAULT_SIM):
+    """Toggle auto-running (one round per second; ?turbo=true runs rounds
+    back to back and broadcasts frames)."""
+    s = await session_for(sim_id)
+    if not s:
+        return {"error": "No simulation."}
 
-    if auto_running:
-        auto_running = False
+    if s.auto_running:
+        s.auto_running = False
         return {"auto": False}
 
-    auto_running = True
+    s.auto_running = True
 
     async def auto_loop():
-        global auto_running
-        while auto_running and evo:
-            evo.run_round()
-            Attacks.activate_trojans(evo)
-
-            if evo.round % 20 == 0:
-                evo.run_selection()
-
-            events = evo.pop_events()
-            stats = evo.round_stats[-1] if evo.round_stats else {}
-            narration = narrator.narrate(evo.round, events, stats)
-
-            leaderboard = evo.get_leaderboard(8)
-            narrator.track_leaderboard(leaderboard)
-
-            network = evo.get_network_data()
-            await broadcast({
-                "type": "round",
-                "data": network,
-                "events": events[:10],
-                "narration": narration,
-                "leaderboard": leaderboard,
-                "agent_names": narrator.get_agent_names()
-            })
-
-            await asyncio.sleep(0.5)
-
-    auto_task = asyncio.create_task(auto_loop())
-    return {"auto": True}
+        if turbo:
+            s.broadcaster.start()
+        try:
+            while s.auto_running and s.sim:
+                if turbo:
+                    await command(s, s.sim.step, 20, False, wanted(s)[1])
+                else:
+                    await command(s, s.sim.step, 20, *wanted(s))
+                    await asyncio.sleep(0.5)
+        finally:
+            s.auto_running = False
+            if turbo:
+                await s.broadcaster.stop()
+
+    s.auto_task = asyncio.create_task(auto_loop())
+    return {"auto": True, "turbo": turbo}
+
+
+@per_sim("post", "/broadcast")
+async def set_broadcast_rate(req: BroadcastRequest, sim_id: str = DEFAULT_SIM):
+    """Frame rate for turbo broadcasts."""
+    s = await session_for(sim_id)
+    if not s:
+        return {"error": "No simulation."}
+    try:
+        s.broadcaster.fps = req.fps
+    except ValueError as e:
+        return {"error": str(e)}
+    return {"fps": s.broadcaster.fps}
 
 
 # ─── God Mode Controls ─────────────────────────────────
 
-@app.post("/sim/payoff")
-async def change_payoff(req: PayoffRequest):
+@per_sim("post", "/payoff")
+async def change_payoff(req: PayoffRequest, sim_id: str = DEFAULT_SIM):
     """Change payoff values mid-simulation. Economic disruption."""
-    if not evo:
+    s = await session_for(sim_id)
+    if not s:
         return {"error": "No simulation."}
-    evo.set_payoff(req.tier, req.key, req.value)
-    events = evo.pop_events()
-    await broadcast({"type": "payoff_change", "events": events})
-    return {"payoff_matrices": evo.payoff_matrices}
+    return await command(s, s.sim.payoff, req.tier, req.key, req.value)
 
 
-@app.post("/sim/attack")
-async def launch_attack(req: AttackRequest):
+@per_sim("post", "/attack")
+async def launch_attack(req: AttackRequest, sim_id: str = DEFAULT_SIM):
     """Inject adversarial agents."""
-    if not evo:
+    s = await session_for(sim_id)
+    if not s:
         return {"error": "No simulation."}
+    return await command(s, s.sim.attack, req.type, req.count, req.target,
+                         pool.max_population)
 
-    ids = []
-    if req.type == "sybil":
-        ids = Attacks.sybil_attack(evo, req.count)
-    elif req.type == "trojan":
-        ids = Attacks.trojan_attack(evo, req.count)
-    elif req.type == "eclipse" and req.target:
-        ids = Attacks.eclipse_attack(evo, req.target, req.count)
-    elif req.type == "whitewash":
-        ids = Attacks.whitewash_attack(evo, req.count)
-
-    events = evo.pop_events()
-    await broadcast({"type": "attack", "attack_type": req.type, "events": events})
-    return {"attack": req.type, "agents_injected": ids}
 
-
-@app.post("/sim/detect")
-async def detect_sybils():
+@per_sim("post", "/detect")
+async def detect_sybils(sim_id: str = DEFAULT_SIM):
     """Manually trigger immune system detection cycle."""
-    if not evo:
+    s = await session_for(sim_id)
+    if not s:
         return {"error": "No simulation."}
-    flagged = evo.immune.run_cycle(evo.agents, evo.trust_net, evo.round)
-    events = evo.pop_events()
-    immune_events = evo.immune.pop_events()
-    events.extend(immune_events)
-    all_flagged = [a.id for a in evo.get_alive() if a.flagged_sybil]
-    if events:
-        stats = evo.round_stats[-1] if evo.round_stats else {}
-        narration = narrator.narrate(evo.round, events, stats)
-        await broadcast({"type": "detection", "events": events, "narration": narration})
-    return {"flagged": all_flagged, "count": len(all_flagged), "newly_flagged": list(flagged)}
-
-
-@app.post("/sim/inject")
-async def inject_agent():
+    return await command(s, s.sim.detect)
+
+
+@per_sim("post", "/inject")
+async def inject_agent(sim_id: str = DEFAULT_SIM):
     """Inject a single random agent (for judges to play with)."""
-    if not evo:
+    s = await session_for(sim_id)
+    if not s:
         return {"error": "No simulation."}
-    from .agent import NeuralAgent
-    agent = NeuralAgent(id=f"J{evo.next_id + 1:04d}", generation=evo.generation)
-    evo.next_id += 1
-    agent.balance = 800
-    evo.agents[agent.id] = agent
-    return {"injected": agent.to_dict()}
+    return await command(s, s.sim.inject, pool.max_population)
 
 
 # ─── Query ──────────────────────────────────────────────
+# Served from the simulation's latest RoundSnapshot: no actor round trip,
+# JSON encoded once per snapshot, 304 when the client's ETag is current.
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+async def latest_snapshot(s: Session):
+    """The simulation's snapshot, republished first if rounds that skipped
+    publishing (turbo, topics) or a resume left it stale."""
+    if s.sim.dirty:
+        return await pool.run(s, s.sim.refresh)
+    return s.sim.snapshot
+
+
+async def snapshot_response(s: Session, request: Request, view: str,
+                            limit: int = LEADERBOARD_DEPTH, headers: dict = None) -> Response:
+    snapshot = await latest_snapshot(s)
+    headers = {"ETag": snapshot.etag, "X-Sim-Round": str(snapshot.round), **(headers or {})}
+    if _etag_matches(request.headers.get("if-none-match"), snapshot.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(snapshot.body(view, limit), media_type="application/json",
+                    headers=headers)
+
+
+@per_sim("get", "/state")
+async def get_state(request: Request, sim_id: str = DEFAULT_SIM):
+    s = await session_for(sim_id)
+    if not s:
+        return {"error": "No simulation."}
+    return await snapshot_response(s, request, "state")
+
 
-@app.get("/sim/state")
-async def get_state():
-    if not evo:
+@per_sim("get", "/leaderboard")
+async def get_leaderboard(request: Request, limit: int = 10, sim_id: str = DEFAULT_SIM):
+    s = await session_for(sim_id)
+    if not s:
         return {"error": "No simulation."}
-    return evo.get_network_data()
+    if limit > LEADERBOARD_DEPTH:
+        return await pool.run(s, s.sim.leaderboard, limit)
+    return await snapshot_response(s, request, "leaderboard", limit)
 
 
-@app.get("/sim/leaderboard")
-async def get_leaderboard(limit: int = 10):
-    if not evo:
+@per_sim("get", "/strategies")
+async def get_strategies(request: Request, sim_id: str = DEFAULT_SIM):
+    s = await session_for(sim_id)
+    if not s:
         return {"error": "No simulation."}
-    return {"leaderboard": evo.get_leaderboard(limit)}
+    return await snapshot_response(s, request, "strategies")
 
 
-@app.get("/sim/strategies")
-async def get_strategies():
-    if not evo:
+@per_sim("get", "/stats")
+async def get_stats(request: Request, sim_id: str = DEFAULT_SIM):
+    s = await session_for(sim_id)
+    if not s:
         return {"error": "No simulation."}
-    return {"distribution": evo.get_strategy_distribution()}
+    return await snapshot_response(s, request, "stats",
+                                   headers={"X-Actor-Pending": str(s.actor.pending)})
 
 
-@app.get("/sim/stats")
-async def get_stats():
-    if not evo:
+# ─── Agent & Subgraph Queries ───────────────────────────
+# Served from the trust network's adjacency indexes on the actor: the
+# cost follows the size of the answer, not the population.
+
+MAX_HOPS = 3
+MAX_SUBGRAPH_NODES = 1000
+
+
+@per_sim("get", "/agent/{agent_id}")
+async def get_agent(agent_id: str, hops: int = 1, min_trust: float = 0.2,
+                    sim_id: str = DEFAULT_SIM):
+    """One agent's genome, counters, suspicion scores and threat memory,
+    and its `hops`-hop trust ego network with all four channels per edge."""
+    s = await session_for(sim_id)
+    if not s:
         return {"error": "No simulation."}
-    alive = evo.get_alive()
-    import numpy as np
-    return {
-        "round": evo.round,
-        "generation": evo.generation,
-        "alive": len(alive),
-        "total_agents": len(evo.agents),
-        "payoff_matrices": evo.payoff_matrices,
-        "trust_edges": len(evo.trust_net.edges),
-        "immune_warnings_total": sum(a.warnings_emitted for a in alive),
-        "immune_memory_total": sum(len(a.threat_memory) for a in alive),
-        "avg_vigilance": round(float(np.mean([a.vigilance for a in alive])), 3) if alive else 0,
-        "flagged_sybils": sum(1 for a in alive if a.flagged_sybil),
-        "round_stats": evo.round_stats[-20:]
-    }
+    if not 1 <= hops <= MAX_HOPS:
+        return {"error": f"hops must be between 1 and {MAX_HOPS}"}
+    detail = await pool.run(s, s.sim.agent, agent_id, hops, min_trust)
+    if detail is None:
+        return {"error": f"Unknown agent: {agent_id}"}
+    return detail
+
+
+@per_sim("get", "/subgraph")
+async def get_subgraph(agents: Optional[str] = None, cluster: Optional[int] = None,
+                       center: Optional[str] = None, hops: int = 1, flagged: bool = False,
+                       strategy: Optional[str] = None, min_trust: float = 0.2,
+                       limit: int = 200, sim_id: str = DEFAULT_SIM):
+    """
+    The agents matching every filter, and the trust edges among them:
+    agents=A0001,A0002  cluster=<index in /sim/state clusters>
+    center=<id>&hops=k  flagged=true  strategy=<label>  min_trust=<edge floor>
+    At most `limit` nodes ("truncated" says whether more matched).
+    """
+    s = await session_for(sim_id)
+    if not s:
+        return {"error": "No simulation."}
+    if not 1 <= hops <= MAX_HOPS:
+        return {"error": f"hops must be between 1 and {MAX_HOPS}"}
+    if not 1 <= limit <= MAX_SUBGRAPH_NODES:
+        return {"error": f"limit must be between 1 and {MAX_SUBGRAPH_NODES}"}
+    ids = [aid for aid in agents.split(",") if aid] if agents is not None else None
+    try:
+        return await pool.run(s, s.sim.subgraph, ids, cluster, center, hops, flagged,
+                              strategy, min_trust, limit)
+    except ValueError as e:
+        return {"error": str(e)}
+
+
+# ─── Metrics ────────────────────────────────────────────
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus text exposition for every resident simulation, labelled
+    by sim. Reads counters the actors and channels keep up to date, so a
+    scrape never touches the network (see engine/metrics.py)."""
+    out = Exposition()
+    for s in pool.resident():
+        if s.sim is not None:
+            s.sim.metrics.render(out, sim=s.id)
+        if isinstance(s.sim, SimulationProcess):
+            out.counter("aez_worker_cpu_seconds_total", "CPU time the simulation's workers used",
+                        round(s.sim.cpu_seconds, 3), sim=s.id)
+            if s.sim.memory is not None:
+                out.gauge("aez_worker_resident_memory_bytes", "Resident memory of the worker",
+                          s.sim.memory, sim=s.id)
+        s.fanout.render(out, s.channels, sim=s.id)
+        out.gauge("aez_actor_pending_commands", "Commands queued or running on the actor",
+                  s.actor.pending, sim=s.id)
+    out.gauge("aez_pool_resident_simulations", "Simulations in memory", len(pool.resident()))
+    out.counter("aez_pool_evictions_total", "Simulations checkpointed to disk", pool.evictions)
+    out.counter("aez_pool_resumes_total", "Simulations resumed from checkpoints", pool.resumes)
+    rss = process_memory()
+    if rss is not None:
+        out.gauge("process_resident_memory_bytes", "Resident memory size in bytes", rss)
+    return PlainTextResponse(out.text(), media_type=CONTENT_TYPE)
 
 
 # ─── WebSocket ──────────────────────────────────────────
 
 @app.websocket("/ws")
-async def websocket_endpoint(ws: WebSocket):
+@app.websocket("/sims/{sim_id}/ws")
+async def websocket_endpoint(ws: WebSocket, stream: str = "full",
+                             protocol: str = "json", topics: Optional[str] = None,
+                             sim_id: str = DEFAULT_SIM):
+    """
+    stream=full  (default) every round carries the whole network in "data".
+    stream=delta every round carries "stream": a versioned delta against
+                 the previous round (see engine/stream.py). The client
+                 starts from a snapshot and sends {"type": "resync",
+                 "version": v} when a delta's base is not its version.
+    protocol=binary  messages carrying the network arrive as binary
+                 columnar frames (see engine/frames.py), everything else
+                 as JSON text. Frames are always full state.
+    topics=a,b   only the named topics, one message per topic (see
+                 engine/topics.py). Change them with {"type": "subscribe"
+                 | "unsubscribe", "topics": [...]}; JSON full stream only.
+
+    Every client sends through its own bounded queue: a client that
+    falls behind skips stale round frames but still gets every event
+    (see engine/fanout.py; per-client lag at /ws/clients).
+
+    Clients see only their own simulation: /ws the default one,
+    /sims/{sim_id}/ws simulation sim_id (it may be created later).
+    """
     await ws.accept()
-    ws_clients.add(ws)
+    if protocol not in ("json", "binary"):
+        await ws.close(code=1003, reason=f"Unknown protocol: {protocol}")
+        return
+    if stream not in ("full", "delta") or (protocol == "binary" and stream != "full"):
+        await ws.close(code=1003, reason=f"Unknown stream mode: {stream}")
+        return
+    if topics is not None:
+        try:
+            subscribed = parse_topics(topics)
+            if protocol != "json" or stream != "full":
+                raise ValueError("Topics need protocol=json and stream=full")
+        except ValueError as e:
+            await ws.close(code=1003, reason=str(e))
+            return
+    try:
+        s = await pool.admit(sim_id)
+    except (ValueError, PoolBusy) as e:
+        await ws.close(code=1013 if isinstance(e, PoolBusy) else 1003, reason=str(e))
+        return
+    if topics is not None:
+        clients = s.topic_clients
+        channel = ClientChannel(ws, "topics", meter=s.fanout)
+        channel.topics = subscribed
+    else:
+        if protocol == "binary":
+            clients = s.binary_clients
+        else:
+            clients = s.stream_clients if stream == "delta" else s.ws_clients
+        channel = ClientChannel(ws, "binary" if protocol == "binary" else stream,
+                                meter=s.fanout)
+    channel.start()
+    clients.add(channel)
+    send = channel.put
     try:
         # Send initial state
-        if evo:
-            await ws.send_json({
+        if s.sim and clients is s.topic_clients:
+            await send_topics(s, channel, channel.topics, "init")
+        elif s.sim:
+            snapshot = await latest_snapshot(s)
+            init = {
                 "type": "init",
-                "data": evo.get_network_data(),
-                "leaderboard": evo.get_leaderboard(5)
-            })
+                "data": snapshot.network,
+                "leaderboard": snapshot.leaderboard[:5]
+            }
+            if protocol == "binary":
+                send(Envelope(encode_network(init["data"], init)))
+            elif stream == "delta":
+                if s.state_stream.base is None:
+                    s.state_stream.rebase(init["data"])
+                send(Envelope.json({
+                    "type": "init",
+                    "stream": s.state_stream.snapshot(),
+                    "leaderboard": init["leaderboard"]
+                }))
+            else:
+                send(Envelope.json(init))
         while True:
             # Keep connection alive, handle client messages
             data = await ws.receive_text()
             msg = json.loads(data)
+            if clients is s.topic_clients:
+                await topic_request(s, channel, msg)
+                continue
             # Client can request state
-            if msg.get("type") == "get_state" and evo:
-                await ws.send_json({
-                    "type": "state",
-                    "data": evo.get_network_data()
-                })
+            if msg.get("type") == "get_state" and s.sim:
+                if stream == "delta":
+                    send(Envelope.json({"type": "state", "stream": s.state_stream.snapshot()}))
+                    continue
+                network = (await latest_snapshot(s)).network
+                if protocol == "binary":
+                    send(Envelope(encode_network(network, {"type": "state"})))
+                else:
+                    send(Envelope.json({
+                        "type": "state",
+                        "data": network
+                    }))
+            elif msg.get("type") == "resync" and stream == "delta" and s.sim:
+                deltas = s.state_stream.since(int(msg.get("version", -1)))
+                if deltas is None:
+                    send(Envelope.json({"type": "state", "stream": s.state_stream.snapshot()}))
+                for delta in deltas or ():
+                    send(Envelope.json({"type": "resync", "stream": delta}))
     except WebSocketDisconnect:
-        ws_clients.discard(ws)
+        pass
     except Exception:
-        ws_clients.discard(ws)
+        pass
+    finally:
+        clients.discard(channel)
+        channel.close()
+
+
+async def send_topics(s: Session, channel: ClientChannel, topics: set[str], kind: str):
+    """Current values of `topics` to one topic client (on connect,
+    subscribe and get_state)."""
+    snapshot = await latest_snapshot(s)
+    message = {"type": kind, "leaderboard": snapshot.leaderboard[:8]}
+    if "graph" in topics:
+        message["data"] = snapshot.network
+    extras = computed(topics)
+    if extras:
+        message["topics"] = await pool.run(s, s.sim.topic_payloads, extras)
+    for topic, (part, droppable) in split(message).items():
+        if topic in topics:
+            channel.put(Envelope.json(part, droppable=droppable, key=topic))
+
+
+async def topic_request(s: Session, channel: ClientChannel, msg: dict):
+    """subscribe / unsubscribe / get_state from a topic client."""
+    kind = msg.get("type")
+    if kind == "get_state" and s.sim:
+        await send_topics(s, channel, channel.topics, "state")
+    elif kind in ("subscribe", "unsubscribe"):
+        try:
+            names = parse_topics(msg.get("topics") or ())
+        except ValueError as e:
+            channel.put(Envelope.json({"type": "error", "error": str(e)}))
+            return
+        added = names - channel.topics if kind == "subscribe" else set()
+        if kind == "subscribe":
+            channel.topics |= names
+        else:
+            channel.topics -= names
+        channel.put(Envelope.json({"type": "subscribed", "topics": sorted(channel.topics)}))
+        if added and s.sim:
+            await send_topics(s, channel, added, "state")
+
+
+@app.get("/ws/clients")
+@app.get("/sims/{sim_id}/ws/clients")
+async def get_clients(sim_id: str = DEFAULT_SIM):
+    """Per-client queue depth, lag (seconds) and delivery counters."""
+    s = pool.peek(sim_id)
+    channels = s.channels if s is not None else []
+    return {
+        "clients": [c.stats() for c in sorted(channels, key=lambda c: c.id)],
+        "max_lag": round(max((c.lag for c in channels), default=0.0), 4),
+    }
 
 
-async def broadcast(message: dict):
-    """Send to all connected WebSocket clients."""
-    dead = set()
-    for ws in ws_clients:
-        try:
-            await ws.send_json(message)
-        except Exception:
-            dead.add(ws)
-    ws_clients.difference_update(dead)
+def _send_all(clients: set[ClientChannel], envelope: Envelope):
+    """Queue one envelope on every channel in the set, dropping the ones
+    that have closed. Returns at once; each channel's writer sends."""
+    for channel in list(clients):
+        if channel.closed:
+            clients.discard(channel)
+        else:
+            channel.put(envelope)
+
+
+def _residual(message: dict) -> Optional[Envelope]:
+    """What a network message must still deliver if its frame is
+    dropped for a newer one: its events and narration."""
+    if not message.get("events") and not message.get("narration"):
+        return None
+    return Envelope.json({k: v for k, v in message.items()
+                          if k in ("type", "events", "narrations", "narration", "attack_type")})
+
+
+def _send_topics(s: Session, message: dict):
+    """Split a message into topics and queue each on its subscribers,
+    encoding each topic once."""
+    parts = split(message)
+    envelopes = {}
+    for channel in list(s.topic_clients):
+        if channel.closed:
+            s.topic_clients.discard(channel)
+            continue
+        for topic, (part, droppable) in parts.items():
+            if topic not in channel.topics:
+                continue
+            envelope = envelopes.get(topic)
+            if envelope is None:
+                envelope = envelopes[topic] = Envelope.json(part, droppable=droppable, key=topic)
+            channel.put(envelope)
+
+
+async def broadcast(s: Session, message: dict):
+    """Queue a message for the session's WebSocket clients, encoded once
+    per protocol. A message carrying the network in "data" reaches
+    delta-stream clients as a "stream" delta ("created" starts the stream
+    over from a snapshot) and binary clients as one columnar frame.
+    Network messages are droppable frames for clients that fall behind
+    (see engine/fanout.py). Topic clients get their topics' parts."""
+    if s.topic_clients:
+        _send_topics(s, message)
+    if "topics" in message:      # computed topic payloads are for topic clients only
+        message = {k: v for k, v in message.items() if k != "topics"}
+
+    if "data" not in message:
+        envelope = Envelope.json(message)
+        for clients in (s.ws_clients, s.stream_clients, s.binary_clients):
+            _send_all(clients, envelope)
+        return
+
+    residual = _residual(message)
+    if s.ws_clients:
+        _send_all(s.ws_clients, Envelope.json(message, droppable=True, residual=residual))
+
+    if s.binary_clients:
+        _send_all(s.binary_clients, Envelope(encode_network(message["data"], message),
+                                             droppable=True, residual=residual))
+
+    state_stream = s.state_stream
+    if not s.stream_clients:
+        state_stream.invalidate()  # nobody to diff for; rebase on next connect
+        return
+    payload = {k: v for k, v in message.items() if k != "data"}
+    if message.get("type") == "created":
+        payload["stream"] = state_stream.rebase(message["data"])
+        _send_all(s.stream_clients, Envelope.json(payload))
+        return
+    payload["stream"] = state_stream.publish(message["data"])
+    catchup = []   # one snapshot envelope, shared by every lagging client
+
+    def snapshot_instead() -> Envelope:
+        if not catchup:
+            catchup.append(Envelope.json({**payload, "stream": state_stream.snapshot()},
+                                         droppable=True, residual=residual))
+        return catchup[0]
+    _send_all(s.stream_clients, Envelope.json(payload, droppable=True, residual=residual,
+                                              catchup=snapshot_instead))
 
 
 # ─── Run ────────────────────────────────────────────────
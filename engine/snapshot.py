@@ -0,0 +1,80 @@
+"""
+AEZ Evolution v2 — Immutable Round Snapshots
+
+Dashboards poll /sim/state, /sim/leaderboard, /sim/strategies and
+/sim/stats. Computing each of those from the live Evolution repeats the
+same work for every poll of the same round, and — with the simulation
+on its own thread — a read could observe a round half-applied.
+
+After every command that changes the simulation, its actor publishes a
+RoundSnapshot: the network, leaderboard, strategy distribution and
+stats, taken together at one consistent point. Publication is a single
+reference swap, so readers on the event loop take the latest snapshot
+without locks and never see a partial update.
+
+Each snapshot carries its simulation's publish count as its version.
+Its ETag combines a random per-process epoch, the simulation id and
+(generation, round, version). A restarted server, or a simulation
+resumed from a checkpoint, can therefore never reissue a tag a client
+cached for different content. A view's JSON body is encoded on first request and cached, so
+repeated reads of the same round cost a dict lookup — or nothing, when
+the client's If-None-Match already names the current ETag.
+
+Snapshots are immutable by contract: nothing writes to them (or to the
+dicts they hold) after publication.
+"""
+
+import json
+import secrets
+
+# Leaderboard entries kept per snapshot; deeper requests go to the actor
+LEADERBOARD_DEPTH = 20
+
+# Drawn once per process: ETags from before a restart never match again
+EPOCH = secrets.token_hex(4)
+
+
+class RoundSnapshot:
+    """One published, read-only view of a simulation."""
+    __slots__ = ('sim_id', 'version', 'round', 'generation', 'network', 'leaderboard',
+                 'strategies', 'stats', '_bodies')
+
+    def __init__(self, network: dict, leaderboard: list[dict], stats: dict,
+                 version: int, sim_id: str = 'sim'):
+        self.sim_id = sim_id
+        self.version = version                  # the simulation's publish count
+        self.round = network['round']
+        self.generation = network['generation']
+        self.network = network
+        self.leaderboard = leaderboard          # top LEADERBOARD_DEPTH
+        strategies = {}
+        for node in network['nodes']:
+            strategies[node['strategy']] = strategies.get(node['strategy'], 0) + 1
+        self.strategies = strategies
+        self.stats = stats
+        self._bodies: dict[tuple, bytes] = {}
+
+    @property
+    def etag(self) -> str:
+        return f'"{EPOCH}-{self.sim_id}-{self.generation}.{self.round}.{self.version}"'
+
+    def view(self, name: str, limit: int = LEADERBOARD_DEPTH):
+        """The payload an endpoint serves from this snapshot."""
+        if name == 'state':
+            return self.network
+        if name == 'leaderboard':
+            return {'leaderboard': self.leaderboard[:limit]}
+        if name == 'strategies':
+            return {'distribution': self.strategies}
+        if name == 'stats':
+            return self.stats
+        raise ValueError(f"Unknown snapshot view: {name}")
+
+    def body(self, name: str, limit: int = LEADERBOARD_DEPTH) -> bytes:
+        """JSON-encoded view, encoded once per snapshot."""
+        key = (name, limit)
+        body = self._bodies.get(key)
+        if body is None:
+            body = json.dumps(self.view(name, limit), separators=(',', ':')).encode()
+            self._bodies[key] = body
+        return body
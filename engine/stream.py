@@ -0,0 +1,181 @@
+"""
+AEZ Evolution v2 — Versioned State Stream (delta-encoded updates)
+
+Every round the server used to push the whole get_network_data()
+payload to every client: all nodes, all edges, clusters, payoff tables
+and stats. Round to round most of it is unchanged — a node's generation,
+parent, traits and genome are fixed for life, and most edges' rounded
+trust values do not move.
+
+StateStream keeps the last published state (the base) and turns each
+new state into a delta against it:
+
+    nodes    changed fields per surviving node, added nodes (full),
+             removed node ids
+    edges    added / updated edges (full), removed edges [source, target]
+    clusters the new cluster list, only when membership changed
+    scalars  top-level fields (round, stats, payoff_matrices, ...) that
+             changed
+
+Every publish bumps the version. A delta carries `base` (the version it
+applies to) and `version` (the version it produces); a client applies a
+delta only on top of its own version. Clients that fall behind ask for
+everything since their version: the stream replays its recent deltas
+(`since`), or — when the gap is older than the retained history — the
+client gets a full snapshot instead.
+"""
+
+import copy
+from collections import deque
+
+# Recent deltas kept for resyncing late clients
+DEFAULT_HISTORY = 64
+
+
+def _edge_key(edge: dict) -> str:
+    # Viz edges are undirected; orientation is whichever direction was
+    # seen first, which can flip between rounds.
+    a, b = edge['source'], edge['target']
+    return f"{a}|{b}" if a < b else f"{b}|{a}"
+
+
+def _cluster_key(clusters: list) -> frozenset:
+    return frozenset(frozenset(c) for c in clusters)
+
+
+def _scalars(network: dict) -> dict:
+    # Copied: some (payoff_matrices) are live engine objects mutated in place
+    return copy.deepcopy({k: v for k, v in network.items()
+                          if k not in ('nodes', 'edges', 'clusters')})
+
+
+class StateStream:
+    """Versioned network state: full snapshots plus per-publish deltas."""
+
+    def __init__(self, history: int = DEFAULT_HISTORY):
+        self.version = 0
+        self.base: dict | None = None    # last published network state
+        self._nodes: dict[str, dict] = {}
+        self._edges: dict[str, dict] = {}
+        self._clusters: frozenset = frozenset()
+        self._scalars: dict = {}
+        self.deltas: deque[dict] = deque(maxlen=history)
+
+    # ─── Publishing ──────────────────────────────────────
+
+    def rebase(self, network: dict) -> dict:
+        """Start over from a full state (new simulation, or a stream that
+        went stale). Retained deltas no longer apply and are dropped."""
+        self.version += 1
+        self._set_base(network)
+        self.deltas.clear()
+        return self.snapshot()
+
+    def publish(self, network: dict) -> dict:
+        """Diff a new state against the base, make it the base and
+        return the delta (also retained for resync)."""
+        if self.base is None:
+            return self.rebase(network)
+
+        nodes = {n['id']: n for n in network['nodes']}
+        edges = {_edge_key(e): e for e in network['edges']}
+        scalars = _scalars(network)
+
+        changed, added = {}, []
+        for node_id, node in nodes.items():
+            old = self._nodes.get(node_id)
+            if old is None:
+                added.append(node)
+                continue
+            fields = {k: v for k, v in node.items() if old.get(k) != v}
+            if fields:
+                changed[node_id] = fields
+        removed = [node_id for node_id in self._nodes if node_id not in nodes]
+
+        edges_added, edges_updated = [], []
+        for key, edge in edges.items():
+            old = self._edges.get(key)
+            if old is None:
+                edges_added.append(edge)
+            elif old['trust'] != edge['trust'] or old['dimensions'] != edge['dimensions']:
+                edges_updated.append(edge)
+        edges_removed = [[e['source'], e['target']] for key, e in self._edges.items()
+                         if key not in edges]
+
+        delta = {
+            'type': 'delta',
+            'base': self.version,
+            'version': self.version + 1,
+            'nodes': {'changed': changed, 'added': added, 'removed': removed},
+            'edges': {'added': edges_added, 'updated': edges_updated,
+                      'removed': edges_removed},
+            'scalars': {k: v for k, v in scalars.items() if self._scalars.get(k) != v},
+        }
+        clusters = _cluster_key(network['clusters'])
+        if clusters != self._clusters:
+            delta['clusters'] = network['clusters']
+
+        self.version += 1
+        self._set_base(network, nodes, edges, clusters, scalars)
+        self.deltas.append(delta)
+        return delta
+
+    def _set_base(self, network: dict, nodes: dict = None, edges: dict = None,
+                  clusters: frozenset = None, scalars: dict = None):
+        self.base = network
+        self._scalars = scalars if scalars is not None else _scalars(network)
+        self._nodes = nodes if nodes is not None else {n['id']: n for n in network['nodes']}
+        self._edges = edges if edges is not None else {_edge_key(e): e for e in network['edges']}
+        self._clusters = (clusters if clusters is not None
+                          else _cluster_key(network['clusters']))
+
+    def invalidate(self):
+        """Forget the base (nobody is listening); the next publish rebases."""
+        self.base = None
+        self._nodes, self._edges, self._scalars = {}, {}, {}
+        self.deltas.clear()
+
+    # ─── Reading ─────────────────────────────────────────
+
+    def snapshot(self) -> dict:
+        return {'type': 'snapshot', 'version': self.version, 'data': self.base}
+
+    def since(self, version: int) -> list[dict] | None:
+        """Deltas taking a client from `version` to the current one, or
+        None when that is impossible (too old, or from another base) and
+        the client needs a snapshot."""
+        if self.base is None or version > self.version:
+            return None
+        if version == self.version:
+            return []
+        if not self.deltas or version < self.deltas[0]['base']:
+            return None
+        return [d for d in self.deltas if d['base'] >= version]
+
+
+def apply_delta(network: dict, delta: dict) -> dict:
+    """
+    Reconcile a full state with one delta (the client side, in Python —
+    used by tests and tools; the dashboard has the same logic in JS).
+    Returns a new state; the input is not modified.
+    """
+    nodes = {n['id']: dict(n) for n in network['nodes']}
+    for node_id in delta['nodes']['removed']:
+        nodes.pop(node_id, None)
+    for node_id, fields in delta['nodes']['changed'].items():
+        nodes[node_id].update(fields)
+    for node in delta['nodes']['added']:
+        nodes[node['id']] = node
+
+    edges = {_edge_key(e): e for e in network['edges']}
+    for source, target in delta['edges']['removed']:
+        edges.pop(_edge_key({'source': source, 'target': target}), None)
+    for edge in delta['edges']['added'] + delta['edges']['updated']:
+        edges[_edge_key(edge)] = edge
+
+    state = {**network, **delta['scalars']}
+    state['nodes'] = list(nodes.values())
+    state['edges'] = list(edges.values())
+    if 'clusters' in delta:
+        state['clusters'] = delta['clusters']
+    return state
@@ -0,0 +1,108 @@
+"""
+AEZ Evolution v2 — WebSocket Topics
+
+Every /ws client used to get every message whole: the network, the
+leaderboard, events and narration, whether it drew a graph or just a
+leaderboard widget. Serving the network means get_network_data() every
+round — the most expensive thing the server does — even when no client
+shows it.
+
+A client connected with /ws?topics=... gets only the topics it names:
+
+    graph               the full network, each round
+    graph:ego:<id>      one agent, its trust neighbours and the edges
+                        among them
+    leaderboard         the top 8 (with narrator names)
+    stats               the /sim/stats payload
+    immune              flagged agents and immune totals, plus immune
+                        events (detections, rings, isolations)
+    events              the events each message carries, in order, with
+                        the message's type as source (a turbo frame
+                        passes on its sources list instead)
+    narration           the narrator's lines
+
+Each broadcast message is split into one message per topic, encoded
+once per topic and queued only on the channels subscribed to it. The
+server asks the actor for only what subscribers need: the computed
+topics (stats, immune, ego) only when someone has subscribed to them,
+and the network only when a graph (or a client without topics) is
+connected — otherwise rounds skip get_network_data() entirely.
+
+State topics (graph, ego, leaderboard, stats) are latest-wins: a newer
+message supersedes a queued one for a lagging client. events,
+narration, and immune messages carrying events are never dropped.
+"""
+
+from typing import Iterable
+
+TOPICS = ('graph', 'leaderboard', 'stats', 'immune', 'events', 'narration')
+EGO_PREFIX = 'graph:ego:'
+# Topics the simulation computes on request (the rest are split out of
+# every broadcast message)
+COMPUTED = ('stats', 'immune')
+
+IMMUNE_EVENTS = frozenset({'immune_detection', 'sybil_detected', 'ring_detected',
+                           'agent_isolated'})
+
+
+def parse_topics(spec: str | Iterable[str]) -> set[str]:
+    """Topic names from "a,b,c" (or an iterable of names)."""
+    names = spec.split(',') if isinstance(spec, str) else spec
+    topics = set()
+    for name in names:
+        name = name.strip()
+        if not name:
+            continue
+        if name not in TOPICS and not (name.startswith(EGO_PREFIX)
+                                       and len(name) > len(EGO_PREFIX)):
+            raise ValueError(f"Unknown topic: {name}")
+        topics.add(name)
+    return topics
+
+
+def computed(topics: Iterable[str]) -> frozenset:
+    """The subset the simulation has to compute (stats, immune, egos)."""
+    return frozenset(t for t in topics if t in COMPUTED or t.startswith(EGO_PREFIX))
+
+
+def split(message: dict) -> dict[str, tuple[dict, bool]]:
+    """One broadcast message as {topic: (message, droppable)}. Computed
+    topics come from message["topics"]; topics with nothing to say this
+    message are absent."""
+    kind = message.get('type')
+    payloads = message.get('topics') or {}
+    parts = {}
+    if 'data' in message:
+        parts['graph'] = ({'type': 'graph', 'source': kind, 'data': message['data']}, True)
+    for topic, payload in payloads.items():
+        if topic.startswith(EGO_PREFIX):
+            parts[topic] = ({'type': 'ego', 'agent': topic[len(EGO_PREFIX):],
+                             'data': payload}, True)
+    if 'leaderboard' in message:
+        parts['leaderboard'] = ({'type': 'leaderboard', 'leaderboard': message['leaderboard'],
+                                 'agent_names': message.get('agent_names', {})}, True)
+    if 'stats' in payloads:
+        parts['stats'] = ({'type': 'stats', 'stats': payloads['stats']}, True)
+
+    events = message.get('events') or []
+    immune_events = [e for e in events if e.get('type') in IMMUNE_EVENTS]
+    if 'immune' in payloads or immune_events:
+        immune = {'type': 'immune', 'events': immune_events}
+        if 'immune' in payloads:
+            immune['state'] = payloads['immune']
+        parts['immune'] = (immune, not immune_events)
+    if events:
+        if 'sources' in message:     # a frame: which message each run came from
+            part = {'type': 'events', 'sources': message['sources'], 'events': events}
+        else:
+            part = {'type': 'events', 'source': kind, 'events': events}
+            if 'attack_type' in message:
+                part['attack_type'] = message['attack_type']
+        parts['events'] = (part, False)
+
+    narrations = message.get('narrations') or ([message['narration']]
+                                               if message.get('narration') else [])
+    if narrations:
+        parts['narration'] = ({'type': 'narration', 'narrations': narrations,
+                               'narration': narrations[-1]}, False)
+    return parts
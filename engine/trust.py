@@ -43,10 +43,18 @@ CASCADE SYSTEM:
   Betrayal propagates through the network. When a trusted agent defects,
   neighbors who trusted the victim add evidence against the betrayer.
   This is information propagation, not arbitrary trust reduction.
+
+ADJACENCY INDEXES:
+  Edges live in one dict keyed (src, dst), and every question about one
+  agent's neighborhood used to scan all of it. `outgoing[src]` and
+  `incoming[dst]` index the same TrustState objects by endpoint, kept in
+  step on every insertion and removal, so neighborhood queries cost
+  the agent's degree instead of the edge count.
 """
 
 import numpy as np
 from dataclasses import dataclass, field
+from .numerics import float_dtype
 
 
 @dataclass
@@ -67,6 +75,12 @@ class TrustState:
     commitments_honored: int = 0
     commitments_broken: int = 0
 
+    # Shared PairLog view (src's side of the pair). When bound, the action
+    # window and commitment counts are read from the log instead of the
+    # fields above, which stay empty — the engine records each interaction
+    # once for both agents and both directed edges.
+    pair: object = field(default=None, repr=False, compare=False)
+
     @property
     def direct_trust(self) -> float:
         """Bayesian posterior mean: E[Beta(α, β)]."""
@@ -84,10 +98,14 @@ class TrustState:
     @property
     def commitment_reliability(self) -> float:
         """Fraction of commitments honored."""
-        total = self.commitments_honored + self.commitments_broken
+        if self.pair is not None:
+            honored, broken = self.pair.their_commitments
+        else:
+            honored, broken = self.commitments_honored, self.commitments_broken
+        total = honored + broken
         if total == 0:
             return 0.5  # neutral prior
-        return self.commitments_honored / total
+        return honored / total
 
     def update(self, cooperated: bool, commitment_honored: bool = True):
         """Pure Bayesian update — no learning rate needed."""
@@ -96,6 +114,9 @@ class TrustState:
         else:
             self.beta += 1.0
 
+        if self.pair is not None:
+            return  # window and commitments already in the shared log
+
         # Track temporal window
         self.action_window.append(cooperated)
         if len(self.action_window) > 30:
@@ -110,9 +131,10 @@ class TrustState:
     @property
     def temporal_trust(self) -> float:
         """Behavioral stability: 1 - normalized variance of action window."""
-        if len(self.action_window) < 3:
+        window = self.pair.their_recent(15) if self.pair is not None else self.action_window[-15:]
+        if len(window) < 3:
             return 0.5  # insufficient data
-        recent = [float(x) for x in self.action_window[-15:]]
+        recent = [float(x) for x in window]
         variance = np.var(recent)
         # Max variance for binary data is 0.25 (at p=0.5)
         return 1.0 - min(variance / 0.25, 1.0)
@@ -141,15 +163,64 @@ class TrustNetwork:
     # Used everywhere trust edges need to be filtered for meaningful signal.
     TRUST_THRESHOLD = 0.5
 
-    def __init__(self):
-        # Directed edges: (src, dst) → TrustState
+    def __init__(self, pair_log=None):
+        # Directed edges: (src, dst) → TrustState, indexed by endpoint:
+        # outgoing[src][dst] and incoming[dst][src] are the same state.
+        # Insert through _add_edge so the indexes stay in step.
         self.edges: dict[tuple[str, str], TrustState] = {}
+        self.outgoing: dict[str, dict[str, TrustState]] = {}
+        self.incoming: dict[str, dict[str, TrustState]] = {}
+
+        # Agents isolated by the immune system (every flagged sybil)
+        self.isolated: set[str] = set()
+
+        # Optional shared PairLog: edges bind to it on first update and
+        # read their windows and commitment counts from it.
+        self.pair_log = pair_log
 
         # Event log for narrator
         self.events: list[dict] = []
 
+        # Threshold-crossing tracking for event-driven ring detection.
+        # When enabled, any edge whose trust rises across crossing_threshold
+        # marks both endpoints dirty; the immune system tests only the
+        # components that contain dirty agents. The threshold is set by the
+        # immune system from the data (μ + σ) — None until the first cycle.
+        self.track_crossings = False
+        self.crossing_threshold: float = None
+        self.dirty_agents: set[str] = set()
+
+    def __getstate__(self):
+        # Snapshots and checkpoints carry the edges only; the indexes are
+        # rebuilt from them (in edge order) on load.
+        state = self.__dict__.copy()
+        del state['outgoing'], state['incoming']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.outgoing, self.incoming = {}, {}
+        for (src, dst), edge in self.edges.items():
+            self.outgoing.setdefault(src, {})[dst] = edge
+            self.incoming.setdefault(dst, {})[src] = edge
+
     # ─── Trust Updates ───────────────────────────────────
 
+    def _add_edge(self, src: str, dst: str, state: TrustState) -> TrustState:
+        """Insert (or replace) edge src → dst and index it."""
+        self.edges[(src, dst)] = state
+        self.outgoing.setdefault(src, {})[dst] = state
+        self.incoming.setdefault(dst, {})[src] = state
+        return state
+
+    def _mark_crossing(self, src: str, dst: str, old_trust: float, new_trust: float):
+        """Mark both endpoints dirty if src's trust in dst rose across
+        crossing_threshold."""
+        if (self.track_crossings and self.crossing_threshold is not None
+                and old_trust < self.crossing_threshold <= new_trust):
+            self.dirty_agents.add(src)
+            self.dirty_agents.add(dst)
+
     def update(self, agent_a: str, agent_b: str,
                a_cooperated: bool, b_cooperated: bool,
                a_commitment_ok: bool = True, b_commitment_ok: bool = True):
@@ -162,14 +233,15 @@ class TrustNetwork:
     def _update_edge(self, src: str, dst: str, dst_cooperated: bool,
                      commitment_honored: bool = True):
         """Update src's trust in dst. Pure Bayesian — no learning rate."""
-        key = (src, dst)
-        if key not in self.edges:
-            self.edges[key] = TrustState()
-
-        state = self.edges[key]
+        state = self.edges.get((src, dst))
+        if state is None:
+            state = self._add_edge(src, dst, TrustState())
+        if self.pair_log is not None and state.pair is None:
+            state.pair = self.pair_log.side(src, dst)
         old_trust = state.direct_trust
 
         state.update(dst_cooperated, commitment_honored)
+        self._mark_crossing(src, dst, old_trust, state.direct_trust)
 
         # Check for betrayal event (high trust → defection)
         if old_trust > 0.7 and not dst_cooperated:
@@ -250,17 +322,16 @@ class TrustNetwork:
         # No theoretical reason to weight one over the other.
         return (overlap + clustering) / 2.0
 
+    def _trusted_out(self, agent_id: str, members=None) -> set[str]:
+        """Agents agent_id trusts above TRUST_THRESHOLD (within members)."""
+        return {dst for dst, state in self.outgoing.get(agent_id, {}).items()
+                if state.direct_trust > self.TRUST_THRESHOLD
+                and (members is None or dst in members)}
+
     def _compute_neighbor_overlap(self, a: str, b: str) -> float:
         """Jaccard similarity of trust neighborhoods."""
-        neighbors_a = set()
-        neighbors_b = set()
-
-        for (src, dst), state in self.edges.items():
-            if state.direct_trust > self.TRUST_THRESHOLD:
-                if src == a:
-                    neighbors_a.add(dst)
-                if src == b:
-                    neighbors_b.add(dst)
+        neighbors_a = self._trusted_out(a)
+        neighbors_b = self._trusted_out(b)
 
         if not neighbors_a or not neighbors_b:
             return 0.0
@@ -275,10 +346,9 @@ class TrustNetwork:
         Agents in tight clusters have more accountability pressure.
         """
         # Get trusted neighbors
-        neighbors = set()
-        for (src, dst), state in self.edges.items():
-            if src == agent_id and state.direct_trust > self.TRUST_THRESHOLD and dst in set(all_agent_ids):
-                neighbors.add(dst)
+        # Membership tests only: lists become sets, sets and views pass through
+        members = set(all_agent_ids) if isinstance(all_agent_ids, (list, tuple)) else all_agent_ids
+        neighbors = self._trusted_out(agent_id, members)
 
         if len(neighbors) < 2:
             return 0.0
@@ -361,6 +431,10 @@ class TrustNetwork:
         The halving is principled: with two parents, each contributes half
         the prior. The child has observed NOTHING directly — the inherited
         evidence is prior belief, not personal experience.
+
+        A seeded edge did not exist before, so one that starts above the
+        crossing threshold counts as a crossing: a ring's offspring can
+        join its component without a single interaction.
         """
         parent_ids = {parent_a_id, parent_b_id}
 
@@ -383,7 +457,8 @@ class TrustNetwork:
                 child_state = TrustState()
                 child_state.alpha = max(1.0, (avg_alpha + 1.0) / 2.0)
                 child_state.beta = max(1.0, (avg_beta + 1.0) / 2.0)
-                self.edges[(other_id, child_id)] = child_state
+                self._add_edge(other_id, child_id, child_state)
+                self._mark_crossing(other_id, child_id, 0.0, child_state.direct_trust)
 
             # Child's trust in others: inherit from parents' trust in others
             parents_trusts = []
@@ -398,7 +473,8 @@ class TrustNetwork:
                 child_state = TrustState()
                 child_state.alpha = max(1.0, (avg_alpha + 1.0) / 2.0)
                 child_state.beta = max(1.0, (avg_beta + 1.0) / 2.0)
-                self.edges[(child_id, other_id)] = child_state
+                self._add_edge(child_id, other_id, child_state)
+                self._mark_crossing(child_id, other_id, 0.0, child_state.direct_trust)
 
     # ─── Topology Analysis ───────────────────────────────
 
@@ -414,10 +490,7 @@ class TrustNetwork:
         conductance = external_edges / total_edges
         Low conductance = insular cluster = possibly sybil ring.
         """
-        neighbors = set()
-        for (src, dst), state in self.edges.items():
-            if src == agent_id and state.direct_trust > self.TRUST_THRESHOLD:
-                neighbors.add(dst)
+        neighbors = self._trusted_out(agent_id)
 
         if len(neighbors) < 2:
             return 0.5  # insufficient data
@@ -426,8 +499,8 @@ class TrustNetwork:
         internal = 0
         external = 0
         for neighbor in neighbors:
-            for (src, dst), state in self.edges.items():
-                if src == neighbor and state.direct_trust > self.TRUST_THRESHOLD:
+            for dst, state in self.outgoing.get(neighbor, {}).items():
+                if state.direct_trust > self.TRUST_THRESHOLD:
                     if dst in neighbors or dst == agent_id:
                         internal += 1
                     elif dst in all_agent_ids:
@@ -443,13 +516,84 @@ class TrustNetwork:
         Default threshold = TRUST_THRESHOLD (Bayesian neutral boundary)."""
         if threshold is None:
             threshold = self.TRUST_THRESHOLD
-        neighbors = []
-        for (src, dst), state in self.edges.items():
-            if src == agent_id and state.direct_trust > threshold:
-                neighbors.append((dst, state.direct_trust))
+        neighbors = [(dst, state.direct_trust)
+                     for dst, state in self.outgoing.get(agent_id, {}).items()
+                     if state.direct_trust > threshold]
         neighbors.sort(key=lambda x: (-x[1], x[0]))  # Break trust ties by agent ID
         return [n[0] for n in neighbors]
 
+    # ─── Neighborhood Queries ────────────────────────────
+    # Index-backed: each costs the degrees of the agents it visits, not
+    # the edge count.
+
+    def neighborhood(self, agent_id: str, hops: int = 1, min_score: float = 0.0,
+                     keep=None) -> set[str]:
+        """agent_id and every agent within `hops` edges of it, following
+        edges of trust >= min_score in either direction. keep(id) → bool
+        limits which agents are visited (e.g. the living)."""
+        members = {agent_id}
+        frontier = [agent_id]
+        for _ in range(hops):
+            reached = []
+            for node in frontier:
+                for index in (self.outgoing, self.incoming):
+                    for other, state in index.get(node, {}).items():
+                        if (other not in members and state.direct_trust >= min_score
+                                and (keep is None or keep(other))):
+                            members.add(other)
+                            reached.append(other)
+            frontier = reached
+        return members
+
+    def directed_edges_among(self, agent_ids: set, min_score: float = 0.0):
+        """(src, dst, state) for every edge inside agent_ids with trust >=
+        min_score, by src then insertion."""
+        for src in sorted(agent_ids):
+            for dst, state in self.outgoing.get(src, {}).items():
+                if dst in agent_ids and state.direct_trust >= min_score:
+                    yield src, dst, state
+
+    def edges_among(self, agent_ids: set, min_score: float = 0.2) -> list[dict]:
+        """get_edges_for_viz restricted to agent_ids (one edge per pair)."""
+        edges = []
+        seen = set()
+        for src, dst, state in self.directed_edges_among(agent_ids, min_score):
+            pair = (src, dst) if src < dst else (dst, src)
+            if pair not in seen:
+                seen.add(pair)
+                edges.append({
+                    'source': src,
+                    'target': dst,
+                    'trust': round(state.direct_trust, 3),
+                    'dimensions': state.to_dict()
+                })
+        return edges
+
+    def edge_channels(self, src: str, dst: str, agent_ids: set) -> dict:
+        """get_trust_channels(src, dst) from the indexes: the social sum
+        runs over src's trusted neighbors that know dst, in id order (the
+        order a round's sorted agent list gives compute_social_trust)."""
+        weighted_sum = 0.0
+        weight_total = 0.0
+        trusts = self.outgoing.get(src, {})
+        known_by = self.incoming.get(dst, {})
+        for third_party in sorted(trusts.keys() & known_by.keys()):
+            if third_party == dst or third_party not in agent_ids:
+                continue
+            src_to_third = trusts[third_party]
+            third_to_dst = known_by[third_party]
+            if src_to_third.direct_trust < self.TRUST_THRESHOLD or third_to_dst.confidence < 0.1:
+                continue
+            weight = src_to_third.direct_trust * third_to_dst.confidence
+            weighted_sum += third_to_dst.direct_trust * weight
+            weight_total += weight
+        return {
+            'direct_trust': self.compute_direct_trust(src, dst),
+            'social_trust': weighted_sum / weight_total if weight_total > 0 else 0.5,
+            'temporal_trust': self.compute_temporal_trust(src, dst),
+            'structural_trust': self.compute_structural_trust(src, dst, agent_ids),
+        }
+
     # ─── Cascade System ──────────────────────────────────
 
     def cascade_collapse(self, betrayer: str, victim: str, all_agent_ids: list[str]):
@@ -476,12 +620,12 @@ class TrustNetwork:
             # Evidence = my trust in the victim. If I strongly trust the victim
             # and they got betrayed, that's strong evidence the betrayer is bad.
             # No arbitrary multiplier — trust IS the evidence weight.
-            key = (agent_id, betrayer)
-            if key not in self.edges:
-                self.edges[key] = TrustState()
+            state = self.edges.get((agent_id, betrayer))
+            if state is None:
+                state = self._add_edge(agent_id, betrayer, TrustState())
 
             evidence_strength = victim_state.direct_trust
-            self.edges[key].beta += evidence_strength
+            state.beta += evidence_strength
             collapse_count += 1
 
         if collapse_count > 0:
@@ -504,17 +648,70 @@ class TrustNetwork:
         for agent_id in all_agent_ids:
             if agent_id == target:
                 continue
-            key = (agent_id, target)
-            if key not in self.edges:
-                self.edges[key] = TrustState()
+            state = self.edges.get((agent_id, target))
+            if state is None:
+                state = self._add_edge(agent_id, target, TrustState())
             # Add overwhelming defection evidence
-            self.edges[key].beta += 20.0
+            state.beta += 20.0
+        self.isolated.add(target)
 
         self.events.append({
             'type': 'agent_isolated',
             'target': target
         })
 
+    # ─── Collection ──────────────────────────────────────
+
+    def remove_agents(self, agent_ids: set[str]):
+        """Drop every edge touching the given agents (both directions).
+        Rebuilds the edge dict — dicts never shrink on deletion."""
+        self.edges = {key: state for key, state in self.edges.items()
+                      if key[0] not in agent_ids and key[1] not in agent_ids}
+        for agent_id in agent_ids:
+            for dst in self.outgoing.pop(agent_id, ()):
+                self.incoming.get(dst, {}).pop(agent_id, None)
+            for src in self.incoming.pop(agent_id, ()):
+                self.outgoing.get(src, {}).pop(agent_id, None)
+        self.dirty_agents -= agent_ids
+        self.isolated -= agent_ids
+
+    # ─── Edge Evidence ───────────────────────────────────
+
+    def edge_evidence(self, agent_ids: list[str]) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Beta evidence (alpha, beta) of every edge among agent_ids,
+        self-loops excluded, read from the outgoing index in agent_ids
+        order: O(edges), never a population-sized matrix. Pairs without
+        an edge are the uniform prior and carry no evidence.
+        """
+        population = set(agent_ids)
+        evidence = [(state.alpha, state.beta)
+                    for src in agent_ids
+                    for dst, state in self.outgoing.get(src, {}).items()
+                    if dst in population and dst != src]
+        return self._evidence_columns(evidence)
+
+    def incoming_evidence(self, members: list[str], population: set) -> tuple[np.ndarray, ...]:
+        """
+        Beta evidence on the edges INTO members from the population, split
+        into internal (from another member) and external (from everyone
+        else): (alpha_in, beta_in, alpha_out, beta_out). Read from the
+        incoming index, so it costs the members' in-degree, not O(n²).
+        """
+        member_set = set(members)
+        internal, external = [], []
+        for dst in members:
+            for src, state in self.incoming.get(dst, {}).items():
+                if src == dst or src not in population:
+                    continue
+                (internal if src in member_set else external).append((state.alpha, state.beta))
+        return self._evidence_columns(internal) + self._evidence_columns(external)
+
+    @staticmethod
+    def _evidence_columns(evidence: list[tuple]) -> tuple[np.ndarray, np.ndarray]:
+        pairs = np.array(evidence, dtype=float_dtype()).reshape(-1, 2)
+        return pairs[:, 0], pairs[:, 1]
+
     # ─── Visualization Helpers ───────────────────────────
 
     def get_edges_for_viz(self, alive_ids: set, min_score: float = 0.2) -> list[dict]:
@@ -534,8 +731,10 @@ class TrustNetwork:
                     })
         return edges
 
-    def get_clusters(self, agent_ids: list[str], threshold: float = 0.5) -> list[set]:
-        """Find trust clusters via connected components."""
+    def get_clusters(self, agent_ids: list[str], threshold: float = 0.5,
+                     seeds: set = None) -> list[set]:
+        """Find trust clusters via connected components.
+        With seeds, only the components containing a seed are returned."""
         adj = {aid: set() for aid in agent_ids}
         for (a, b), state in self.edges.items():
             if a in adj and b in adj and state.direct_trust >= threshold:
@@ -547,7 +746,7 @@ class TrustNetwork:
         visited = set()
         clusters = []
         for aid in agent_ids:
-            if aid in visited:
+            if aid in visited or (seeds is not None and aid not in seeds):
                 continue
             cluster = set()
             stack = [aid]
@@ -563,6 +762,109 @@ class TrustNetwork:
 
         return sorted(clusters, key=len, reverse=True)
 
+    def get_low_conductance_sets(self, agent_ids: list[str], threshold: float = 0.5,
+                                 min_size: int = 3, max_size: int = None,
+                                 teleport: float = 0.15,
+                                 epsilon: float = 1e-3,
+                                 seeds: set = None) -> list[set]:
+        """
+        Find insular groups via personalized PageRank + sweep cuts.
+
+        Components split only where trust drops below the threshold, so a
+        single bridge edge merges a ring into its host community. A sweep
+        cut instead looks for the prefix of a random-walk ranking with the
+        lowest conductance (boundary weight / volume), which isolates a
+        dense group even when a few edges leak out of it.
+
+        Graph: mutual trust edges with both directions ≥ threshold,
+        weighted by the weaker direction. PageRank uses the push algorithm
+        (Andersen-Chung-Lang) — work per seed is O(1/(ε·teleport)),
+        independent of population size, so sweeping every uncovered seed
+        stays near-linear in the number of edges.
+
+        Returns sets with conductance < 1/3, i.e. more trust weight inside
+        the set than crossing its boundary (vol = 2·internal + boundary).
+        With seeds, only walks started from those agents are swept.
+        """
+        adj: dict[str, dict[str, float]] = {aid: {} for aid in agent_ids}
+        for (a, b), state in self.edges.items():
+            if a < b and a in adj and b in adj and state.direct_trust >= threshold:
+                reverse = self.edges.get((b, a))
+                if reverse and reverse.direct_trust >= threshold:
+                    weight = min(state.direct_trust, reverse.direct_trust)
+                    adj[a][b] = weight
+                    adj[b][a] = weight
+
+        degree = {aid: sum(nbrs.values()) for aid, nbrs in adj.items()}
+        total_volume = sum(degree.values())
+        if total_volume == 0:
+            return []
+        if max_size is None:
+            max_size = len(agent_ids)
+
+        candidates = []
+        seen = set()
+        covered = set()
+        for seed in sorted(agent_ids):  # Deterministic order
+            if seeds is not None and seed not in seeds:
+                continue
+            if seed in covered or degree[seed] == 0:
+                continue
+
+            # ─── Personalized PageRank (lazy walk, push algorithm) ───
+            rank: dict[str, float] = {}
+            residual = {seed: 1.0}
+            queue = [seed]
+            while queue:
+                u = queue.pop()
+                r_u = residual.get(u, 0.0)
+                d_u = degree[u]
+                if r_u < epsilon * d_u:
+                    continue
+                rank[u] = rank.get(u, 0.0) + teleport * r_u
+                spread = (1.0 - teleport) * r_u / (2.0 * d_u)
+                residual[u] = (1.0 - teleport) * r_u / 2.0
+                if residual[u] >= epsilon * d_u:
+                    queue.append(u)
+                for v, w in adj[u].items():
+                    before = residual.get(v, 0.0)
+                    residual[v] = before + spread * w
+                    if before < epsilon * degree[v] <= residual[v]:
+                        queue.append(v)
+
+            # ─── Sweep cut over degree-normalized rank ───
+            order = sorted(rank, key=lambda v: (-rank[v] / degree[v], v))
+            in_set = set()
+            volume = 0.0
+            boundary = 0.0
+            best, best_phi = 0, 1.0 / 3.0
+            for k, v in enumerate(order[:max_size], start=1):
+                inside = sum(w for nbr, w in adj[v].items() if nbr in in_set)
+                in_set.add(v)
+                volume += degree[v]
+                boundary += degree[v] - 2.0 * inside
+                denom = min(volume, total_volume - volume)
+                if k < min_size or denom <= 0:
+                    continue
+                phi = boundary / denom
+                if phi < best_phi:
+                    best, best_phi = k, phi
+
+            if best:
+                found = frozenset(order[:best])
+                covered.update(found)
+                if found not in seen:
+                    seen.add(found)
+                    candidates.append(set(found))
+
+        return sorted(candidates, key=lambda c: (len(c), sorted(c)))
+
+    def pop_dirty_agents(self) -> set[str]:
+        """Pop and return agents touched by a threshold crossing."""
+        dirty = self.dirty_agents
+        self.dirty_agents = set()
+        return dirty
+
     def pop_events(self) -> list[dict]:
         """Pop and return accumulated events."""
         events = self.events
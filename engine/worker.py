@@ -0,0 +1,361 @@
+"""
+AEZ Evolution v2 — Simulation Worker Processes
+
+The pool ran every tenant's actor as a thread of the server's own
+interpreter: one GIL for all of them, one set of module-level random
+streams drawn by all of them, and no way to stop one analyst's
+2,000-agent sandbox from slowing everybody else's.
+
+A SimulationProcess hosts one Simulation in a child interpreter
+(python -m engine.worker). The parent keeps the actor model of
+engine/actor.py: the simulation's actor thread sends one command at a
+time down the child's pipe and blocks for the reply, so commands stay
+in FIFO order and the event loop never waits. Each reply carries the
+command's result plus what readers on the event loop need without a
+round trip — the latest RoundSnapshot (only when a new one was
+published), the dirty flag, the metrics and the worker's CPU and memory
+use. Snapshot reads stay local; a publish costs one pickle of the
+snapshot instead of one per read.
+
+Quotas are enforced by the kernel on the child:
+
+    cpu_seconds   RLIMIT_CPU, per simulation: a checkpoint records the
+                  CPU time its workers used, and a resumed worker gets
+                  only what is left. When it runs out the command in
+                  flight fails with QuotaExceeded and the worker exits;
+                  the last published snapshot stays readable.
+    memory_mb     RLIMIT_AS: an allocation past it raises MemoryError
+                  in the command that made it.
+
+Each worker seeds its own random and numpy streams (from the create
+request's seed, or fresh entropy) and its checkpoints carry them, so a
+resumed simulation continues the same random sequence as one that was
+never evicted.
+
+Frames on the pipes are a 4-byte big-endian length and a pickle. Pickle
+is only ever exchanged with children this process started.
+"""
+
+import math
+import os
+import pickle
+import random
+import signal
+import struct
+import subprocess
+import sys
+from typing import Optional
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:      # no rlimits (Windows): quotas cannot be enforced
+    resource = None
+
+from .actor import Simulation
+from .metrics import process_memory
+
+_HEADER = struct.Struct('>I')
+# CPU seconds a worker may spend reporting QuotaExceeded before the
+# hard limit kills it
+CPU_GRACE = 2
+
+
+class QuotaExceeded(RuntimeError):
+    """The simulation used up its CPU quota; it accepts no more commands."""
+
+
+class WorkerExited(RuntimeError):
+    """The simulation's worker process is gone."""
+
+
+# ─── Frames ──────────────────────────────────────────────
+
+def write_frame(stream, obj):
+    payload = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+    stream.write(_HEADER.pack(len(payload)) + payload)
+    stream.flush()
+
+
+def read_frame(stream):
+    """The next object on the stream, or None at end of stream."""
+    header = stream.read(_HEADER.size)
+    if len(header) < _HEADER.size:
+        return None
+    payload = stream.read(_HEADER.unpack(header)[0])
+    return pickle.loads(payload)
+
+
+# ─── Checkpoints ─────────────────────────────────────────
+
+def save_checkpoint(path: str, state):
+    """Pickle `state` to path atomically: readers see the previous file
+    or the complete new one, never a partial write."""
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def load_checkpoint(path: str):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+
+# ─── Child ───────────────────────────────────────────────
+
+def _cpu_time() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _quota_exceeded(signum, frame):
+    raise QuotaExceeded("CPU quota exhausted")
+
+
+class _Worker:
+    """The child's side: one Simulation and its quota accounting."""
+
+    def __init__(self):
+        self.sim: Optional[Simulation] = None
+        self.cpu_used = 0.0        # by earlier workers (from the checkpoint)
+        self.cpu_started = 0.0     # this process's CPU time when the sim arrived
+        self.sent_version = None   # snapshot version the parent already has
+        self.exhausted = False
+
+    def create(self, population: int, sim_id: str, seed: Optional[int],
+               cpu_seconds: Optional[float], memory_mb: Optional[int]):
+        random.seed(seed)
+        np.random.seed(None if seed is None else seed % 2**32)
+        self._limit(cpu_seconds, memory_mb)
+        self.sim = Simulation(population, sim_id)
+
+    def load(self, path: str, cpu_seconds: Optional[float], memory_mb: Optional[int]):
+        state = load_checkpoint(path)
+        random.setstate(state['random'])
+        np.random.set_state(state['numpy'])
+        self.cpu_used = state['cpu_used']
+        self._limit(cpu_seconds, memory_mb)
+        self.sim = state['sim']
+
+    def save(self, path: str):
+        save_checkpoint(path, {'sim': self.sim, 'random': random.getstate(),
+                               'numpy': np.random.get_state(),
+                               'cpu_used': self.cpu_seconds()})
+
+    def call(self, name: str, args: tuple):
+        return getattr(self.sim, name)(*args)
+
+    def _limit(self, cpu_seconds: Optional[float], memory_mb: Optional[int]):
+        if resource is None:
+            if cpu_seconds is not None or memory_mb is not None:
+                raise ValueError("Quotas need resource limits (POSIX only)")
+            return
+        self.cpu_started = _cpu_time()
+        if cpu_seconds is not None:
+            remaining = max(cpu_seconds - self.cpu_used, 0.0)
+            soft = math.ceil(self.cpu_started + remaining)
+            signal.signal(signal.SIGXCPU, _quota_exceeded)
+            resource.setrlimit(resource.RLIMIT_CPU, (soft, soft + CPU_GRACE))
+            if remaining == 0:
+                raise QuotaExceeded("CPU quota exhausted")
+        if memory_mb is not None:
+            cap = memory_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (cap, cap))
+
+    def cpu_seconds(self) -> float:
+        """CPU time this simulation has used, across resumes."""
+        if resource is None:
+            return self.cpu_used
+        return self.cpu_used + _cpu_time() - self.cpu_started
+
+    def state(self) -> dict:
+        """What the parent mirrors after every command."""
+        state = {'cpu_seconds': self.cpu_seconds(), 'memory': process_memory()}
+        sim = self.sim
+        if sim is not None:
+            state['dirty'] = sim.dirty
+            state['metrics'] = sim.metrics
+            if sim.snapshot is not None and sim.snapshot.version != self.sent_version:
+                state['snapshot'] = sim.snapshot
+                self.sent_version = sim.snapshot.version
+        return state
+
+    def handle(self, op: str, args: tuple) -> tuple:
+        try:
+            result = getattr(self, op)(*args)
+            return 'ok', result, self.state()
+        except QuotaExceeded as e:
+            self.exhausted = True
+            return 'error', e, self.state()
+        except Exception as e:
+            return 'error', e, self.state()
+
+
+def main():
+    # The channel back to the parent is a private copy of stdout; fd 1
+    # itself goes to stderr so a stray print cannot corrupt a frame
+    replies = os.fdopen(os.dup(1), 'wb')
+    os.dup2(2, 1)
+    requests = sys.stdin.buffer
+    worker = _Worker()
+    while not worker.exhausted:
+        request = read_frame(requests)
+        if request is None:
+            return
+        op, args = request
+        write_frame(replies, worker.handle(op, args))
+
+
+# ─── Parent ──────────────────────────────────────────────
+
+class _RemoteCommand:
+    """A Simulation method, run in the worker."""
+    __slots__ = ('process', 'name')
+
+    def __init__(self, process: 'SimulationProcess', name: str):
+        self.process = process
+        self.name = name
+
+    def __call__(self, *args):
+        return self.process.request('call', self.name, args)
+
+
+class SimulationProcess:
+    """
+    The parent's handle on one worker. Simulation methods are proxied
+    (`proc.step(5)` runs step in the child and blocks for the result),
+    so like a Simulation it must only be called on its actor's thread.
+    `snapshot`, `dirty` and `metrics` are local mirrors any thread may
+    read.
+    """
+
+    def __init__(self, sim_id: str, cpu_seconds: Optional[float] = None,
+                 memory_mb: Optional[int] = None):
+        self.id = sim_id
+        self.cpu_quota = cpu_seconds
+        self.memory_quota = memory_mb
+        self.snapshot = None
+        self.dirty = False
+        self.metrics = None
+        self.cpu_seconds = 0.0
+        self.memory: Optional[int] = None
+        self.exhausted = False
+        self._proc: Optional[subprocess.Popen] = None
+
+    # ─── Lifecycle ───────────────────────────────────────
+
+    def create(self, population: int, seed: Optional[int] = None) -> 'SimulationProcess':
+        self._spawn()
+        self.request('create', population, self.id, seed, self.cpu_quota, self.memory_quota)
+        return self
+
+    def load(self, path: str) -> 'SimulationProcess':
+        self._spawn()
+        self.request('load', path, self.cpu_quota, self.memory_quota)
+        return self
+
+    def save(self, path: str):
+        self.request('save', path)
+
+    def _spawn(self):
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [root, env.get('PYTHONPATH')]))
+        # One core per worker: the pool's `workers` bounds parallelism
+        for var in ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS'):
+            env.setdefault(var, '1')
+        self._proc = subprocess.Popen([sys.executable, '-m', 'engine.worker'],
+                                      stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                      env=env)
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self._proc.pid if self._proc is not None else None
+
+    @property
+    def alive(self) -> bool:
+        return self._proc is not None and self._proc.poll() is None
+
+    def close(self):
+        """Stop the worker after its current command (its simulation is
+        discarded unless saved)."""
+        proc, self._proc = self._proc, None
+        if proc is None:
+            return
+        try:
+            proc.stdin.close()        # end of stream: the worker returns
+        except BrokenPipeError:
+            pass
+        try:
+            proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+        proc.stdout.close()
+
+    def kill(self):
+        """Stop the worker now, mid-command if need be."""
+        proc, self._proc = self._proc, None
+        if proc is None:
+            return
+        proc.kill()
+        proc.wait()
+        for pipe in (proc.stdin, proc.stdout):
+            try:
+                pipe.close()
+            except OSError:
+                pass
+
+    # ─── Commands ────────────────────────────────────────
+
+    def request(self, op: str, *args):
+        if self.exhausted:
+            raise QuotaExceeded(f"Simulation {self.id} exhausted its CPU quota")
+        proc = self._proc
+        if proc is None:
+            raise WorkerExited(f"Simulation {self.id} has no worker")
+        try:
+            write_frame(proc.stdin, (op, args))
+            reply = read_frame(proc.stdout)
+        except (OSError, ValueError, EOFError):   # pipes closed under us
+            reply = None
+        if reply is None:
+            code = proc.wait()
+            if self._proc is not proc:            # closed or killed by the pool
+                raise WorkerExited(f"Simulation {self.id} worker stopped")
+            self.kill()
+            if self.cpu_quota is not None and code in (-signal.SIGKILL, -signal.SIGXCPU):
+                self.exhausted = True
+                raise QuotaExceeded(f"Simulation {self.id} exhausted its CPU quota")
+            raise WorkerExited(f"Simulation {self.id} worker exited ({code})")
+        status, result, state = reply
+        self._mirror(state)
+        if status == 'error':
+            if isinstance(result, QuotaExceeded):
+                self.exhausted = True
+                self.close()
+            raise result
+        return result
+
+    def _mirror(self, state: dict):
+        self.cpu_seconds = state['cpu_seconds']
+        self.memory = state['memory']
+        if 'metrics' in state:
+            self.metrics = state['metrics']
+            self.dirty = state['dirty']
+        if 'snapshot' in state:
+            self.snapshot = state['snapshot']
+
+    def __getattr__(self, name: str) -> _RemoteCommand:
+        # Only reached for names not set above: Simulation's commands
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return _RemoteCommand(self, name)
+
+
+if __name__ == '__main__':
+    main()
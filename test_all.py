@@ -865,6 +865,1663 @@ test("Memory capped at child capacity",
      f"memory={len(capped_child.threat_memory)}, cap={capped_child.memory_capacity}")
 
 
+print("\n--- 22. Vectorized Ring Evidence Test ---")
+
+np.random.seed(42)
+random.seed(42)
+evo_vec = Evolution(population_size=30)
+evo_vec.spawn_population()
+for _ in range(30):
+    evo_vec.run_round()
+
+vec_ids = sorted(a.id for a in evo_vec.get_alive())
+vec_index = set(vec_ids)
+alpha_e, beta_e = evo_vec.trust_net.edge_evidence(vec_ids)
+ref_evidence = [(s.alpha, s.beta) for (a, b), s in evo_vec.trust_net.edges.items()
+                if a in vec_index and b in vec_index and a != b]
+test("Edge evidence matches edge dict",
+     sorted(zip(alpha_e.tolist(), beta_e.tolist())) == sorted(ref_evidence),
+     f"edges={alpha_e.size}, expected={len(ref_evidence)}")
+
+vec_members = vec_ids[:6]
+a_in, _, a_out, _ = evo_vec.trust_net.incoming_evidence(vec_members, vec_index)
+ref_in = sum(1 for a, b in evo_vec.trust_net.edges
+             if b in vec_members and a in vec_members and a != b)
+ref_out = sum(1 for a, b in evo_vec.trust_net.edges
+              if b in vec_members and a in vec_index and a not in vec_members)
+test("Incoming evidence splits internal and external edges",
+     a_in.size == ref_in and a_out.size == ref_out, f"in={a_in.size}/{ref_in} out={a_out.size}/{ref_out}")
+
+# Reference: the per-edge loop the vectorized pass replaces
+ref_trusts = [s.direct_trust for (a, b), s in evo_vec.trust_net.edges.items()
+              if a in vec_index and b in vec_index and a != b and s.alpha + s.beta >= 4]
+ring_ev = evo_vec.immune._gather_ring_evidence(evo_vec.trust_net, vec_ids)
+test("Vectorized evidence gathered", ring_ev is not None)
+if ring_ev is not None:
+    test("Vectorized mu matches edge loop",
+         abs(ring_ev['mu_trust'] - np.mean(ref_trusts)) < 1e-12)
+    test("Vectorized sigma matches edge loop",
+         abs(ring_ev['sigma_trust'] - np.std(ref_trusts)) < 1e-12)
+
+# A planted ring passes the z-test; an honest slice of the population does not
+ring_net = TrustNetwork()
+ring_pop = [f"H{i:02d}" for i in range(20)]
+ring_members = ["R0", "R1", "R2", "R3"]
+for i, h in enumerate(ring_pop):
+    for _ in range(4):
+        ring_net.update(h, ring_pop[(i + 1) % 20], True, True)
+        ring_net.update(h, ring_pop[(i + 3) % 20], True, i % 4 != 0)
+for r in ring_members:
+    for other in ring_members:
+        if r < other:
+            for _ in range(8):
+                ring_net.update(r, other, True, True)
+    for h in ring_pop[:8]:
+        for _ in range(3):
+            ring_net.update(h, r, True, False)
+ring_all = sorted(ring_pop + ring_members)
+ring_ev2 = ImmuneSystem()._gather_ring_evidence(ring_net, ring_all)
+test("Planted ring detected by z-test",
+     ring_ev2 is not None and
+     ImmuneSystem()._test_ring_candidate(ring_members, ring_net, set(ring_all),
+                                         ring_ev2) is not None)
+test("Honest group not flagged by z-test",
+     ring_ev2 is not None and
+     ImmuneSystem()._test_ring_candidate(ring_pop[:4], ring_net, set(ring_all),
+                                         ring_ev2) is None)
+
+
+print("\n--- 23. Sweep-Cut Ring Candidates Test ---")
+
+# A ring joined to an honest community by one bridge edge:
+# components merge them, a conductance sweep separates the ring.
+bridge_net = TrustNetwork()
+bridge_honest = [f"B{i:02d}" for i in range(12)]
+bridge_ring = ["Q0", "Q1", "Q2", "Q3"]
+for grp in (bridge_honest, bridge_ring):
+    for i, a in enumerate(grp):
+        for b in grp[i + 1:]:
+            for _ in range(6):
+                bridge_net.update(a, b, True, True)
+for _ in range(6):
+    bridge_net.update("Q0", "B00", True, True)
+bridge_ids = sorted(bridge_honest + bridge_ring)
+
+bridge_components = bridge_net.get_clusters(bridge_ids, threshold=0.8)
+test("Bridge merges ring into one component",
+     len(bridge_components) == 1 and len(bridge_components[0]) == 16)
+sweep_sets = bridge_net.get_low_conductance_sets(
+    bridge_ids, threshold=0.8, max_size=len(bridge_ids) // 3)
+test("Sweep cut isolates the bridged ring", set(bridge_ring) in sweep_sets,
+     f"sets={[sorted(s) for s in sweep_sets]}")
+test("Sweep cut respects size bound", all(len(s) <= len(bridge_ids) // 3 for s in sweep_sets))
+test("Sweep cut on empty graph", TrustNetwork().get_low_conductance_sets(["Z1", "Z2"]) == [])
+
+try:
+    ImmuneSystem(candidate_generator="bogus")
+    test("Unknown candidate generator rejected", False)
+except ValueError:
+    test("Unknown candidate generator rejected", True)
+
+np.random.seed(42)
+random.seed(42)
+evo_sweep = Evolution(population_size=30, ring_candidates='sweep')
+evo_sweep.spawn_population()
+for _ in range(15):
+    evo_sweep.run_round()
+sweep_sybils = Attacks.sybil_attack(evo_sweep, 8)
+for _ in range(60):
+    evo_sweep.run_round()
+    if evo_sweep.round % 20 == 0:
+        evo_sweep.run_selection()
+sweep_flagged = [a for a in evo_sweep.get_alive() if a.flagged_sybil]
+sweep_caught = [a for a in sweep_flagged if a.id in sweep_sybils]
+test("Sweep generator feeds the z-test (sybils caught)", len(sweep_caught) >= 3,
+     f"caught={len(sweep_caught)}/8")
+test("Sweep generator low false positives",
+     len(sweep_flagged) - len(sweep_caught) <= 1,
+     f"fp={len(sweep_flagged) - len(sweep_caught)}")
+
+
+print("\n--- 24. Event-Driven Ring Detection Test ---")
+
+cross_net = TrustNetwork()
+cross_net.update("C1", "C2", True, True)
+test("No crossings tracked by default", len(cross_net.dirty_agents) == 0)
+cross_net.track_crossings = True
+cross_net.crossing_threshold = 0.8
+for _ in range(4):
+    cross_net.update("C1", "C2", True, True)
+test("Upward crossing marks both endpoints dirty",
+     cross_net.dirty_agents == {"C1", "C2"})
+test("Dirty set pops once", cross_net.pop_dirty_agents() == {"C1", "C2"}
+     and not cross_net.dirty_agents)
+for _ in range(4):
+    cross_net.update("C1", "C2", True, True)
+test("Stable edge above threshold stays clean", not cross_net.dirty_agents)
+
+seeded = tn2.get_clusters(agents_top, threshold=0.5, seeds={"X4"})
+test("Seeded clusters return only touched components",
+     all("X4" in c for c in seeded))
+
+
+def first_ring_round(online: bool):
+    np.random.seed(7)
+    random.seed(7)
+    evo_on = Evolution(population_size=40, online_ring_detection=online)
+    evo_on.spawn_population()
+    for _ in range(10):
+        evo_on.run_round()
+    Attacks.sybil_attack(evo_on, 8)
+    for _ in range(50):
+        evo_on.run_round()
+        for event in evo_on.pop_events():
+            if event['type'] == 'ring_detected':
+                return evo_on, evo_on.round
+    return evo_on, None
+
+
+evo_fixed, fixed_round = first_ring_round(False)
+evo_online, online_round = first_ring_round(True)
+test("Online mode detects the ring", online_round is not None)
+test("Online detection no later than fixed interval",
+     online_round is not None and (fixed_round is None or online_round <= fixed_round),
+     f"online={online_round}, fixed={fixed_round}")
+test("Online mode sets data-derived crossing threshold",
+     evo_online.trust_net.crossing_threshold is not None)
+test("Fixed mode leaves crossing tracking off",
+     not evo_fixed.trust_net.track_crossings and not evo_fixed.trust_net.dirty_agents)
+
+online_ids = sorted(a.id for a in evo_online.get_alive() if not a.flagged_sybil)
+edge_passes = []
+full_pass = evo_online.trust_net.edge_evidence
+
+
+def recording_pass(agent_ids):
+    edge_passes.append(len(agent_ids))
+    return full_pass(agent_ids)
+
+
+evo_online.trust_net.edge_evidence = recording_pass
+cached_stats = evo_online.immune.ring_stats
+evo_online.trust_net.dirty_agents = set(online_ids)
+evo_online.immune.run_online_detection(evo_online.agents, evo_online.trust_net,
+                                       evo_online.round)
+del evo_online.trust_net.edge_evidence
+test("Online detection reuses the last full cycle's statistics",
+     cached_stats is not None and evo_online.immune.ring_stats is cached_stats)
+test("Online detection makes no population-wide evidence pass", not edge_passes)
+
+seed_net = TrustNetwork()
+for _ in range(5):
+    seed_net.update("P1", "P2", True, True)
+    seed_net.update("Q", "P1", True, True)
+seed_net.track_crossings = True
+seed_net.crossing_threshold = 0.7
+seed_net.seed_child_trust("K", "P1", "P2", ["P1", "P2", "Q", "K"])
+test("Seeded child edges above the threshold mark endpoints dirty",
+     {"Q", "K"} <= seed_net.dirty_agents)
+
+
+print("\n--- 25. Adaptive Immune Scheduling Test ---")
+
+from engine.immune import ImmuneScheduler
+
+sched = ImmuneScheduler()
+sched.observe_round(0, 0, [])
+test("No new interactions → cycle skipped", sched.due(alive_count=40, interval=4) is None)
+sched.observe_round(20, 0, [])
+test("Partial budget → cycle deferred", sched.due(alive_count=40, interval=4) is None)
+sched.observe_round(60, 0, [])
+test("Evidence budget met → cycle runs",
+     sched.due(alive_count=40, interval=4) == 'evidence_budget')
+sched.record_cycle(10, 'evidence_budget', set())
+test("Cycle resets evidence", sched.interactions == 0 and sched.rounds_since == 0)
+test("Cycle reason logged", sched.log[-1]['reason'] == 'evidence_budget'
+     and sched.log[-1]['interactions'] == 80)
+
+sched.observe_round(5, 2, [{'type': 'betrayal'}, {'type': 'death'}])
+test("Betrayal signal triggers early cycle",
+     sched.due(alive_count=40, interval=4) == 'betrayal_signal')
+sched.record_cycle(11, 'betrayal_signal', set())
+for _ in range(8):
+    sched.observe_round(1, 0, [])
+test("Deferral cap bounds latency", sched.due(alive_count=40, interval=4) == 'deferral_cap')
+
+try:
+    Evolution(population_size=20, immune_schedule="sometimes")
+    test("Unknown immune schedule rejected", False)
+except ValueError:
+    test("Unknown immune schedule rejected", True)
+
+np.random.seed(42)
+random.seed(42)
+evo_sched = Evolution(population_size=30, immune_schedule='adaptive')
+evo_sched.spawn_population()
+for _ in range(40):
+    evo_sched.run_round()
+sched_log = evo_sched.immune_scheduler.log
+test("Adaptive schedule runs cycles", len(sched_log) > 0)
+test("Every cycle reports why it ran",
+     all(entry['reason'] in ('evidence_budget', 'betrayal_signal', 'deferral_cap')
+         for entry in sched_log))
+test("Round stats carry the cycle reason",
+     sum(1 for s in evo_sched.round_stats if s['immune_reason']) == len(sched_log))
+test("No cycle before the minimum start",
+     all(entry['round'] >= evo_sched._immune_min_start for entry in sched_log))
+test("Fixed schedule reports interval reason",
+     all(s['immune_reason'] in (None, 'interval') for s in evo2.round_stats))
+
+
+print("\n--- 27. Packed History Buffer Test ---")
+
+from engine.history import InteractionBuffer, ActionBuffer, InteractionHistory
+
+pairs = [(i % 2 == 0, i % 3 == 0) for i in range(70)]
+buf = InteractionBuffer(capacity=50)
+for pr in pairs:
+    buf.append(pr)
+test("Buffer caps at capacity", len(buf) == 50)
+test("Buffer keeps the most recent window", list(buf) == pairs[-50:])
+test("Negative indexing reads newest", buf[-1] == pairs[-1] and buf[0] == pairs[-50])
+test("Running counters match window",
+     buf.my_coops == sum(m for m, _ in pairs[-50:]) and
+     buf.their_coops == sum(t for _, t in pairs[-50:]))
+test("Last opponent action read directly", buf.their_last == pairs[-1][1])
+test("Packed storage is 2 bits per interaction", len(buf._bits) == 13)
+
+acts = ActionBuffer(capacity=100)
+for i in range(130):
+    acts.append(i % 4 != 0)
+test("Action buffer caps at capacity", len(acts) == 100)
+test("Action buffer counter tracks window",
+     acts.coops == sum(1 for i in range(30, 130) if i % 4 != 0))
+
+hist = InteractionHistory()
+hist["opp"] = [(True, False)] * 3
+test("Assigned list packed into buffer", isinstance(hist["opp"], InteractionBuffer))
+hist.record("opp", False, True)
+test("History record appends", len(hist["opp"]) == 4 and hist["opp"].their_coops == 1)
+
+hist_agent = NeuralAgent(id="HIST001")
+for i in range(120):
+    hist_agent.record("h_opp", i % 2 == 0, i % 5 != 0, 10)
+test("Agent history window is 50", len(hist_agent.history["h_opp"]) == 50)
+test("Agent action sequence window is 100", len(hist_agent.action_sequence) == 100)
+test("Features read opponent rate from counters",
+     abs(hist_agent._build_features("h_opp", ctx)[0] -
+         sum(1 for i in range(70, 120) if i % 5 != 0) / 50) < 1e-12)
+
+
+# ─── 28. Shared Pair Log Test ────────────────────────────
+print("\n--- 28. Shared Pair Log Test ---")
+
+from engine.history import PairLog, SharedHistory
+
+plog = PairLog()
+pa, pb = NeuralAgent(id="PL_B"), NeuralAgent(id="PL_A")
+pa.record("PL_A", True, False, 10, False)  # recorded standalone, then imported
+plog.bind(pa)
+plog.bind(pb)
+test("Bind imports standalone history",
+     list(pa.history["PL_A"]) == [(True, False)] and pb.history["PL_B"][-1] == (False, True))
+test("Bind imports commitments", pa.commitment_history["PL_A"] == [0, 1])
+
+both_log = PairLog()
+ba, bb = NeuralAgent(id="PB_A"), NeuralAgent(id="PB_B")
+for i in range(4):  # same interactions, recorded standalone on each side
+    ba.record("PB_B", True, i % 2 == 0, 10, i != 0)
+    bb.record("PB_A", i % 2 == 0, True, 10, True)
+before_a = list(ba.commitment_history["PB_B"])
+before_b = list(bb.commitment_history["PB_A"])
+both_log.bind(ba)
+both_log.bind(bb)
+test("Bind merges commitments when both agents have history",
+     ba.commitment_history["PB_B"] == before_a == [3, 1]
+     and bb.commitment_history["PB_A"] == before_b == [4, 0])
+test("Bind keeps one copy of the shared actions",
+     len(ba.history["PB_B"]) == 4 and len(both_log) == 1)
+for i in range(60):
+    plog.record("PL_B", "PL_A", i % 2 == 0, i % 3 == 0, True, i % 4 != 0)
+test("One record per unordered pair", len(plog) == 1)
+test("Both agents read the same window",
+     [(t, m) for m, t in pa.history["PL_A"]] == list(pb.history["PL_B"]))
+test("Shared window capped at 50", len(pa.history["PL_A"]) == 50)
+test("Commitment view counts opponent's honors",
+     pa.commitment_history["PL_A"] == [45, 16] and pb.commitment_history["PL_B"] == [60, 0])
+test("Agent history is a shared view", isinstance(pa.history, SharedHistory))
+
+shared_net = TrustNetwork(pair_log=plog)
+shared_net.update("PL_B", "PL_A", True, False, True, False)
+edge = shared_net.edges[("PL_B", "PL_A")]
+test("Trust edge binds to the pair", edge.pair is not None and edge.action_window == [])
+test("Edge window read from the log",
+     edge.pair.their_recent(15) == [m for _, m in pa.history["PL_A"]][-15:])
+
+def shared_run(shared):
+    np.random.seed(11)
+    random.seed(11)
+    e = Evolution(population_size=20, shared_history=shared)
+    e.spawn_population()
+    Attacks.sybil_attack(e, 4)
+    for _ in range(40):
+        e.run_round()
+    e.run_selection()
+    for _ in range(10):
+        e.run_round()
+    edges = e.trust_net.edges
+    return ([round(a.fitness, 6) for a in e.agents.values()],
+            {k: (round(s.temporal_trust, 9), round(s.commitment_reliability, 9))
+             for k, s in edges.items()},
+            sorted(a.id for a in e.agents.values() if a.flagged_sybil))
+
+test("Shared log reproduces per-agent copies", shared_run(True) == shared_run(False))
+
+
+# ─── 29. Dead Agent Collection Test ─────────────────────
+print("\n--- 29. Dead Agent Collection Test ---")
+
+np.random.seed(5)
+random.seed(5)
+gc_evo = Evolution(population_size=20, dead_retention=0)
+gc_evo.spawn_population()
+for gen in range(3):
+    for _ in range(15):
+        gc_evo.run_round()
+    gc_evo.run_selection()
+gone = {d.id for d in gc_evo.graveyard}
+test("Dead agents archived", len(gone) > 0)
+test("Archived agents leave the agent table", not gone & gc_evo.agents.keys())
+test("No live agent is dead", all(a.alive for a in gc_evo.agents.values()))
+test("Edges touching the dead are purged",
+     not any(s in gone or d in gone for s, d in gc_evo.trust_net.edges))
+test("Pair log purged", not any(a in gone or b in gone for a, b in gc_evo.pair_log.pairs)
+     and not gone & gc_evo.pair_log.views.keys())
+test("Survivor records purged",
+     all(not gone & a.history.keys() and not gone & a.suspicion_scores.keys()
+         and not gone & set(a.commitment_history) for a in gc_evo.agents.values()))
+first = gc_evo.graveyard[0]
+test("Summary keeps cause, fitness and strategy",
+     first.cause in ('bankrupt', 'selection') and isinstance(first.fitness, float)
+     and isinstance(first.strategy, str))
+for _ in range(5):
+    gc_evo.run_round()
+test("Simulation continues after collection", gc_evo.round == 50)
+
+np.random.seed(5)
+random.seed(5)
+keep_evo = Evolution(population_size=20, dead_retention=2)
+keep_evo.spawn_population()
+for _ in range(15):
+    keep_evo.run_round()
+keep_evo.run_selection()
+test("Retention keeps recent dead", any(not a.alive for a in keep_evo.agents.values())
+     and not keep_evo.graveyard)
+try:
+    Evolution(population_size=20, dead_retention=-1)
+    test("Negative retention rejected", False)
+except ValueError:
+    test("Negative retention rejected", True)
+
+np.random.seed(5)
+random.seed(5)
+small_yard = Evolution(population_size=20, dead_retention=0, graveyard_size=3)
+small_yard.spawn_population()
+for gen in range(3):
+    for _ in range(15):
+        small_yard.run_round()
+    small_yard.run_selection()
+test("Graveyard keeps only the latest summaries",
+     len(small_yard.graveyard) == 3 and small_yard.archived_total == len(gone)
+     and [d.id for d in small_yard.graveyard] == [d.id for d in gc_evo.graveyard][-3:])
+
+
+# ─── 30. Incremental Strategy Label Test ────────────────
+print("\n--- 30. Incremental Strategy Label Test ---")
+
+def rescan_mirrors(hist):
+    pairs = list(hist)
+    return (sum(1 for i in range(1, len(pairs)) if pairs[i][0] == pairs[i - 1][1]),
+            max(len(pairs) - 1, 0))
+
+mbuf = InteractionBuffer(capacity=50)
+rng_m = random.Random(7)
+for _ in range(140):
+    mbuf.append((rng_m.random() < 0.5, rng_m.random() < 0.5))
+test("Buffer mirror counters survive eviction",
+     (mbuf.mirrors, mbuf.links) == rescan_mirrors(mbuf))
+
+mplog = PairLog()
+for _ in range(90):
+    mplog.record("M_A", "M_B", rng_m.random() < 0.5, rng_m.random() < 0.5)
+test("Pair log mirror counters per side",
+     (mplog.views["M_A"].mirrors, mplog.views["M_A"].links) == rescan_mirrors(mplog.views["M_A"]["M_B"])
+     and (mplog.views["M_B"].mirrors, mplog.views["M_B"].links) == rescan_mirrors(mplog.views["M_B"]["M_A"]))
+
+tft = NeuralAgent(id="TFT001")
+their_prev = True
+for i in range(60):
+    theirs = i % 3 != 0
+    tft.record(f"tft_opp{i % 4}", their_prev, theirs, 10)
+    their_prev = theirs
+tft_hist = tft.history
+test("Agent totals match full rescan",
+     (tft_hist.mirrors, tft_hist.links) ==
+     tuple(map(sum, zip(*(rescan_mirrors(h) for h in tft_hist.values())))))
+label = tft.get_strategy_label()
+test("Label served from cache", tft.get_strategy_label() is label and tft._label_cache[1] == label)
+tft.record("tft_opp0", False, False, -10)
+test("Cache invalidated when inputs change", tft._label_cache[0][0] != tft.interactions)
+tft.get_strategy_label()
+test("Cache refreshed on next call", tft._label_cache[0][0] == tft.interactions)
+del tft.history["tft_opp0"]
+test("Totals follow history deletion",
+     (tft.history.mirrors, tft.history.links) ==
+     tuple(map(sum, zip(*(rescan_mirrors(h) for h in tft.history.values())))))
+
+
+# ─── 31. Cached Cooperation Probability Test ────────────
+print("\n--- 31. Cached Cooperation Probability Test ---")
+
+from engine.agent import cooperation_probabilities
+
+np.random.seed(21)
+random.seed(21)
+cp_evo = Evolution(population_size=15)
+cp_evo.spawn_population()
+for _ in range(5):
+    cp_evo.run_round()
+cp_alive = cp_evo.get_alive()
+direct = [a._forward(a._build_features('__generic__', NeuralAgent.GENERIC_CONTEXT)) for a in cp_alive]
+for a in cp_alive:
+    a._coop_prob_cache = None
+batched = cooperation_probabilities(cp_alive)
+test("Batched pass matches per-agent forward", np.allclose(batched, direct, atol=1e-12))
+test("Batched pass fills the cache",
+     all(a._coop_prob_cache is not None for a in cp_alive))
+cp_agent = cp_alive[0]
+cp_agent._coop_prob_cache = (cp_agent._generic_key(), -1.0)
+test("to_dict served from cache", cp_agent.to_dict()['coop_probability'] == -1.0)
+mutate(cp_agent, rate=1.0)
+test("Mutation invalidates cache", cp_agent._coop_prob_cache is None)
+cp_agent.get_cooperation_probability()
+cp_agent.balance += 100
+test("Balance change misses the cache",
+     cp_agent._coop_prob_cache[0] != cp_agent._generic_key())
+cp_agent.get_cooperation_probability()
+Attacks.trojan_attack(cp_evo, 1, betray_round=cp_evo.round)
+trojan = cp_evo.agents[max(cp_evo.agents)]
+trojan.get_cooperation_probability()
+Attacks.activate_trojans(cp_evo)
+test("Trojan flip invalidates cache", trojan._coop_prob_cache is None)
+cp_evo.run_round()
+test("Learning invalidates cache",
+     all(a._coop_prob_cache is None for a in cp_evo.get_alive() if a.interactions))
+
+
+# ─── 32. Batched Learning Test ──────────────────────────
+print("\n--- 32. Batched Learning Test ---")
+
+from engine.agent import LearningBatch
+
+def learning_run(mode):
+    np.random.seed(17)
+    random.seed(17)
+    e = Evolution(population_size=20, learning_mode=mode)
+    e.spawn_population()
+    for _ in range(25):
+        e.run_round()
+    e.run_selection()
+    for _ in range(5):
+        e.run_round()
+    return {a.id: (a.weights_ho.copy(), a.bias_o.copy(), a.fitness) for a in e.agents.values()}
+
+lr_online = learning_run('online')
+lr_deferred = learning_run('deferred')
+test("Deferred learning is bit-identical to online",
+     lr_online.keys() == lr_deferred.keys() and all(
+         np.array_equal(lr_online[k][0], lr_deferred[k][0]) and
+         np.array_equal(lr_online[k][1], lr_deferred[k][1]) and
+         lr_online[k][2] == lr_deferred[k][2] for k in lr_online))
+
+lb_a, lb_b = NeuralAgent(id="LB_A"), NeuralAgent(id="LB_B")
+w_a, b_a = lb_a.weights_ho.copy(), lb_a.bias_o.copy()
+np.random.seed(3)
+noise = np.random.randn(3, NeuralAgent.HIDDEN_SIZE)
+np.random.seed(3)
+lb = LearningBatch('batched')
+lb.add(lb_a, True, 500)
+lb.add(lb_b, False, -100)
+lb.add(lb_a, False, 250)
+lb.apply()
+lr = lb_a.learning_rate
+expected_w = w_a + 1.0 * lr * noise[0] * lr + (-0.5 * lr) * noise[2] * lr
+test("Repeated agent accumulates every nudge", np.allclose(lb_a.weights_ho[0], expected_w))
+test("Bias nudges accumulate", np.allclose(lb_a.bias_o, b_a + (1.0 - 0.5) * lr * lr * 0.5))
+test("Batch is cleared after apply", len(lb) == 0)
+test("Batched mode runs", len(learning_run('batched')) == len(lr_online))
+try:
+    Evolution(population_size=20, learning_mode="sometimes")
+    test("Unknown learning mode rejected", False)
+except ValueError:
+    test("Unknown learning mode rejected", True)
+
+
+# ─── 33. Slotted Agent Test ─────────────────────────────
+print("\n--- 33. Slotted Agent Test ---")
+
+import pickle
+
+slot_agent = NeuralAgent(id="SLOT001")
+test("Agent has no instance __dict__", not hasattr(slot_agent, '__dict__'))
+try:
+    slot_agent.undeclared = 1
+    test("Undeclared attributes rejected", False)
+except AttributeError:
+    test("Undeclared attributes rejected", True)
+test("Rare containers start unallocated",
+     slot_agent._threat_memory is None and slot_agent._warnings_received is None
+     and slot_agent._sybil_ring is None)
+slot_agent.to_dict()
+slot_agent.decide("x", ctx)
+test("Hot paths leave containers unallocated",
+     slot_agent._threat_memory is None and slot_agent._sybil_ring is None)
+slot_agent.receive_warning("W1", {'target': 'T1', 'score': 0.9})
+test("Warning allocates on first write", slot_agent.warnings_received['T1'][0]['from'] == 'W1')
+slot_agent.warnings_received = {}
+test("Assigning empty releases container", slot_agent._warnings_received is None)
+slot_agent.sybil_ring = {"R1"}
+clone = pickle.loads(pickle.dumps(slot_agent))
+test("Slotted agent pickles", clone.sybil_ring == {"R1"} and clone.id == "SLOT001"
+     and np.array_equal(clone.weights_ih, slot_agent.weights_ih))
+
+
+# ─── 34. Distilled Policy Table Test ────────────────────
+print("\n--- 34. Distilled Policy Table Test ---")
+
+from engine.policy import PolicyTable
+
+np.random.seed(9)
+pt_agent = NeuralAgent(id="PT001")
+pt_table = PolicyTable.distill(pt_agent, round_num=50)
+test("Table covers levels^4 grid", len(pt_table.table) == pt_table.levels ** 4)
+on_grid = {**NeuralAgent.GENERIC_CONTEXT, 'direct_trust': 0.75}
+x = pt_agent._build_features('__generic__', on_grid)
+x[0] = x[1] = 0.25
+x[9], x[10] = 1.0, 0.0
+exact_p = pt_agent._forward(x)
+test("Grid point matches network within quantization",
+     abs(pt_table.lookup(0.25, 0.75, 1.0, 0.0) - exact_p) <= 0.5 / 255 + 1e-12)
+pt_agent.policy_table = pt_table
+pt_agent.weights_changed()
+test("Weight overwrite drops the table", pt_agent.policy_table is None)
+
+np.random.seed(9)
+random.seed(9)
+pt_evo = Evolution(population_size=40, policy='table')
+pt_evo.spawn_population()
+for _ in range(20):
+    pt_evo.run_round()
+test("Tables distilled for every agent",
+     all(a.policy_table is not None for a in pt_evo.get_alive()))
+report = pt_evo.policy_error.to_dict()
+test("Approximation error sampled", report['samples'] > 0)
+test("Mean approximation error small", report['mean_abs_error'] < 0.1,
+     f"mean={report['mean_abs_error']}")
+pt_evo.run_selection()
+test("Selection schedules redistillation",
+     all(a.policy_table is None for a in pt_evo.get_alive()))
+try:
+    Evolution(population_size=20, policy="fuzzy")
+    test("Unknown policy mode rejected", False)
+except ValueError:
+    test("Unknown policy mode rejected", True)
+
+
+# ─── 35. Float32 Numerics Test ──────────────────────────
+print("\n--- 35. Float32 Numerics Test ---")
+
+from engine.numerics import float_dtype, float_precision, set_float_dtype
+from engine.agent import cooperation_probabilities
+
+
+def _dtype_run(seed):
+    np.random.seed(seed)
+    random.seed(seed)
+    evo = Evolution(population_size=24)
+    evo.spawn_population()
+    for r in range(30):
+        evo.run_round()
+        if evo.round % 15 == 0:
+            evo.run_selection()
+    return evo, np.mean([s['coop_rate'] for s in evo.round_stats])
+
+
+test("float64 is the default", float_dtype() is np.float64)
+with float_precision('float32'):
+    np.random.seed(3)
+    f32_agent = NeuralAgent(id="F32001")
+    test("Weights created as float32",
+         all(w.dtype == np.float32 for w in (f32_agent.weights_ih, f32_agent.weights_ho,
+                                             f32_agent.bias_h, f32_agent.bias_o,
+                                             f32_agent.trust_weights)))
+    test("Features built as float32",
+         f32_agent._build_features('X', NeuralAgent.GENERIC_CONTEXT).dtype == np.float32)
+    f32_evo, f32_coop = _dtype_run(5)
+    f32_alive = f32_evo.get_alive()
+    test("Selection keeps float32 weights",
+         all(a.weights_ih.dtype == np.float32 and a.bias_o.dtype == np.float32
+             for a in f32_alive))
+    alpha, _ = f32_evo.trust_net.edge_evidence([a.id for a in f32_alive])
+    test("Edge evidence float32", alpha.dtype == np.float32)
+    for a in f32_alive:
+        a._coop_prob_cache = None
+    probs = cooperation_probabilities(f32_alive)
+    exact = [a._forward(a._build_features('__generic__', NeuralAgent.GENERIC_CONTEXT))
+             for a in f32_alive]
+    test("Batched probabilities agree with per-agent path",
+         np.allclose(probs, exact, atol=1e-5))
+    try:
+        json.dumps(f32_evo.get_network_data())
+        json.dumps(f32_evo.get_agent_detail(f32_alive[0].id, hops=2))
+        test("float32 network and agent detail serialize to JSON", True)
+    except TypeError as e:
+        test("float32 network and agent detail serialize to JSON", False, str(e))
+test("Context restores float64", float_dtype() is np.float64)
+
+np.random.seed(3)
+f64_agent = NeuralAgent(id="F64001")
+test("Both precisions draw the same weights",
+     np.allclose(f64_agent.weights_ih, f32_agent.weights_ih, atol=1e-6))
+
+coop64, coop32 = [], []
+for seed in range(3):
+    coop64.append(_dtype_run(seed)[1])
+    with float_precision('float32'):
+        coop32.append(_dtype_run(seed)[1])
+test("float32 population outcomes match float64",
+     abs(np.mean(coop64) - np.mean(coop32)) < 0.03,
+     f"f64={np.mean(coop64):.3f} f32={np.mean(coop32):.3f}")
+
+
+def _ring_detected_round(seed):
+    np.random.seed(seed)
+    random.seed(seed)
+    evo = Evolution(population_size=40)
+    evo.spawn_population()
+    for _ in range(10):
+        evo.run_round()
+    Attacks.sybil_attack(evo, 8)
+    for _ in range(50):
+        evo.run_round()
+        if any(e['type'] == 'ring_detected' for e in evo.pop_events()):
+            return evo.round, evo._immune_interval
+    return None, evo._immune_interval
+
+
+# The verdict may move by at most one immune cycle: a borderline z-score
+# that rounds differently in float32 is re-tested at the next cycle.
+ring64, ring_interval = _ring_detected_round(1)
+with float_precision('float32'):
+    ring32, _ = _ring_detected_round(1)
+test("float32 detects the sybil ring within one immune cycle of float64",
+     ring64 is not None and ring32 is not None and abs(ring32 - ring64) <= ring_interval,
+     f"f64={ring64} f32={ring32} interval={ring_interval}")
+
+try:
+    set_float_dtype("float16")
+    test("Unknown float dtype rejected", False)
+except ValueError:
+    test("Unknown float dtype rejected", True)
+
+
+# ─── 36. Bulk Spawn Test ────────────────────────────────
+print("\n--- 36. Bulk Spawn Test ---")
+
+from engine.agent import spawn_agents
+
+np.random.seed(4)
+bulk = spawn_agents([f"B{i:03d}" for i in range(200)], generation=2)
+test("Batch builds every agent", len(bulk) == 200 and bulk[-1].id == "B199"
+     and all(a.generation == 2 for a in bulk))
+test("Batch shapes match NeuralAgent()",
+     bulk[0].weights_ih.shape == (16, 11) and bulk[0].weights_ho.shape == (1, 16)
+     and bulk[0].bias_o.shape == (1,) and bulk[0].trust_weights.shape == (4,))
+limit_h = np.sqrt(6.0 / 27)
+test("Batch weights Xavier-bounded",
+     all(np.abs(a.weights_ih).max() <= limit_h for a in bulk)
+     and np.allclose([a.trust_weights.sum() for a in bulk], 1.0))
+before = bulk[1].weights_ho.copy()
+bulk[0].weights_ho += 1.0
+mutate(bulk[0], rate=1.0, strength=0.5)
+test("Rows are independent under in-place updates",
+     np.array_equal(bulk[1].weights_ho, before))
+test("Agents own their weights (no view keeps the batch alive)",
+     all(w.base is None for a in bulk for w in (a.weights_ih, a.weights_ho, a.bias_h,
+                                                 a.bias_o, a.trust_weights)))
+
+np.random.seed(4)
+random.seed(4)
+bulk_evo = Evolution(population_size=30, bulk_spawn=True)
+bulk_evo.spawn_population()
+test("Bulk population registered", len(bulk_evo.agents) == 30 and bulk_evo.next_id == 30)
+bulk_sybils = Attacks.sybil_attack(bulk_evo, 6)
+bulk_trojans = Attacks.trojan_attack(bulk_evo, 2)
+s0 = bulk_evo.agents[bulk_sybils[0]]
+test("Attack wave uses output template",
+     np.all(s0.weights_ho == -0.3) and s0.bias_o[0] == -3.0 and s0.balance == 800
+     and np.all(bulk_evo.agents[bulk_trojans[0]].weights_ho == 0.5))
+test("Attack ids continue the sequence",
+     bulk_sybils[0] == "S0031" and bulk_trojans[-1] == "T0038" and bulk_evo.next_id == 38)
+test("Sybil wave shares one ring",
+     all(bulk_evo.agents[x].sybil_ring is s0.sybil_ring for x in bulk_sybils)
+     and s0.decide(bulk_sybils[1], {}) and not s0.decide("A0001", {}))
+for _ in range(20):
+    bulk_evo.run_round()
+bulk_evo.run_selection()
+test("Bulk run survives selection", len(bulk_evo.get_alive()) > 0)
+
+np.random.seed(4)
+seq_evo = Evolution(population_size=5)
+seq_evo.spawn_population()
+Attacks.sybil_attack(seq_evo, 3)
+np.random.seed(4)
+ref_agents = [NeuralAgent(id=f"A{i:04d}") for i in range(1, 6)]
+test("Default spawn keeps the per-agent RNG stream",
+     np.array_equal(seq_evo.agents["A0005"].weights_ih, ref_agents[-1].weights_ih)
+     and seq_evo.agents["S0006"].sybil_ring == {"S0007", "S0008"})
+
+
+# ─── 37. Delta State Stream Test ────────────────────────
+print("\n--- 37. Delta State Stream Test ---")
+
+from engine.stream import StateStream, apply_delta
+
+
+def _state_key(network):
+    return (sorted(json.dumps(n, sort_keys=True) for n in network['nodes']),
+            sorted((min(e['source'], e['target']), max(e['source'], e['target']),
+                    e['trust']) for e in network['edges']),
+            sorted(sorted(c) for c in network['clusters']),
+            network['round'], network['stats'], network['payoff_matrices'])
+
+
+np.random.seed(12)
+random.seed(12)
+ds_evo = Evolution(population_size=30)
+ds_evo.spawn_population()
+ds_stream = StateStream(history=8)
+snap = ds_stream.rebase(ds_evo.get_network_data())
+test("Rebase yields versioned snapshot", snap['type'] == 'snapshot' and snap['version'] == 1)
+client_state = snap['data']
+full_bytes = delta_bytes = 0
+ds_ok = True
+payoff_seen = False
+for r in range(25):
+    if r == 5:
+        Attacks.sybil_attack(ds_evo, 4)
+    if r == 12:
+        ds_evo.set_payoff('strangers', 'CC', 200)
+    ds_evo.run_round()
+    if ds_evo.round % 10 == 0:
+        ds_evo.run_selection()
+    net = ds_evo.get_network_data()
+    delta = ds_stream.publish(net)
+    payoff_seen |= r == 12 and 'payoff_matrices' in delta['scalars']
+    ds_ok &= delta['base'] == delta['version'] - 1
+    client_state = apply_delta(client_state, delta)
+    ds_ok &= _state_key(client_state) == _state_key(net)
+    full_bytes += len(json.dumps(net))
+    delta_bytes += len(json.dumps(delta))
+test("Deltas reconcile to the full state every round", ds_ok)
+test("Deltas smaller than full payloads", delta_bytes < full_bytes / 3,
+     f"full={full_bytes} delta={delta_bytes}")
+test("In-place payoff change detected", payoff_seen)
+test("Removed agents leave the state",
+     {n['id'] for n in client_state['nodes']} == {a.id for a in ds_evo.get_alive()})
+
+replay = ds_stream.since(ds_stream.version - 3)
+test("Late client replays retained deltas",
+     [d['version'] for d in replay] == list(range(ds_stream.version - 2, ds_stream.version + 1)))
+test("Up-to-date client needs nothing", ds_stream.since(ds_stream.version) == [])
+test("Gap beyond history needs a snapshot", ds_stream.since(1) is None)
+ds_stream.invalidate()
+test("Invalidated stream rebases on publish",
+     ds_stream.publish(ds_evo.get_network_data())['type'] == 'snapshot')
+
+
+# ─── 38. Binary Frame Test ──────────────────────────────
+print("\n--- 38. Binary Frame Test ---")
+
+from engine.frames import encode_network, decode_frame, decode_network
+
+np.random.seed(13)
+random.seed(13)
+bf_evo = Evolution(population_size=40)
+bf_evo.spawn_population()
+Attacks.sybil_attack(bf_evo, 4)
+for _ in range(12):
+    bf_evo.run_round()
+bf_net = bf_evo.get_network_data()
+bf_frame = encode_network(bf_net, {"type": "round", "data": bf_net, "events": [{"type": "x"}]})
+bf_header, bf_cols = decode_frame(bf_frame)
+test("Frame starts with magic", bf_frame[:4] == b'AEZB')
+test("Broadcast fields ride in the header",
+     bf_header['message'] == {"type": "round", "events": [{"type": "x"}]})
+test("Columns are 4-byte aligned views",
+     all(c.ctypes.data % 4 == 0 for c in bf_cols.values() if c.itemsize == 4))
+test("Edge endpoints are node indices",
+     bf_cols['source'].max() < len(bf_header['ids']) and len(bf_cols['trust']) == len(bf_net['edges']))
+bf_back = decode_network(bf_frame)
+
+
+def _close(a, b):
+    if isinstance(a, float):
+        return abs(a - b) <= 1e-3 * max(1.0, abs(a))
+    if isinstance(a, list):
+        return all(_close(x, y) for x, y in zip(a, b))
+    return a == b
+
+
+test("Nodes round-trip", all(_close(v, m[k]) for n, m in zip(bf_net['nodes'], bf_back['nodes'])
+                             for k, v in n.items()))
+test("Edges round-trip",
+     all(e['source'] == m['source'] and e['target'] == m['target']
+         and all(_close(v, m['dimensions'][k]) for k, v in e['dimensions'].items())
+         for e, m in zip(bf_net['edges'], bf_back['edges'])))
+test("Clusters and scalars round-trip",
+     bf_back['clusters'] == bf_net['clusters'] and bf_back['stats'] == bf_net['stats']
+     and bf_back['round'] == bf_net['round'])
+test("Binary frame smaller than JSON", len(bf_frame) < len(json.dumps(bf_net)) / 3,
+     f"binary={len(bf_frame)} json={len(json.dumps(bf_net))}")
+try:
+    decode_frame(b'JSON' + bf_frame[4:])
+    test("Foreign frame rejected", False)
+except ValueError:
+    test("Foreign frame rejected", True)
+
+
+# ─── 39. Simulation Actor Test ──────────────────────────
+print("\n--- 39. Simulation Actor Test ---")
+
+import asyncio
+import threading
+from engine.actor import Simulation, SimulationActor
+
+
+async def _actor_checks():
+    actor = SimulationActor()
+    order = []
+    threads = set()
+
+    def record(k):
+        order.append(k)
+        threads.add(threading.get_ident())
+        return k
+
+    futures = [actor.submit(record, k) for k in range(20)]
+    results = await asyncio.gather(*(asyncio.wrap_future(f) for f in futures))
+    test("Commands run in submission order", order == list(range(20)) and results == order)
+    test("Commands run on one worker thread",
+         len(threads) == 1 and threading.get_ident() not in threads)
+
+    def boom():
+        raise ValueError("bad command")
+    try:
+        await actor.call(boom)
+        test("Command errors reach the caller", False)
+    except ValueError:
+        test("Command errors reach the caller", True)
+
+    np.random.seed(14)
+    random.seed(14)
+    sim = await actor.call(Simulation, 30)
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0)
+            ticks += 1
+    tick_task = asyncio.create_task(ticker())
+    step = actor.call(sim.step, 5)
+    attack = actor.call(sim.attack, "sybil", 4)
+    (step_response, message), (attack_response, _) = await asyncio.gather(step, attack)
+    tick_task.cancel()
+    test("Event loop keeps running during a round", ticks > 0)
+    test("Round command returns response and broadcast",
+         step_response["round"] == 1 and message["type"] == "round"
+         and len(message["data"]["nodes"]) == 30)
+    test("Queued commands apply in order",
+         len(attack_response["agents_injected"]) == 4
+         and (await actor.call(sim.stats))["total_agents"] == 34)
+    test("Actor drained", actor.pending == 0 and actor.completed == actor.submitted)
+    actor.stop()
+
+
+asyncio.run(_actor_checks())
+
+
+# ─── 40. Round Snapshot Test ────────────────────────────
+print("\n--- 40. Round Snapshot Test ---")
+
+from engine.snapshot import RoundSnapshot
+
+np.random.seed(15)
+random.seed(15)
+snap_sim = Simulation(30)
+snap_sim.created()
+first = snap_sim.snapshot
+first_body = first.body('state')
+test("Creation publishes a snapshot", first is not None and first.round == 0)
+snap_sim.step()
+snap_sim.attack("sybil", 3)
+for _ in range(5):
+    snap_sim.step(5)
+latest = snap_sim.snapshot
+test("Every command publishes a newer version", latest.version > first.version + 6)
+test("Old snapshots are untouched by later rounds",
+     json.dumps(first.network, separators=(',', ':')).encode() == first_body
+     and first.body('state') is first_body)
+test("Snapshot matches the engine at publish time",
+     latest.round == snap_sim.evo.round
+     and latest.strategies == snap_sim.evo.get_strategy_distribution()
+     and [e['id'] for e in latest.leaderboard[:8]]
+     == [e['id'] for e in snap_sim.evo.get_leaderboard(8)]
+     and latest.stats['total_agents'] == len(snap_sim.evo.agents))
+test("Leaderboard views slice one ranking",
+     json.loads(latest.body('leaderboard', 3))['leaderboard'] == latest.leaderboard[:3])
+from engine.snapshot import EPOCH
+test("ETag names the epoch, simulation and version",
+     latest.etag == f'"{EPOCH}-sim-{latest.generation}.{latest.round}.{latest.version}"')
+try:
+    latest.view('graveyard')
+    test("Unknown snapshot view rejected", False)
+except ValueError:
+    test("Unknown snapshot view rejected", True)
+
+
+# ─── 41. Turbo Broadcast Test ───────────────────────────
+print("\n--- 41. Turbo Broadcast Test ---")
+
+from engine.broadcast import FrameBroadcaster, coalesce
+
+np.random.seed(16)
+random.seed(16)
+turbo_sim = Simulation(25)
+turbo_sim.created()
+published = turbo_sim.snapshot.version
+_, turbo_msg = turbo_sim.step(5, publish=False)
+test("Turbo round skips the snapshot",
+     turbo_sim.dirty and "data" not in turbo_msg
+     and turbo_sim.snapshot.version == published and len(turbo_msg["leaderboard"]) == 8)
+refreshed = turbo_sim.refresh()
+test("Refresh publishes once after turbo rounds",
+     not turbo_sim.dirty and refreshed.round == turbo_sim.evo.round == 1
+     and turbo_sim.refresh() is refreshed)
+
+merged = coalesce([{"type": "round", "events": ["a"], "narration": "one", "leaderboard": [1]},
+                   {"type": "attack", "attack_type": "sybil", "events": ["b", "c"]},
+                   {"type": "round", "events": ["d"], "narration": "two", "leaderboard": [2]}])
+test("Coalesced frame keeps every event in order",
+     merged["events"] == ["a", "b", "c", "d"] and merged["narrations"] == ["one", "two"])
+test("Coalesced frame names each event's source message",
+     merged["sources"] == [{"type": "round", "events": 1},
+                           {"type": "attack", "events": 2, "attack_type": "sybil"},
+                           {"type": "round", "events": 1}])
+test("Coalesced frame carries the latest values",
+     merged["narration"] == "two" and merged["leaderboard"] == [2])
+
+
+async def _broadcast_checks():
+    sent = []
+    networks = []
+
+    async def send(message):
+        sent.append(message)
+
+    async def network():
+        networks.append(len(networks))
+        return {"round": len(networks)}
+
+    caster = FrameBroadcaster(send, network, fps=200)
+    await caster.flush()
+    test("Empty flush sends nothing", sent == [] and networks == [])
+
+    caster.start()
+    for k in range(6):
+        caster.push({"type": "round", "events": [k]})
+        await asyncio.sleep(0.002)
+    caster.push({"type": "round", "events": ["last"]})
+    await caster.stop()
+    events = [e for frame in sent for e in frame["events"]]
+    test("Frames deliver every message once, in order",
+         events == list(range(6)) + ["last"] and caster.messages_coalesced == 7)
+    test("One network per frame, final frame on stop",
+         len(networks) == len(sent) == caster.frames_sent
+         and sent[-1]["events"][-1] == "last" and not caster.active)
+    try:
+        caster.fps = 0
+        test("Invalid frame rate rejected", False)
+    except ValueError:
+        test("Invalid frame rate rejected", caster.fps == 200)
+
+
+asyncio.run(_broadcast_checks())
+
+
+# ─── 42. Client Send Queue Test ─────────────────────────
+print("\n--- 42. Client Send Queue Test ---")
+
+from engine.fanout import ClientChannel, Envelope
+
+
+class _QueueSocket:
+    """Records what a writer sends; `gate` holds sends to fake a slow link."""
+
+    def __init__(self):
+        self.sent = []
+        self.gate = asyncio.Event()
+        self.gate.set()
+        self.closed_with = None
+
+    async def send_text(self, text):
+        await self.gate.wait()
+        self.sent.append(json.loads(text))
+
+    async def send_bytes(self, data):
+        await self.gate.wait()
+        self.sent.append(data)
+
+    async def close(self, code=1000, reason=""):
+        self.closed_with = code
+
+
+def _frame(k, events=()):
+    residual = Envelope.json({"type": "round", "events": list(events)}) if events else None
+    return Envelope.json({"type": "round", "round": k, "events": list(events)},
+                         droppable=True, residual=residual)
+
+
+async def _fanout_checks():
+    fast_ws, slow_ws = _QueueSocket(), _QueueSocket()
+    slow_ws.gate.clear()
+    fast, slow = ClientChannel(fast_ws), ClientChannel(slow_ws)
+    fast.start()
+    slow.start()
+
+    shared = Envelope.json({"type": "attack", "events": ["sybil"]})
+    frames = [_frame(k, ["betrayal"] if k == 2 else ()) for k in range(1, 6)]
+    fast.put(frames[0])
+    slow.put(frames[0])
+    await asyncio.sleep(0)
+    for envelope in (frames[1], shared, *frames[2:]):
+        fast.put(envelope)
+        slow.put(envelope)
+        await asyncio.sleep(0)
+    test("Fast client unaffected by a slow one",
+         [m.get("round") for m in fast_ws.sent] == [1, 2, None, 3, 4, 5]
+         and fast.dropped == 0 and slow_ws.sent == [])
+    test("Slow client queue conflates stale frames",
+         slow.depth == 3 and slow.dropped == 3 and slow.lag > 0)
+
+    slow_ws.gate.set()
+    await asyncio.sleep(0.01)
+    test("Slow client keeps events, in order, then the newest frame",
+         [(m["type"], m.get("round"), m["events"]) for m in slow_ws.sent]
+         == [("round", 1, []), ("round", None, ["betrayal"]),
+             ("attack", None, ["sybil"]), ("round", 5, [])])
+    test("Delivery metrics recorded",
+         slow.sent == 4 and slow.depth == 0 and slow.max_lag > 0
+         and slow.stats()["bytes_sent"] == sum(len(json.dumps(m, separators=(',', ':')))
+                                               for m in slow_ws.sent))
+
+    catchups = []
+
+    def snapshot_instead():
+        catchups.append(1)
+        return Envelope.json({"type": "round", "stream": {"type": "snapshot"}}, droppable=True)
+    delta_ws = _QueueSocket()
+    delta_ws.gate.clear()
+    delta = ClientChannel(delta_ws, "delta")
+    delta.start()
+    delta.put(Envelope.json({"type": "init"}))
+    await asyncio.sleep(0)
+    for k in range(3):
+        delta.put(Envelope.json({"type": "round", "stream": {"type": "delta"}},
+                                droppable=True, catchup=snapshot_instead))
+    delta_ws.gate.set()
+    await asyncio.sleep(0.01)
+    test("Lagging delta client catches up from a snapshot",
+         [m.get("stream", {}).get("type") for m in delta_ws.sent] == [None, "snapshot"]
+         and len(catchups) == 2 and delta.dropped == 2)
+
+    stuck_ws = _QueueSocket()
+    stuck_ws.gate.clear()
+    stuck = ClientChannel(stuck_ws, maxsize=4)
+    stuck.start()
+    for k in range(6):
+        stuck.put(Envelope.json({"type": "detection", "events": [k]}))
+        await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    test("Client that cannot keep up is disconnected",
+         stuck.closed and stuck.depth == 0 and stuck_ws.closed_with == 1013)
+    for channel in (fast, slow, delta):
+        channel.close()
+
+
+asyncio.run(_fanout_checks())
+
+
+# ─── 43. WebSocket Topic Test ───────────────────────────
+print("\n--- 43. WebSocket Topic Test ---")
+
+from engine.topics import parse_topics, computed, split
+
+test("Topics parse from a query string",
+     parse_topics("leaderboard, graph:ego:A0001,,events")
+     == {"leaderboard", "graph:ego:A0001", "events"})
+for bad_spec in ("leaderboards", "graph:ego:"):
+    try:
+        parse_topics(bad_spec)
+        test(f"Unknown topic rejected ({bad_spec})", False)
+    except ValueError:
+        test(f"Unknown topic rejected ({bad_spec})", True)
+test("Only stats, immune and egos are computed",
+     computed({"graph", "stats", "immune", "events", "graph:ego:A1"})
+     == {"stats", "immune", "graph:ego:A1"})
+
+np.random.seed(17)
+random.seed(17)
+topic_sim = Simulation(25)
+topic_sim.created()
+for _ in range(5):
+    topic_sim.step(5)
+center = topic_sim.evo.get_leaderboard(1)[0]["id"]
+ego_topic = f"graph:ego:{center}"
+_, topic_msg = topic_sim.step(5, False, computed({"stats", "immune", ego_topic}))
+test("Topic round skips the network", "data" not in topic_msg and topic_sim.dirty)
+ego = topic_msg["topics"][ego_topic]
+full = topic_sim.refresh().network
+neighbours = {e["target"] if e["source"] == center else e["source"]
+              for e in full["edges"] if center in (e["source"], e["target"])}
+test("Ego network is the agent and its trust neighbours",
+     {n["id"] for n in ego["nodes"]} == neighbours | {center}
+     and all(e["source"] in neighbours | {center} and e["target"] in neighbours | {center}
+             for e in ego["edges"]))
+test("Unknown ego agent has no network", topic_sim.evo.get_ego_network("Z9999") is None)
+test("Computed topics attached",
+     topic_msg["topics"]["stats"]["round"] == topic_sim.evo.round
+     and topic_msg["topics"]["immune"]["flagged_sybils"]
+     == len(topic_msg["topics"]["immune"]["flagged"]))
+
+parts = split({"type": "attack", "attack_type": "sybil", "narration": {"title": "x"},
+               "events": [{"type": "attack_sybil"}, {"type": "ring_detected"}],
+               "leaderboard": [], "data": full})
+test("Message splits into per-topic parts",
+     list(parts) == ["graph", "leaderboard", "immune", "events", "narration"]
+     and parts["events"][0]["attack_type"] == "sybil"
+     and parts["immune"][0]["events"] == [{"type": "ring_detected"}])
+test("State topics droppable, events and immune alerts are not",
+     parts["graph"][1] and parts["leaderboard"][1]
+     and not parts["events"][1] and not parts["immune"][1] and not parts["narration"][1])
+frame_events = split(coalesce([{"type": "round", "events": [{"type": "trade"}]},
+                               {"type": "attack", "attack_type": "sybil",
+                                "events": [{"type": "attack_sybil"}]}]))["events"][0]
+test("Frame events keep their source messages",
+     "source" not in frame_events
+     and [s.get("attack_type") for s in frame_events["sources"]] == [None, "sybil"])
+
+
+async def _topic_queue_checks():
+    ws = _QueueSocket()
+    ws.gate.clear()
+    channel = ClientChannel(ws, "topics")
+    channel.start()
+    channel.put(Envelope.json({"type": "hold"}))
+    await asyncio.sleep(0)
+    for k in range(3):
+        for topic in ("graph", "leaderboard"):
+            channel.put(Envelope.json({"type": topic, "k": k}, droppable=True, key=topic))
+    ws.gate.set()
+    await asyncio.sleep(0.01)
+    test("Newest frame kept per topic",
+         [(m["type"], m.get("k")) for m in ws.sent]
+         == [("hold", None), ("graph", 2), ("leaderboard", 2)])
+    channel.close()
+
+
+asyncio.run(_topic_queue_checks())
+
+
+# ─── 44. Simulation Pool Test ───────────────────────────
+print("\n--- 44. Simulation Pool Test ---")
+
+import tempfile
+import time
+from engine.pool import HostedSimulation, SimulationPool, PoolBusy
+from engine.worker import QuotaExceeded
+
+
+class _PinnedHost(HostedSimulation):
+    pinned = False
+
+    @property
+    def busy(self):
+        return self.pinned or super().busy
+
+
+async def _pool_checks():
+    pool = SimulationPool(_PinnedHost, capacity=2, workers=1, idle_timeout=60.0,
+                          checkpoint_dir=tempfile.mkdtemp(), processes=False)
+    np.random.seed(18)
+    random.seed(18)
+    a = await pool.admit("alpha")
+    a.sim = await pool.run(a, Simulation, 20, "alpha")
+    await pool.run(a, a.sim.created)
+    for _ in range(3):
+        await pool.run(a, a.sim.step, 5)
+    served = a.sim.snapshot
+    before = (a.sim.evo.round, sorted(a.sim.evo.agents),
+              [ag.fitness for ag in a.sim.evo.get_alive()])
+    b = await pool.admit("beta")
+    b.sim = await pool.run(b, Simulation, 15)
+    test("Simulations are independent",
+         a.sim.evo.round == 3 and b.sim.evo.round == 0 and a.actor is not b.actor)
+
+    await pool.admit("gamma")     # full: evicts the least recently used (alpha)
+    test("Admitting past capacity evicts the LRU simulation",
+         [h.id for h in pool.resident()] == ["beta", "gamma"]
+         and pool.checkpointed() == ["alpha"] and a.evicted)
+    try:
+        await pool.run(a, a.sim.step)
+        test("Evicted handle refuses commands", False)
+    except PoolBusy:
+        test("Evicted handle refuses commands", True)
+
+    resumed = await pool.get("alpha")
+    after = (resumed.sim.evo.round, sorted(resumed.sim.evo.agents),
+             [ag.fitness for ag in resumed.sim.evo.get_alive()])
+    test("Resume restores the checkpointed state",
+         after == before and pool.resumes == 1 and "alpha" not in pool.checkpointed())
+    test("Resumed simulation republishes on first read",
+         resumed.sim.snapshot is None and resumed.sim.dirty
+         and (await pool.run(resumed, resumed.sim.refresh)).round == 3)
+    test("Resumed snapshots continue the version and never reuse an ETag",
+         resumed.sim.snapshot.version == served.version + 1
+         and resumed.sim.snapshot.etag != served.etag
+         and '-alpha-' in resumed.sim.snapshot.etag)
+    step_response, _ = await pool.run(resumed, resumed.sim.step)
+    test("Resumed simulation keeps running", step_response["round"] == 4)
+
+    for hosted in pool.resident():
+        hosted.pinned = True
+    try:
+        await pool.admit("delta")
+        test("Full pool of busy simulations refuses", False)
+    except PoolBusy:
+        test("Full pool of busy simulations refuses", True)
+    for hosted in pool.resident():
+        hosted.pinned = False
+
+    for bad_id in ("../etc", ""):
+        try:
+            await pool.admit(bad_id)
+            test(f"Invalid id rejected ({bad_id!r})", False)
+        except ValueError:
+            test(f"Invalid id rejected ({bad_id!r})", True)
+
+    running = []
+    peak = []
+
+    def work():
+        running.append(1)
+        peak.append(len(running))
+        time.sleep(0.01)
+        running.pop()
+    hosts = pool.resident()
+    await asyncio.gather(*(pool.run(h, work) for h in hosts for _ in range(3)))
+    test("Worker slots bound concurrent commands", max(peak) == 1)
+
+    pool.idle_timeout = 0.0
+    swept = await pool.sweep()
+    test("Idle simulations are checkpointed by the sweep",
+         sorted(swept) == sorted(h.id for h in hosts) and not pool.resident()
+         and "alpha" in pool.checkpointed())
+    test("Delete drops the checkpoint",
+         await pool.delete("alpha") and "alpha" not in pool.checkpointed()
+         and await pool.get("alpha") is None)
+    pool.shutdown()
+
+
+asyncio.run(_pool_checks())
+
+
+async def _eviction_race_checks():
+    pool = SimulationPool(capacity=2, workers=1, idle_timeout=0.0,
+                          checkpoint_dir=tempfile.mkdtemp(), processes=False)
+    hosted = await pool.admit("racer")
+    hosted.sim = await pool.create(hosted, 60)
+    for _ in range(2):
+        await pool.run(hosted, hosted.sim.step)
+    sweep = asyncio.create_task(pool.sweep())
+    await asyncio.sleep(0)            # the sweep is writing the checkpoint
+    test("Evicting simulation stays listed and refuses commands",
+         hosted.evicting and pool.peek("racer") is hosted)
+    admitted = await pool.admit("racer")
+    await sweep
+    test("Access during eviction resumes the checkpoint, not a fresh simulation",
+         admitted is not hosted and admitted.sim is not None
+         and admitted.sim.evo.round == 2 and pool.resumes == 1)
+    test("Checkpoints leave no partial files",
+         not any(name.endswith('.tmp') for name in os.listdir(pool.checkpoint_dir)))
+    pool.shutdown()
+
+
+asyncio.run(_eviction_race_checks())
+
+for bad in ({"cpu_seconds": 10}, {"memory_mb": 512}):
+    try:
+        SimulationPool(processes=False, **bad)
+        test(f"In-process pool refuses quotas ({bad})", False)
+    except ValueError:
+        test(f"In-process pool refuses quotas ({bad})", True)
+
+
+async def _worker_pool_checks():
+    pool = SimulationPool(capacity=2, workers=2, checkpoint_dir=tempfile.mkdtemp(),
+                          cpu_seconds=60, memory_mb=2048)
+    twins = []
+    for sim_id in ("left", "right"):
+        hosted = await pool.admit(sim_id)
+        hosted.sim = await pool.create(hosted, 25, seed=7)
+        await pool.run(hosted, hosted.sim.created)
+        twins.append(hosted)
+    left, right = twins
+    test("Each simulation runs in a worker process of its own",
+         len({left.sim.pid, right.sim.pid, os.getpid()}) == 3)
+    for _ in range(3):
+        for hosted in twins:
+            await pool.run(hosted, hosted.sim.step, 5)
+    test("Replies mirror the published snapshot and metrics",
+         left.sim.snapshot.round == 3 and not left.sim.dirty
+         and left.sim.metrics.rounds == 3 and left.sim.cpu_seconds > 0)
+    try:
+        await pool.run(right, right.sim.subgraph, None, 99)
+        test("Worker errors reach the caller", False)
+    except ValueError:
+        test("Worker errors reach the caller", True)
+
+    used = left.sim.cpu_seconds
+    worker = left.sim
+    await pool.evict("left")
+    test("Eviction checkpoints and stops the worker",
+         pool.checkpointed() == ["left"] and not worker.alive)
+    resumed = await pool.get("left")
+    await pool.run(resumed, resumed.sim.step, 5)
+    await pool.run(right, right.sim.step, 5)
+    test("Resumed worker continues the same random sequence",
+         resumed.sim.snapshot.leaderboard == right.sim.snapshot.leaderboard
+         and resumed.sim.snapshot.round == 4)
+    test("CPU use carries across resumes", resumed.sim.cpu_seconds >= used)
+    pool.shutdown()
+    test("Shutdown stops every worker", not resumed.sim.alive and not right.sim.alive)
+
+    quota = SimulationPool(capacity=1, workers=1, checkpoint_dir=tempfile.mkdtemp(),
+                           cpu_seconds=1)
+    hosted = await quota.admit("spender")
+    hosted.sim = await quota.create(hosted, 150, seed=3)
+    steps = 0
+    try:
+        while steps < 1000:
+            await quota.run(hosted, hosted.sim.step, 5)
+            steps += 1
+        test("CPU quota stops the simulation", False)
+    except QuotaExceeded:
+        test("CPU quota stops the simulation",
+             hosted.sim.exhausted and not hosted.sim.alive
+             and hosted.sim.snapshot.round == steps)
+    await quota.evict("spender")
+    test("Exhausted simulation is discarded, not checkpointed",
+         quota.checkpointed() == [] and await quota.get("spender") is None)
+    try:
+        thread_pool = SimulationPool(processes=False)
+        await thread_pool.create(await thread_pool.admit("seeded"), 10, seed=1)
+        test("Seeded runs need worker processes", False)
+    except ValueError:
+        test("Seeded runs need worker processes", True)
+
+
+asyncio.run(_worker_pool_checks())
+
+
+async def _population_limit_checks():
+    from engine import server
+    limit = server.pool.max_population
+    server.pool.max_population = 22
+    try:
+        await server.create_sim(server.CreateRequest(population=20), "limits")
+        refused = await server.launch_attack(server.AttackRequest(type="sybil", count=5), "limits")
+        test("Attack past the population limit is refused",
+             "error" in refused
+             and server.pool.peek("limits").sim.snapshot.stats["total_agents"] == 20)
+        allowed = await server.launch_attack(server.AttackRequest(type="sybil", count=2), "limits")
+        test("Attack within the population limit runs", len(allowed["agents_injected"]) == 2)
+        test("Inject past the population limit is refused",
+             "error" in await server.inject_agent("limits"))
+        listed = {e["sim_id"]: e for e in (await server.list_sims())["simulations"]}
+        test("Listing reads the published round",
+             listed["limits"]["round"] == server.pool.peek("limits").sim.snapshot.round == 0)
+    finally:
+        server.pool.max_population = limit
+        await server.pool.delete("limits")
+
+
+asyncio.run(_population_limit_checks())
+
+
+# ─── 45. Metrics Test ───────────────────────────────────
+print("\n--- 45. Metrics Test ---")
+
+from engine.metrics import Exposition, FanoutMetrics, Histogram, PHASES, deep_size
+
+hist = Histogram((0.1, 1.0))
+for value in (0.05, 0.5, 0.5, 3.0):
+    hist.observe(value)
+out = Exposition()
+out.histogram("lat_seconds", "Latency", hist, sim='a"b')
+out.counter("hits_total", "Hits", 7)
+exposition = out.text().splitlines()
+test("Histogram buckets are cumulative with +Inf",
+     exposition[2:6] == ['lat_seconds_bucket{sim="a\\"b",le="0.1"} 1',
+                         'lat_seconds_bucket{sim="a\\"b",le="1.0"} 3',
+                         'lat_seconds_bucket{sim="a\\"b",le="+Inf"} 4',
+                         'lat_seconds_sum{sim="a\\"b"} 4.05'])
+test("Families carry HELP and TYPE once",
+     exposition[:2] == ["# HELP lat_seconds Latency", "# TYPE lat_seconds histogram"]
+     and exposition[-3:] == ["# HELP hits_total Hits", "# TYPE hits_total counter",
+                             "hits_total 7"])
+
+np.random.seed(45)
+random.seed(45)
+metered = Simulation(population=20)
+for _ in range(12):
+    metered.step()
+metered.attack("sybil", 3)
+metered.detect()
+meter = metered.metrics
+test("Every round observed, in every phase",
+     meter.rounds == 12 and meter.round_seconds.count == 12
+     and all(meter.phase_seconds[p].count == 12 for p in PHASES))
+test("Phases add up to no more than the round",
+     sum(meter.phase_seconds[p].sum for p in PHASES) <= meter.round_seconds.sum)
+test("Inline and manual immune cycles timed",
+     meter.immune_seconds.count == sum(1 for s in metered.evo.round_stats
+                                       if s['immune_reason']) + 1)
+test("Events counted by type", meter.events.get("attack_sybil") == 1)
+test("Gauges follow commands",
+     meter.trust_edges == len(metered.evo.trust_net.edges)
+     and meter.alive_agents == len(metered.evo.get_alive()))
+
+edges = metered.evo.trust_net.edges
+owned_elsewhere = {id(a) for a in metered.evo.agents} | {id(s.pair) for s in edges.values()}
+walked = deep_size(edges, owned_elsewhere)
+test("Edge memory estimate close to a full walk",
+     abs(meter.memory["edges"] - walked) < 0.25 * walked)
+
+scrape = Exposition()
+meter.render(scrape, sim="m")
+before = scrape.text()
+metered.evo.trust_net.edges = {}     # a scrape must not look at the network
+scrape = Exposition()
+meter.render(scrape, sim="m")
+test("Scrape reads kept values, not the network", scrape.text() == before
+     and f'aez_trust_edges{{sim="m"}} {len(edges)}' in before)
+metered.evo.trust_net.edges = edges
+
+
+async def _fanout_meter_checks():
+    totals = FanoutMetrics()
+    ws = _QueueSocket()
+    ws.gate.clear()
+    channel = ClientChannel(ws, meter=totals)
+    channel.start()
+    channel.put(_frame(0))
+    await asyncio.sleep(0)
+    for k in range(1, 4):
+        channel.put(_frame(k))
+    ws.gate.set()
+    await asyncio.sleep(0.01)
+    test("Fan-out totals follow deliveries and drops",
+         totals.messages == channel.sent == 2 and totals.bytes == channel.bytes_sent
+         and totals.dropped == channel.dropped == 2 and totals.lag_seconds.count == 2)
+    text = Exposition()
+    totals.render(text, [channel], sim="m")
+    test("Fan-out series rendered per mode",
+         'aez_ws_clients{sim="m",mode="full"} 1' in text.text())
+    channel.close()
+
+
+asyncio.run(_fanout_meter_checks())
+test("/metrics route registered", any(getattr(r, "path", None) == "/metrics" for r in app.routes))
+
+
+# ─── 46. Agent & Subgraph Query Test ────────────────────
+print("\n--- 46. Agent & Subgraph Query Test ---")
+
+import pickle
+
+
+def _index_matches(tn):
+    return ({(s, d) for s, out in tn.outgoing.items() for d in out} == set(tn.edges)
+            and {(s, d) for d, inc in tn.incoming.items() for s in inc} == set(tn.edges)
+            and all(tn.outgoing[s][d] is state and tn.incoming[d][s] is state
+                    for (s, d), state in tn.edges.items()))
+
+
+np.random.seed(46)
+random.seed(46)
+evo_q = Evolution(population_size=30, dead_retention=0)
+evo_q.spawn_population()
+for r in range(1, 41):
+    evo_q.run_round()
+    if r == 12:
+        Attacks.sybil_attack(evo_q, 4)
+    if r % 20 == 0:
+        evo_q.run_selection()
+tn_q = evo_q.trust_net
+test("Adjacency indexes follow inserts, cascades, children and collection",
+     evo_q.graveyard and _index_matches(tn_q))
+test("Indexes rebuilt from the edges on unpickling",
+     _index_matches(pickle.loads(pickle.dumps(tn_q))))
+
+alive_q = sorted(a.id for a in evo_q.get_alive())
+scan_neighbors = sorted(((d, s.direct_trust) for (src, d), s in tn_q.edges.items()
+                         if src == alive_q[0] and s.direct_trust > 0.5),
+                        key=lambda x: (-x[1], x[0]))
+test("Trusted neighbors from the index match an edge scan",
+     tn_q.get_trusted_neighbors(alive_q[0]) == [d for d, _ in scan_neighbors])
+test("Indexed edge channels match the round's channels",
+     all(tn_q.edge_channels(a, b, set(alive_q)) == tn_q.get_trust_channels(a, b, alive_q)
+         for a in alive_q[:6] for b in alive_q if a != b))
+
+center_q = alive_q[0]
+detail = evo_q.get_agent_detail(center_q, hops=1)
+test("Agent detail has genome, counters, suspicion and threat memory",
+     {'genome', 'counters', 'suspicion', 'threat_memory'} <= detail.keys()
+     and len(detail['genome']['network']['weights_ih']) == len(evo_q.agents[center_q].weights_ih)
+     and detail['counters']['interactions'] == evo_q.agents[center_q].interactions)
+ego_q = detail['ego']
+test("Ego edges carry all four channels",
+     ego_q['edges'] and all(set(e['channels']) == {'direct_trust', 'social_trust',
+                                                    'temporal_trust', 'structural_trust'}
+                            for e in ego_q['edges']))
+one_hop = {n['id'] for n in ego_q['nodes']}
+two_hop = {n['id'] for n in evo_q.get_ego_network(center_q, hops=2)['nodes']}
+test("Ego network grows with hops", one_hop <= two_hop and center_q in one_hop)
+dead_q = next(a.id for a in evo_q.agents.values() if not a.alive) \
+    if any(not a.alive for a in evo_q.agents.values()) else None
+test("Unknown agent has no detail", evo_q.get_agent_detail("nobody") is None
+     and (dead_q is None or evo_q.get_agent_detail(dead_q)['ego'] is None))
+
+flag_target = alive_q[-1]
+evo_q.agents[flag_target].flagged_sybil = True
+tn_q.isolate_agent(flag_target, alive_q)
+flagged_sub = evo_q.get_subgraph(flagged=True)
+test("Flagged filter returns the flagged agents",
+     [n['id'] for n in flagged_sub['nodes']] == [flag_target])
+labelled = evo_q.agents[alive_q[1]].get_strategy_label()
+strategy_sub = evo_q.get_subgraph(agent_ids=alive_q[:10], strategy=labelled)
+test("Strategy filter refines the selection",
+     strategy_sub['nodes'] and all(n['strategy'] == labelled for n in strategy_sub['nodes'])
+     and {n['id'] for n in strategy_sub['nodes']} <= set(alive_q[:10]))
+limited = evo_q.get_subgraph(min_trust=0.6, limit=5)
+test("Subgraph limit truncates by id, edges stay inside",
+     limited['truncated'] and [n['id'] for n in limited['nodes']] == alive_q[:5]
+     and all(e['source'] in alive_q[:5] and e['target'] in alive_q[:5]
+             and e['trust'] >= 0.6 for e in limited['edges']))
+
+
+class _NoScan(dict):
+    """An edge dict that fails any full scan."""
+
+    def items(self):
+        raise AssertionError("edge scan")
+
+    def __iter__(self):
+        raise AssertionError("edge scan")
+
+
+scanned = tn_q.edges
+tn_q.edges = _NoScan(scanned)
+try:
+    evo_q.get_agent_detail(center_q, hops=2)
+    evo_q.get_subgraph(center=center_q, flagged=False, min_trust=0.5)
+    evo_q.get_subgraph(flagged=True)
+    test("Agent and subgraph queries never scan the edge list", True)
+except AssertionError as e:
+    test("Agent and subgraph queries never scan the edge list", False, str(e))
+tn_q.edges = scanned
+
+np.random.seed(47)
+random.seed(47)
+sim_q = Simulation(population=20)
+for _ in range(10):
+    sim_q.step()
+clusters_q = sim_q.snapshot.network['clusters']
+cluster_sub = sim_q.subgraph(cluster=0)
+test("Cluster filter uses the published cluster ids",
+     {n['id'] for n in cluster_sub['nodes']} == set(clusters_q[0]))
+try:
+    sim_q.subgraph(cluster=len(clusters_q))
+    test("Unknown cluster rejected", False)
+except ValueError:
+    test("Unknown cluster rejected", True)
+test("Agent and subgraph routes registered",
+     {"/sim/agent/{agent_id}", "/sims/{sim_id}/subgraph"}
+     <= {getattr(r, "path", None) for r in app.routes})
+
+
 # ─── Results ─────────────────────────────────────────────
 print("\n" + "=" * 60)
 print(f"RESULTS: {PASS} passed, {FAIL} failed out of {PASS+FAIL} tests")